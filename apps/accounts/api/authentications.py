@@ -1,5 +1,6 @@
 from typing import Dict, AnyStr, Tuple, Union, NoReturn
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.middleware.csrf import CsrfViewMiddleware
@@ -10,9 +11,14 @@ from rest_framework.request import Request
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
 from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
 from rest_framework_simplejwt.tokens import Token, BlacklistMixin, AccessToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
 
-from accounts.api.mixins import UserTypeForAuthMixin
+from accounts.api.mixins import UserTypeForAuthMixin, USER_TYPE_CLAIM, DOCTOR_ID_CLAIM, PATIENT_ID_CLAIM
+from accounts.caches import AUTH_USER_FIELDS, auth_user_cache
+from accounts.models import Patient
+from accounts.revocations import REFRESH_JTI_CLAIM, token_revocations, revoke_outstanding_tokens
 
 User = get_user_model()
 
@@ -28,10 +34,10 @@ class CustomJWTTokenUserAuthentication(UserTypeForAuthMixin, JWTAuthentication):
             user, validated_token = super().authenticate(request)
         except TypeError:
             return None
-        if user.token_expired != validated_token.payload['exp']:
+        if not self.is_valid_session(user, validated_token):
             raise AuthenticationFailed("User don't have valid token", code='invalid_token')
 
-        user = self.get_typed_user(user)
+        user = self.get_typed_user(user, validated_token)
         self.enforce_csrf(request)
         return user, validated_token
 
@@ -41,15 +47,40 @@ class CustomJWTTokenUserAuthentication(UserTypeForAuthMixin, JWTAuthentication):
         except KeyError:
             raise InvalidToken('Token contained no recognizable user identification')
 
-        try:
-            user = User.objects.only(api_settings.USER_ID_FIELD).get(**{api_settings.USER_ID_FIELD: user_id})
-        except User.DoesNotExist:
-            raise AuthenticationFailed('User not found', code='user_not_found')
+        token_expired = None if self.uses_revocation_set(validated_token) else validated_token.payload['exp']
+        entry = auth_user_cache.get(user_id, token_expired)
+        if entry:
+            user = auth_user_cache.build_user(entry)
+        else:
+            try:
+                user = User.objects.select_related('session'). \
+                    only(*AUTH_USER_FIELDS, 'session__token_expired'). \
+                    get(**{api_settings.USER_ID_FIELD: user_id})
+            except User.DoesNotExist:
+                raise AuthenticationFailed('User not found', code='user_not_found')
 
         if not user.is_active:
             raise AuthenticationFailed('User is inactive', code='user_inactive')
         return user
 
+    def uses_revocation_set(self, validated_token: Token) -> bool:
+        return token_revocations.enabled and REFRESH_JTI_CLAIM in validated_token
+
+    def is_valid_session(self, user: User, validated_token: Token) -> bool:
+        if self.uses_revocation_set(validated_token):
+            return not token_revocations.is_revoked(validated_token[REFRESH_JTI_CLAIM])
+        return user.token_expired == validated_token.payload['exp']
+
+    def get_typed_user(self, user: User, validated_token: Token = None) -> User:
+        # 캐시에서 생성된 user는 user_type이 이미 설정되어 있음
+        if user.user_type is None:
+            group_name = validated_token.get(USER_TYPE_CLAIM) if validated_token else None
+            if group_name is None:
+                group_name = self._get_group_name(user)
+            auth_user_cache.set(user, group_name)
+            user.set_user_type(group_name)
+        return user
+
     def enforce_csrf(self, request: Request) -> NoReturn:
         check = CSRFCheck()
         check.process_request(request)
@@ -98,7 +129,16 @@ class CustomRefreshToken(BlacklistMixin, CustomToken):
     @classmethod
     @transaction.atomic
     def for_user(cls, user: User, raise_error: bool = False) -> 'CustomRefreshToken':
-        token = super().for_user(user)
+        if token_revocations.enabled:  # 이전 세션의 refresh token 폐기
+            revoke_outstanding_tokens([user.id])
+
+        # BlacklistMixin.for_user: claim을 모두 설정한 후 OutstandingToken 저장(저장된 token == 발급된 token)
+        user_id = getattr(user, api_settings.USER_ID_FIELD)
+        token = cls()
+        token[api_settings.USER_ID_CLAIM] = user_id if isinstance(user_id, int) else str(user_id)
+        if getattr(settings, 'JWT_USER_TYPE_CLAIMS', False):
+            token.set_user_type_claims(user)
+        token.create_outstanding_token()
         access_token_exp = int(token.access_token.payload['exp'])
 
         if raise_error:
@@ -107,6 +147,25 @@ class CustomRefreshToken(BlacklistMixin, CustomToken):
         user.set_token_expired(access_token_exp)
         return token
 
+    def create_outstanding_token(self) -> OutstandingToken:
+        # revoke_outstanding_tokens(로그인, group 변경)에서 폐기할 수 있도록 발급된(재발급 포함) refresh token 기록
+        return OutstandingToken.objects.create(user_id=self[api_settings.USER_ID_CLAIM], jti=self[api_settings.JTI_CLAIM], token=str(self),
+                                               created_at=self.current_time,
+                                               expires_at=datetime_from_epoch(self['exp']))
+
+    def set_user_type_claims(self, user: User) -> NoReturn:
+        # access token으로 복사되어 permission 검사 시 group 조회 없이 사용됨
+        group_name = user.groups.values_list('name', flat=True).first()
+        if group_name is None:
+            return
+
+        self[USER_TYPE_CLAIM] = group_name
+        if group_name == 'doctor':
+            self[DOCTOR_ID_CLAIM] = user.id
+        elif group_name == 'patient':
+            self[PATIENT_ID_CLAIM] = user.id
+            self[DOCTOR_ID_CLAIM] = Patient.objects.filter(user_id=user.id).values_list('doctor_id', flat=True).first()
+
     @property
     def access_token(self) -> AccessToken:
         access = AccessToken()
@@ -117,5 +176,6 @@ class CustomRefreshToken(BlacklistMixin, CustomToken):
             if claim in no_copy:
                 continue
             access[claim] = value
+        access[REFRESH_JTI_CLAIM] = self[api_settings.JTI_CLAIM]
 
         return access
@@ -1,17 +1,53 @@
 from typing import NoReturn, Type
 
 from django.db.models import QuerySet
-from django_filters.fields import Lookup
+from django_filters.constants import EMPTY_VALUES
+from django_filters.fields import Lookup, LookupChoiceField
 from django_filters.rest_framework import FilterSet, CharFilter, NumberFilter, LookupChoiceFilter
 from rest_framework.exceptions import ValidationError
 
-from accounts.models import Patient, Doctor
-from config.utils.filter_backends import create_extra_expression
+from accounts.models import Patient, Doctor, NameSearchToken
+
+NAME_LOOKUP_CHOICES = [
+    ('exact', 'Equals'),
+    ('startswith', 'Starts with'),
+    ('contains', 'Contains'),
+]
+
+
+class NameLookupChoiceField(LookupChoiceField):
+    def compress(self, data_list):
+        # lookup을 생략한 경우 exact(기존 CharFilter와 동일)
+        if len(data_list) == 2 and data_list[0] not in EMPTY_VALUES and data_list[1] in EMPTY_VALUES:
+            data_list = [data_list[0], 'exact']
+        return super().compress(data_list)
+
+
+class NameLookupChoiceFilter(LookupChoiceFilter):
+    """
+    full_name(성+이름) column 및 NameSearchToken을 이용한 이름 검색
+    - ?full_name=김환자&full_name_lookup=exact|startswith|contains
+    - prefix: 의사/환자 모델까지의 경로(ex: 'writer__'), user_type: 'doctor' 또는 'patient'
+    """
+    outer_class = NameLookupChoiceField
+
+    def __init__(self, prefix: str = '', user_type: str = None, **kwargs):
+        kwargs.setdefault('lookup_choices', NAME_LOOKUP_CHOICES)
+        kwargs.setdefault('field_class', CharFilter.field_class)
+        self.prefix: str = prefix
+        self.user_type: str = user_type
+        super().__init__(field_name=f'{prefix}full_name', **kwargs)
+
+    def filter(self, qs: Type[QuerySet], lookup: Lookup) -> QuerySet:
+        if not lookup:
+            return super().filter(qs, None)
+        return qs.filter(NameSearchToken.objects.lookup_q(lookup.value, lookup.lookup_expr, self.user_type,
+                                                          self.prefix))
 
 
 class DoctorFilter(FilterSet):
     major_id = NumberFilter(field_name='major_id', label='major pk')
-    full_name = CharFilter(field_name='full_name', label='full name')
+    full_name = NameLookupChoiceFilter(user_type='doctor', label='full name')
     major_name = CharFilter(field_name='major_name', label='major name')
     department_name = CharFilter(field_name='department_name', label='department name')
     medical_center_name = CharFilter(field_name='medical_center_name', label='medical center name')
@@ -36,8 +72,10 @@ class AgeLookupChoiceFilter(CustomLookupChoiceFilter):
 
         self.lookup_expr = lookup.lookup_expr
         self.validate_value(lookup.value)
-        expression = create_extra_expression({self.lookup_expr: lookup.value})
-        return qs.add_extra_for_age(expression)
+        age = int(lookup.value)
+        min_age = age if self.lookup_expr in ('exact', 'gte') else None
+        max_age = age if self.lookup_expr in ('exact', 'lte') else None
+        return qs.filter_by_age(min_age=min_age, max_age=max_age)
 
 
 class AgeRangeLookupChoiceFilter(CustomLookupChoiceFilter):
@@ -50,14 +88,13 @@ class AgeRangeLookupChoiceFilter(CustomLookupChoiceFilter):
         for age in min_age, max_age:
             self.validate_value(age)
 
-        expression = create_extra_expression({'lte': max_age, 'gte': min_age})
-        return qs.add_extra_for_age(expression)
+        return qs.filter_by_age(min_age=int(min_age), max_age=int(max_age))
 
 
 class PatientFilter(FilterSet):
     user_id = NumberFilter(field_name='user_id', label='user id')
-    full_name = CharFilter(field_name='full_name', label='full name')
-    doctor_name = CharFilter(field_name='doctor_name', label='doctor name')
+    full_name = NameLookupChoiceFilter(user_type='patient', label='full name')
+    doctor_name = NameLookupChoiceFilter(prefix='doctor__', user_type='doctor', label='doctor name')
     doctor_id = NumberFilter(field_name='doctor_id', label='doctor id')
     age = AgeLookupChoiceFilter(
         field_class=NumberFilter.field_class,
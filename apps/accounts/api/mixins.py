@@ -1,18 +1,28 @@
-from typing import TYPE_CHECKING, NoReturn, Dict, Tuple, Union
+from typing import TYPE_CHECKING, NoReturn, Dict, Tuple, Union, Optional, List, Type
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from rest_framework import permissions
 from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
 
 from accounts.api.utils import PostProcessingUserDirector
 from accounts.models import BaseUser
+from accounts.revocations import revoke_token
 
 if TYPE_CHECKING:
+    from django.db.models import QuerySet
+    from rest_framework.serializers import Serializer
+
     from accounts.api.authentications import CustomRefreshToken
 
 User = get_user_model()
 
+# JWT_USER_TYPE_CLAIMS 설정 시 token에 포함되는 claim
+USER_TYPE_CLAIM = 'user_type'
+DOCTOR_ID_CLAIM = 'doctor_id'
+PATIENT_ID_CLAIM = 'patient_id'
+
 
 class SignupSerializerMixin:
     def create(self, validated_data: Dict[str, str]):
@@ -36,6 +46,8 @@ class RefreshBlacklistMixin:
                     refresh.blacklist()
                 except AttributeError:
                     pass
+                else:
+                    revoke_token(refresh)
 
     def set_refresh_payload(self, refresh: 'CustomRefreshToken') -> NoReturn:
         refresh.set_jti()
@@ -68,6 +80,10 @@ class PermissionMixin:
         if not self.is_authenticated(request):
             return False
 
+        claimed_group = self.get_token_claim(request, USER_TYPE_CLAIM)
+        if claimed_group is not None:  # 검증된 token의 claim 사용(DB 조회 x)
+            return claimed_group == group_name
+
         user = request.user
         user_type = user.user_type
 
@@ -76,6 +92,18 @@ class PermissionMixin:
         else:
             return user.groups.filter(name=group_name).exists()
 
+    def get_token_claim(self, request, claim: str) -> Optional[Union[str, int]]:
+        token = request.auth
+        if isinstance(token, Token):
+            return token.get(claim)
+        return None
+
+    def get_doctor_id(self, request) -> int:
+        return self.get_token_claim(request, DOCTOR_ID_CLAIM) or request.user.id
+
+    def get_patient_id(self, request) -> int:
+        return self.get_token_claim(request, PATIENT_ID_CLAIM) or request.user.id
+
     def is_related(self, request, obj) -> bool:
         user = request.user
         id_field = ''
@@ -105,6 +133,24 @@ class UserTypeForAuthMixin:
             raise Exception('invalid user')
 
     def _get_group_name(self, user: User) -> str:
-        group_list = user.groups.values_list('name')
-        if group_list:
-            return list(user.groups.values_list('name', flat=True))[0]
+        return user.groups.values_list('name', flat=True).first()
+
+
+def get_serializer_annotations(serializer_class: Type['Serializer']) -> List[str]:
+    meta = getattr(serializer_class, 'Meta', None)
+    return list(getattr(meta, 'annotations', []))
+
+
+class AnnotationQuerySetMixin:
+    """
+    serializer의 Meta.annotations에 선언된 annotation만 queryset에 추가
+    - ex: PatientListSerializer.Meta.annotations = ['age'] -> Patient.objects.with_annotations('age')
+    """
+
+    def get_queryset(self) -> 'QuerySet':
+        queryset = super().get_queryset()
+        annotations = get_serializer_annotations(self.get_serializer_class())
+        if annotations and hasattr(queryset, 'with_annotations'):
+            queryset = queryset.with_annotations(*annotations)
+        return queryset
+
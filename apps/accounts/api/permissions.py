@@ -42,7 +42,7 @@ class IsOwner(RootPermission):
 class CareDoctorReadOnly(RootPermission):
     def has_object_permission(self, request: Request, view: View, obj: Type[Model]) -> bool:
         if self.is_safe_method(request) and self.has_group(request, 'doctor'):
-            return bool(obj.doctor_id == request.user.id)
+            return bool(obj.doctor_id == self.get_doctor_id(request))
         return False
 
 
@@ -54,8 +54,7 @@ class PatientReadOnly(RootPermission):
 class RelatedPatientReadOnly(RootPermission):
     def has_object_permission(self, request: Request, view: View, obj: Type[Model]) -> bool:
         if self.is_safe_method(request) and self.has_group(request, 'patient'):
-            user_patient_id = request.user.id
-            return bool(obj.patient_id == user_patient_id)
+            return bool(obj.patient_id == self.get_patient_id(request))
         return False
 
 
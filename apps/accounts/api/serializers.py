@@ -1,11 +1,13 @@
 from typing import Union, Dict, AnyStr, NoReturn
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
 from django.db import transaction
 from django.urls import reverse
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import Token
 
 from accounts.api.authentications import CustomRefreshToken
@@ -162,9 +164,10 @@ class PatientListSerializer(AccountSerializer):
     class Meta:
         model = Patient
         fields = ['url'] + PatientFields.list_field
+        annotations = ['age']
 
     def get_age(self, instance: Patient) -> int:
-        return instance.age
+        return instance.age if hasattr(instance, 'age') else instance.get_age()
 
 
 class PatientDetailSerializer(PatientListSerializer):
@@ -216,6 +219,7 @@ class PatientChoiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Patient
         fields = ['user_id', 'full_name', 'doctor_id', 'doctor_name', 'gender', 'age']
+        annotations = ['doctor_name', 'age']
 
     def get_full_name(self, instance):
         return instance.full_name
@@ -234,17 +238,27 @@ class AccountsTokenSerializer(TokenObtainPairSerializer):
         return token
 
     def validate(self, attrs: Dict[str, str]) -> Dict[str, str]:
-        data = super(AccountsTokenSerializer, self).validate(attrs)
-        self._add_next_url(data)
+        super(TokenObtainPairSerializer, self).validate(attrs)  # 인증(self.user)
+        return self.get_token_data(self.user)
+
+    @classmethod
+    def get_token_data(cls, user: User) -> Dict[str, str]:
+        # 인증된 사용자의 token 발급(async login view에서도 사용)
+        refresh = cls.get_token(user)
+        data = {'refresh': str(refresh), 'access': str(refresh.access_token)}
+        if getattr(api_settings, 'UPDATE_LAST_LOGIN', False):
+            update_last_login(None, user)
+        cls._add_next_url(data, user)
         return data
 
-    def _add_next_url(self, data: Dict[str, str]):
+    @classmethod
+    def _add_next_url(cls, data: Dict[str, str], user: User):
         # if self.user.user_type.doctor:  # Login은 AllowAny 권한을 갖기 때문에 Authentication 구문이 실행되지 않음
-        if hasattr(self.user, 'doctor'):
-            data['main_url'] = reverse('core-api:doctors:detail', kwargs={'pk': self.user.id})
+        if hasattr(user, 'doctor'):
+            data['main_url'] = reverse('core-api:doctors:detail', kwargs={'pk': user.id})
         # elif self.user.user_type.patient:
-        elif hasattr(self.user, 'patient'):
-            data['main_url'] = reverse('core-api:patients:main', kwargs={'pk': self.user.id})
+        elif hasattr(user, 'patient'):
+            data['main_url'] = reverse('core-api:patients:main', kwargs={'pk': user.id})
 
 
 class AccountsTokenRefreshSerializer(RefreshBlacklistMixin, TokenRefreshSerializer):
@@ -252,12 +266,14 @@ class AccountsTokenRefreshSerializer(RefreshBlacklistMixin, TokenRefreshSerializ
     def validate(self, attrs: Dict[str, Union[AnyStr, int]]) -> Dict[str, Union[AnyStr, int]]:
 
         refresh_obj = CustomRefreshToken(attrs['refresh'])
-        data = {'access': str(refresh_obj.access_token)}
-        access_token_exp = refresh_obj.access_token.payload['exp']
-
         self.try_blacklist(refresh=refresh_obj)
         self.set_refresh_payload(refresh=refresh_obj)
-        self.set_user_expired_to(epoch_time=access_token_exp)
+        refresh_obj.create_outstanding_token()  # 새 jti: 재로그인, group 변경 시 폐기 대상
+
+        # access token은 새로 발급된 refresh token의 jti(refresh_jti claim)를 가져야 함
+        access_token = refresh_obj.access_token
+        data = {'access': str(access_token)}
+        self.set_user_expired_to(epoch_time=access_token.payload['exp'])
 
         refresh_token = str(refresh_obj)
         data['refresh'] = refresh_token
@@ -17,7 +17,16 @@ urlpatterns = [
     path('patients/<int:pk>/update', views.PatientUpdateAPIView.as_view(), name='patient-update'),
     path('signup/patient', PatientSignUpAPIView.as_view(), name='api-signup-patient'),
 
+    # import(superuser)
+    path('import/<str:user_type>', views.AccountImportAPIView.as_view(), name='account-import'),
+
     # choices
     path('choices/doctors', views.DoctorChoicesAPIView.as_view(), name='doctor-choices'),
     path('choices/patients', views.PatientChoicesAPIView.as_view(), name='patient-choices'),
+
+    # autocomplete(type-ahead)
+    path('autocomplete/doctors', views.AutocompleteAPIView.as_view(), {'user_type': 'doctor'},
+         name='doctor-autocomplete'),
+    path('autocomplete/patients', views.AutocompleteAPIView.as_view(), {'user_type': 'patient'},
+         name='patient-autocomplete'),
 ]
@@ -1,10 +1,10 @@
+import threading
 from abc import ABCMeta, abstractmethod
-from typing import TYPE_CHECKING, Union, NoReturn, Optional
+from typing import TYPE_CHECKING, Union, NoReturn, Optional, Dict, List, Tuple
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
 
 if TYPE_CHECKING:
     from accounts.models import Patient, Doctor
@@ -71,10 +71,58 @@ class GroupPermissionInterface(metaclass=ABCMeta):
         raise NotImplementedError("This method must be implemented in subclasses!")
 
 
+class GroupPermissionRegistry:
+    """
+    GroupPermissionRegistry: 사용자 모델(doctor, patient)별 group과 permission id를 최초 사용 시 1회 조회하여 저장
+    - 무효화: Group, Permission 변경 시(AccountsConfig.ready에서 signal 연결)
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, Tuple[int, List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str) -> Tuple[int, List[int]]:
+        template = self._templates.get(model_name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(model_name)
+                if template is None:
+                    template = self._load(model_name)
+        return template
+
+    def clear(self, *args, **kwargs) -> NoReturn:
+        self._templates.clear()
+
+    def _load(self, model_name: str) -> Tuple[int, List[int]]:
+        model_names = self._get_model_names(model_name)
+        permission_ids = list(Permission.objects.filter(content_type__app_label='accounts',
+                                                        content_type__model__in=model_names).
+                              values_list('id', flat=True))
+        if not permission_ids:
+            raise ContentType.DoesNotExist('not found ContentType object')
+
+        group, created = Group.objects.get_or_create(name=model_name)
+        if created:  # 생성된 group은 transaction이 끝난 뒤 다음 호출에서 저장
+            group.permissions.set(permission_ids)
+        else:
+            self._templates[model_name] = (group.id, permission_ids)
+        return group.id, permission_ids
+
+    def _get_model_names(self, model_name: str) -> List[str]:
+        model_names = [model_name]
+        if model_name == 'doctor':
+            model_names.append('prescription')  # 의사일 경우 perscription 모델에 대한 권한이 필요함
+        return model_names
+
+
+group_permission_registry = GroupPermissionRegistry()
+
+
 class GroupPermissionBuilder(GroupPermissionInterface):  # base builder pattern
-    def __init__(self, pair_user: 'UserPair' = None, permissions: 'Permission' = None):
+    def __init__(self, pair_user: 'UserPair' = None, permissions: List[int] = None):
         self.pair_user: 'UserPair' = pair_user
-        self.permissions: 'Permission' = permissions
+        self.permissions: List[int] = permissions
+        self.group_id: Optional[int] = None
 
     def build(self):
         self.set_permissions_for_models()
@@ -85,42 +133,25 @@ class GroupPermissionBuilder(GroupPermissionInterface):  # base builder pattern
             raise Exception
 
     def set_permissions_for_models(self) -> NoReturn:
-        queries = self._create_content_type_queries()
-        self.permissions = Permission.objects.filter(queries)
+        self.group_id, self.permissions = group_permission_registry.get(self.pair_user.user_model_name)
 
     def add_user_to_model_group(self) -> NoReturn:
-        group, created = Group.objects.get_or_create(name=self.pair_user.user_model_name)
-
+        # 신규 사용자이므로 groups.add()의 기존 row 조회 없이 through 모델에 바로 insert
         baseuser = self.pair_user.baseuser
-        if created and self.permissions.exists():
-            group.permissions.set(self.permissions)
-
-        self._add_usertype_to_instance(baseuser, group)
+        field_name = self._get_m2m_field_name('groups')
+        User.groups.through.objects.create(**{f'{field_name}_id': baseuser.id, 'group_id': self.group_id})
+        baseuser.set_user_type(self.pair_user.user_model_name)
 
     def grant_permission_to_baseuser(self) -> NoReturn:
-        self.pair_user.baseuser.user_permissions.set(self.permissions)
-
-    def _create_content_type_queries(self) -> Q:
-        queries = self._create_queries_using_model_name(self.pair_user.user_model_name)
-        content_type_query = Q()
-        content_types = ContentType.objects.filter(queries, app_label='accounts')
-
-        if not content_types.exists():
-            raise ContentType.DoesNotExist('not found ContentType object')
-
-        for content in content_types:
-            content_type_query |= Q(content_type=content)
-        return content_type_query
-
-    def _create_queries_using_model_name(self, model_name: str) -> Q:
-        query = Q(model=model_name)
-        if model_name == 'doctor':
-            query |= Q(model='prescription')  # 의사일 경우 perscription 모델에 대한 권한이 필요함
-        return query
-
-    def _add_usertype_to_instance(self, baseuser, group):
-        baseuser.groups.add(group)
-        baseuser.set_user_type(group.name)
+        baseuser = self.pair_user.baseuser
+        field_name = self._get_m2m_field_name('user_permissions')
+        User.user_permissions.through.objects.bulk_create(
+            [User.user_permissions.through(**{f'{field_name}_id': baseuser.id, 'permission_id': permission_id})
+             for permission_id in self.permissions]
+        )
+
+    def _get_m2m_field_name(self, field: str) -> str:
+        return User._meta.get_field(field).m2m_field_name()
 
 
 class PostProcessingUserDirector:
@@ -1,10 +1,16 @@
+import json
 from typing import Type, NoReturn, Dict, Any, Optional
 
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.request import Request
@@ -18,11 +24,18 @@ from accounts import docs
 from accounts.api import serializers
 from accounts.api.authentications import CustomJWTTokenUserAuthentication
 from accounts.api.filters import DoctorFilter, PatientFilter
-from accounts.api.permissions import IsDoctor, IsOwner, CareDoctorReadOnly, RelatedPatientReadOnly
+from accounts.api.mixins import AnnotationQuerySetMixin, PermissionMixin
+from accounts.api.permissions import IsDoctor, IsOwner, CareDoctorReadOnly, RelatedPatientReadOnly, IsSuperUser
 from accounts.api.serializers import AccountsTokenSerializer, AccountsTokenRefreshSerializer, DoctorSignUpSerializer
+from accounts.autocomplete import autocomplete_index
+from accounts.hashing import PasswordHashBusy, password_hash_executor, verify_password
+from accounts.importers import IMPORTERS, import_accounts, read_rows, text_stream
 from accounts.models import Doctor, Patient
+from accounts.revocations import revoke_token
 from config.utils.doc_utils import CommonFilterDescriptionInspector
 
+User = get_user_model()
+
 
 class AccountsTokenPairView(TokenObtainPairView):
     permission_classes = [AllowAny]
@@ -47,15 +60,74 @@ class AccountsTokenPairView(TokenObtainPairView):
         return serializer.validated_data
 
     def create_response(self, serialized_data, refresh_token):
-        if refresh_token:
-            response_data, response_status = serialized_data, status.HTTP_200_OK
+        return create_token_response(serialized_data, refresh_token)
+
+
+def create_token_response(serialized_data: Dict[str, Any], refresh_token: Optional[str],
+                          response_class: Type[HttpResponse] = Response) -> HttpResponse:
+    if refresh_token:
+        response_data, response_status = serialized_data, status.HTTP_200_OK
+    else:
+        response_data, response_status = {'error': 'can not create refresh token'}, status.HTTP_400_BAD_REQUEST
+
+    response = response_class(response_data, status=response_status)
+    response.set_cookie(key='refresh_token', value=refresh_token, httponly=True)  # ssl 적용시 secure=True
+    return response
+
+
+def get_login_user(email: str) -> Optional[User]:
+    try:
+        return User.objects.only('id', 'email', 'password', 'is_active').get(**{User.USERNAME_FIELD: email})
+    except User.DoesNotExist:
+        return None
+
+
+def update_password(user: User, encoded: str) -> NoReturn:
+    User.objects.filter(id=user.id).update(password=encoded)
+
+
+async def async_token_login_view(request: HttpRequest) -> HttpResponse:
+    """
+    AccountsTokenPairView의 async(ASGI) 버전
+    - password hash를 password_hash_executor에서 실행하여 login이 몰려도 다른 요청을 처리할 수 있음
+    - hash 대기열이 가득 찬 경우 503(Retry-After) 응답
+    """
+    if request.method != 'POST':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'},
+                            status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    try:
+        credentials = json.loads(request.body) if request.content_type == 'application/json' else request.POST
+    except ValueError:
+        return JsonResponse({'detail': 'invalid json'}, status=status.HTTP_400_BAD_REQUEST)
+
+    email, password = credentials.get(User.USERNAME_FIELD), credentials.get('password')
+    if not email or not password:
+        return JsonResponse({'detail': 'email and password are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = await sync_to_async(get_login_user, thread_sensitive=True)(email)
+    try:
+        if user is None:  # 계정 존재 여부에 따른 응답 시간 차이 방지(ModelBackend와 동일)
+            await password_hash_executor.run(make_password, password)
+            is_valid, new_encoded = False, None
         else:
-            response_data, response_status = {'error': 'can not create refresh token'}, status.HTTP_400_BAD_REQUEST
-
-        response = Response(data=response_data, status=response_status)
-        response.set_cookie(key='refresh_token', value=refresh_token, httponly=True)  # ssl 적용시 secure=True
+            is_valid, new_encoded = await password_hash_executor.run(verify_password, password, user.password)
+    except PasswordHashBusy as e:
+        response = JsonResponse({'detail': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '1'
         return response
 
+    if not is_valid or not user.is_active:
+        return JsonResponse({'detail': 'No active account found with the given credentials'},
+                            status=status.HTTP_401_UNAUTHORIZED)
+    if new_encoded:
+        await sync_to_async(update_password, thread_sensitive=True)(user, new_encoded)
+
+    data = await sync_to_async(AccountsTokenSerializer.get_token_data, thread_sensitive=True)(user)
+    return create_token_response(data, data.pop('refresh', None), response_class=JsonResponse)
+
+
+async_token_login_view.csrf_exempt = True  # csrf_exempt decorator는 async view를 지원하지 않음(django 3.1)
+
 
 class AccountsTokenRefreshView(TokenRefreshView):
     serializer_class = AccountsTokenRefreshSerializer
@@ -84,6 +156,7 @@ class TokenLogoutView(APIView):
         if refresh_token:
             refresh = RefreshToken(refresh_token)
             refresh.blacklist()
+            revoke_token(refresh)
         else:
             raise ValueError("you don't have refresh token")
         user.set_token_expired(0)
@@ -146,7 +219,7 @@ class PatientSignUpAPIView(CreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
-class PatientListAPIView(ListAPIView):
+class PatientListAPIView(AnnotationQuerySetMixin, ListAPIView):
     queryset = Patient.objects.select_all().order_by('-created_at')
     serializer_class = serializers.PatientListSerializer
     permission_classes = [IsDoctor]
@@ -164,7 +237,7 @@ class PatientListAPIView(ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class PatientRetrieveAPIView(RetrieveAPIView):
+class PatientRetrieveAPIView(AnnotationQuerySetMixin, RetrieveAPIView):
     queryset = Patient.objects.select_all()
     serializer_class = serializers.PatientDetailSerializer
     permission_classes = [CareDoctorReadOnly | IsOwner]
@@ -190,7 +263,7 @@ class PatientUpdateAPIView(UpdateAPIView):
         return super().patch(request, *args, **kwargs)
 
 
-class DoctorChoicesAPIView(ListAPIView):
+class DoctorChoicesAPIView(AnnotationQuerySetMixin, ListAPIView):
     queryset = Doctor.objects.choice_fields()
     serializer_class = serializers.DoctorChoiceSerializer
     permission_classes = [IsAuthenticated]
@@ -201,7 +274,7 @@ class DoctorChoicesAPIView(ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class PatientChoicesAPIView(ListAPIView):
+class PatientChoicesAPIView(AnnotationQuerySetMixin, ListAPIView):
     queryset = Patient.objects.choice_fields()
     serializer_class = serializers.PatientChoiceSerializer
     permission_classes = [IsAuthenticated]
@@ -212,6 +285,58 @@ class PatientChoicesAPIView(ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
+class AutocompleteAPIView(PermissionMixin, APIView):
+    """
+    의사/환자 선택(type-ahead)용 자동완성(accounts.autocomplete.AutocompleteIndex 사용)
+    - doctors: 전체 의사, patients: 요청한 의사의 담당 환자(superuser: 전체 또는 doctor_id)
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 10
+    max_limit = 50
+
+    @swagger_auto_schema(**docs.account_autocomplete)
+    def get(self, request, user_type: str, *args, **kwargs):
+        doctor_id = self.get_scope(request, user_type)
+        query = request.query_params.get('q', '')
+        entries = autocomplete_index.search(query, user_type, doctor_id=doctor_id, limit=self.get_limit(request))
+        return Response(data=[entry.to_dict() for entry in entries], status=status.HTTP_200_OK)
+
+    def get_scope(self, request: Request, user_type: str) -> Optional[int]:
+        if user_type == 'doctor':
+            return None
+        if self.is_superuser(request):
+            doctor_id = request.query_params.get('doctor_id')
+            return int(doctor_id) if doctor_id and doctor_id.isdigit() else None
+        if self.has_group(request, 'doctor'):
+            return self.get_doctor_id(request)
+        raise PermissionDenied()
+
+    def get_limit(self, request: Request) -> int:
+        limit = request.query_params.get('limit', '')
+        return min(int(limit), self.max_limit) if limit.isdigit() else self.default_limit
+
+
+class AccountImportAPIView(APIView):
+    permission_classes = [IsSuperUser]
+    parser_classes = [MultiPartParser]
+
+    @swagger_auto_schema(**docs.account_import)
+    def post(self, request, user_type: str, *args, **kwargs):
+        if user_type not in IMPORTERS:
+            raise ValidationError({'user_type': f'{user_type} is invalid user type'})
+        uploaded_file = request.FILES.get('file')
+        if uploaded_file is None:
+            raise ValidationError({'file': 'required'})
+
+        file_format = request.data.get('format') or uploaded_file.name.rsplit('.', 1)[-1].lower()
+        if file_format not in ('csv', 'ndjson'):
+            raise ValidationError({'format': f'{file_format} is invalid format(csv, ndjson)'})
+
+        rows = read_rows(text_stream(uploaded_file), file_format)
+        report = import_accounts(user_type, rows, use_processes=False)  # web worker 내부이므로 thread pool 사용
+        return Response(data=report.to_dict(), status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def session_logout_view(request):
@@ -1,10 +1,34 @@
 from django.apps import AppConfig
-from django.core.signals import request_started
 
 
 class AccountsConfig(AppConfig):
     name = 'accounts'
 
     def ready(self):
-        from config.utils.utils import log_request
-        request_started.connect(log_request)
+        self.connect_group_permission_registry()
+        self.register_metrics()
+
+    def connect_group_permission_registry(self):
+        # group, permission 변경 시 signup에 사용되는 group/permission 정보 초기화
+        from django.contrib.auth.models import Group, Permission
+        from django.db.models.signals import post_save, post_delete, m2m_changed
+        from accounts.api.utils import group_permission_registry
+
+        for model in (Group, Permission):
+            post_save.connect(group_permission_registry.clear, sender=model,
+                              dispatch_uid=f'registry_save_{model.__name__}')
+            post_delete.connect(group_permission_registry.clear, sender=model,
+                                dispatch_uid=f'registry_delete_{model.__name__}')
+        m2m_changed.connect(group_permission_registry.clear, sender=Group.permissions.through,
+                            dispatch_uid='registry_group_permissions')
+
+    def register_metrics(self):
+        # password hash executor(async login) 처리량, 대기/처리 시간
+        from accounts.hashing import password_hash_executor
+        from config.utils.metrics import metrics
+
+        metrics.counter('password_hash_total', 'Password hashes run in the executor.')
+        metrics.counter('password_hash_rejected_total', 'Password hashes rejected by backpressure.')
+        metrics.counter('password_hash_queue_seconds_total', 'Time password hashes waited in the executor queue.')
+        metrics.counter('password_hash_seconds_total', 'Time spent computing password hashes.')
+        metrics.register_collector(password_hash_executor.metrics.collect)
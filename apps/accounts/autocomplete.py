@@ -0,0 +1,246 @@
+import heapq
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, NoReturn, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+from config.utils.utils import normalize_name, split_name_tokens
+
+# (user_type, doctor_id): 환자는 담당 의사별, 의사는 전체(doctor_id=None)
+ScopeKey = Tuple[str, Optional[int]]
+
+
+class AutocompleteEntry(NamedTuple):
+    user_id: int
+    user_type: str
+    doctor_id: Optional[int]  # 환자: 담당 의사, 의사: None
+    name: str  # 출력용(성+이름)
+    full_name: str  # 검색용(normalize_name)
+    phone: str  # 숫자만
+    extra: Dict[str, Any]  # 출력용 추가 정보(major_id 등)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'user_id': self.user_id, 'full_name': self.name}
+        if self.user_type == 'patient':
+            data['doctor_id'] = self.doctor_id
+        data.update(self.extra)
+        return data
+
+
+class AutocompleteScope:
+    # 하나의 scope(의사 1명의 환자 목록 또는 의사 전체)에 대한 n-gram(unigram, bigram) 역색인
+    def __init__(self):
+        self.entries: Dict[int, AutocompleteEntry] = {}
+        self.postings: Dict[str, Set[int]] = {}
+
+    def add(self, entry: AutocompleteEntry) -> NoReturn:
+        self.remove(entry.user_id)
+        self.entries[entry.user_id] = entry
+        for gram in self._grams(entry):
+            self.postings.setdefault(gram, set()).add(entry.user_id)
+
+    def remove(self, user_id: int) -> NoReturn:
+        entry = self.entries.pop(user_id, None)
+        if entry is None:
+            return
+        for gram in self._grams(entry):
+            user_ids = self.postings.get(gram)
+            if user_ids is not None:
+                user_ids.discard(user_id)
+                if not user_ids:
+                    del self.postings[gram]
+
+    def candidates(self, grams: List[str]) -> Set[int]:
+        # 짧은 posting부터 교집합
+        postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        if not postings or not postings[0]:
+            return set()
+        result = set(postings[0])
+        for user_ids in postings[1:]:
+            result &= user_ids
+            if not result:
+                break
+        return result
+
+    def _grams(self, entry: AutocompleteEntry) -> Set[str]:
+        # 이름: 전체, 전화번호: 뒷자리 4자리, id: 전체
+        return {*split_name_tokens(entry.full_name), *split_name_tokens(entry.phone[-4:]),
+                *split_name_tokens(str(entry.user_id))}
+
+
+class AutocompleteIndex:
+    """
+    AutocompleteIndex: 의사/환자 선택(type-ahead)용 process memory 색인
+    - 최초 검색 시 DB에서 전체 로드, 이후 post_save/post_delete signal(commit 이후)로 갱신
+    - 다른 process의 변경 사항: AUTOCOMPLETE_SYNC_INTERVAL 초마다 updated_at 기준 증분 동기화,
+      AUTOCOMPLETE_REBUILD_INTERVAL 초마다 전체 재생성(비활성화, 삭제된 사용자 반영)
+    - 검색 순서: id 일치 -> 이름 일치 -> 이름 prefix -> 전화번호 뒷자리 -> 이름 포함
+    - lock: _lock(동기화, DB 조회 포함), _index_lock(scope 변경과 검색, 메모리 작업만)
+    """
+
+    def __init__(self):
+        self.scopes: Dict[ScopeKey, AutocompleteScope] = {}
+        self.locations: Dict[Tuple[str, int], ScopeKey] = {}  # (user_type, user_id): scope key
+        self.loaded: bool = False
+        self.last_synced_at: float = 0.0
+        self.last_rebuilt_at: float = 0.0
+        self.last_updated_at = None  # 동기화된 마지막 updated_at(DB 시간)
+        self._lock = threading.RLock()
+        self._index_lock = threading.Lock()  # 동기화 중(DB 조회)에도 검색은 대기하지 않음
+
+    @property
+    def sync_interval(self) -> int:
+        return getattr(settings, 'AUTOCOMPLETE_SYNC_INTERVAL', 5)
+
+    @property
+    def rebuild_interval(self) -> int:
+        return getattr(settings, 'AUTOCOMPLETE_REBUILD_INTERVAL', 600)
+
+    def search(self, query: str, user_type: str, doctor_id: Optional[int] = None,
+               limit: int = 10) -> List[AutocompleteEntry]:
+        self.sync_if_needed()
+        value = normalize_name(query)
+        digits = re.sub(r'\D', '', value)
+        grams = split_name_tokens(value, query=True)
+        if not grams:
+            return []
+
+        results = []
+        with self._index_lock:  # sync(), signal의 add/remove와 동시에 scope를 읽지 않음
+            for scope in self._get_scopes(user_type, doctor_id):
+                for user_id in scope.candidates(grams):
+                    entry = scope.entries[user_id]
+                    rank = self._rank(entry, value, digits)
+                    if rank is not None:
+                        results.append((rank, entry.full_name, entry.user_id, entry))
+        return [entry for *_, entry in heapq.nsmallest(limit, results, key=lambda result: result[:3])]
+
+    def _rank(self, entry: AutocompleteEntry, value: str, digits: str) -> Optional[int]:
+        if value == str(entry.user_id):
+            return 0
+        if entry.full_name == value:
+            return 1
+        if entry.full_name.startswith(value):
+            return 2
+        if digits == value and entry.phone.endswith(digits):
+            return 3
+        if value in entry.full_name:
+            return 4
+        return None
+
+    def _get_scopes(self, user_type: str, doctor_id: Optional[int]) -> Iterable[AutocompleteScope]:
+        if user_type == 'doctor' or doctor_id is not None:
+            scope = self.scopes.get((user_type, doctor_id if user_type == 'patient' else None))
+            return [scope] if scope else []
+        # 환자 전체(superuser)
+        return [scope for (scope_type, _), scope in self.scopes.items() if scope_type == user_type]
+
+    def add(self, entry: AutocompleteEntry) -> NoReturn:
+        with self._lock, self._index_lock:
+            self._remove(entry.user_type, entry.user_id)
+            self._add_to(self.scopes, self.locations, entry)
+
+    def remove(self, user_type: str, user_id: int) -> NoReturn:
+        with self._lock, self._index_lock:
+            self._remove(user_type, user_id)
+
+    def _remove(self, user_type: str, user_id: int) -> NoReturn:
+        key = self.locations.pop((user_type, user_id), None)
+        if key is not None:
+            self.scopes[key].remove(user_id)
+
+    def _add_to(self, scopes: Dict[ScopeKey, AutocompleteScope], locations: Dict[Tuple[str, int], ScopeKey],
+                entry: AutocompleteEntry) -> NoReturn:
+        key = (entry.user_type, entry.doctor_id if entry.user_type == 'patient' else None)
+        scopes.setdefault(key, AutocompleteScope()).add(entry)
+        locations[(entry.user_type, entry.user_id)] = key
+
+    def sync_if_needed(self) -> NoReturn:
+        current = time.monotonic()
+        if self.loaded and current - self.last_synced_at < self.sync_interval:
+            return
+        if not self._lock.acquire(blocking=not self.loaded):  # 다른 thread가 동기화 중이면 기존 값 사용
+            return
+        try:
+            if not self.loaded or current - self.last_rebuilt_at >= self.rebuild_interval:
+                self.rebuild()
+            else:
+                self.sync()
+        finally:
+            self._lock.release()
+
+    def rebuild(self) -> NoReturn:
+        with self._lock:
+            synced_at = now()
+            scopes, locations = {}, {}
+            for entry in self._load_entries():
+                self._add_to(scopes, locations, entry)
+            with self._index_lock:  # 재생성 중에는 기존 색인으로 검색
+                self.scopes, self.locations = scopes, locations
+            self.loaded = True
+            self.last_updated_at = synced_at
+            self.last_synced_at = self.last_rebuilt_at = time.monotonic()
+
+    def sync(self) -> NoReturn:
+        with self._lock:
+            synced_at = now()
+            for entry in self._load_entries(updated_after=self.last_updated_at):
+                self.add(entry)
+            self.last_updated_at = synced_at
+            self.last_synced_at = time.monotonic()
+
+    def _load_entries(self, updated_after=None) -> Iterable[AutocompleteEntry]:
+        from accounts.models import Doctor, Patient
+
+        doctors = Doctor.objects.values_list('user_id', 'first_name', 'last_name', 'full_name', 'phone', 'major_id')
+        patients = Patient.objects.values_list('user_id', 'first_name', 'last_name', 'full_name', 'phone',
+                                               'doctor_id')
+        if updated_after is not None:
+            doctors = doctors.filter(updated_at__gte=updated_after)
+            patients = patients.filter(updated_at__gte=updated_after)
+
+        for user_id, first_name, last_name, full_name, phone, major_id in doctors.iterator():
+            yield make_entry('doctor', user_id, first_name, last_name, full_name, phone, None, major_id=major_id)
+        for user_id, first_name, last_name, full_name, phone, doctor_id in patients.iterator():
+            yield make_entry('patient', user_id, first_name, last_name, full_name, phone, doctor_id)
+
+
+def make_entry(user_type: str, user_id: int, first_name: str, last_name: str, full_name: str, phone: str,
+               doctor_id: Optional[int], **extra: Any) -> AutocompleteEntry:
+    return AutocompleteEntry(user_id=user_id, user_type=user_type, doctor_id=doctor_id,
+                             name=f'{last_name}{first_name}',
+                             full_name=full_name or normalize_name(f'{last_name}{first_name}'),
+                             phone=re.sub(r'\D', '', phone or ''), extra=extra)
+
+
+def entry_from_instance(instance) -> AutocompleteEntry:
+    user_type = instance._meta.model_name
+    extra = {'major_id': instance.major_id} if user_type == 'doctor' else {}
+    doctor_id = instance.doctor_id if user_type == 'patient' else None
+    return make_entry(user_type, instance.pk, instance.first_name, instance.last_name, instance.full_name,
+                      instance.phone, doctor_id, **extra)
+
+
+def remove_user_from_autocomplete_index(user_id: int) -> NoReturn:
+    if autocomplete_index.loaded:
+        transaction.on_commit(lambda: [autocomplete_index.remove(user_type, user_id)
+                                       for user_type in ('doctor', 'patient')])
+
+
+def update_autocomplete_index(instance, deleted: bool = False) -> NoReturn:
+    # 색인이 로드된 process에서만 commit 이후 반영(로드 전이면 최초 검색 시 전체 로드)
+    if not autocomplete_index.loaded:
+        return
+    user_type, user_id = instance._meta.model_name, instance.pk
+    if deleted:
+        transaction.on_commit(lambda: autocomplete_index.remove(user_type, user_id))
+    else:
+        entry = entry_from_instance(instance)
+        transaction.on_commit(lambda: autocomplete_index.add(entry))
+
+
+autocomplete_index = AutocompleteIndex()
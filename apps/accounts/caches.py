@@ -0,0 +1,68 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, NoReturn, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+
+if TYPE_CHECKING:
+    from accounts.models import BaseUser
+
+# JWT 인증에 필요한 BaseUser 필드(token_expired: UserSession)
+AUTH_USER_FIELDS = ('id', 'is_active', 'is_superuser', 'is_staff')
+
+
+class AuthUserCache:
+    """
+    AuthUserCache: JWT 인증에 필요한 사용자 정보를 캐시에 저장
+    - key: user id / value: AUTH_USER_FIELDS + group_name
+    - 저장된 token_expired와 access token의 exp가 일치할 경우에만 사용됨
+    - 무효화: set_token_expired, group 변경, 계정 비활성화(BaseUser 저장 및 삭제)
+    """
+    key_prefix = 'auth-user'
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+    @property
+    def timeout(self) -> int:
+        return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60 * 5)
+
+    def make_key(self, user_id: int) -> str:
+        return f'{self.key_prefix}:{user_id}'
+
+    def get(self, user_id: int, token_expired: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        # token_expired=None: token 폐기 여부를 TokenRevocationSet으로 검사할 경우
+        entry = self.cache.get(self.make_key(user_id))
+        if entry and (token_expired is None or entry['token_expired'] == token_expired):
+            return entry
+        return None
+
+    def set(self, user: 'BaseUser', group_name: Optional[str]) -> NoReturn:
+        entry = {field: getattr(user, field) for field in AUTH_USER_FIELDS}
+        entry['token_expired'] = user.token_expired
+        entry['group_name'] = group_name
+        self.cache.set(self.make_key(user.id), entry, self.timeout)
+
+    def delete(self, user_id: int) -> NoReturn:
+        self.cache.delete(self.make_key(user_id))
+
+    def delete_many(self, user_ids: Iterable[int]) -> NoReturn:
+        self.cache.delete_many([self.make_key(user_id) for user_id in user_ids])
+
+    def build_user(self, entry: Dict[str, Any]) -> 'BaseUser':
+        # DB 조회 없이 캐시된 값으로 BaseUser 생성(나머지 필드는 deferred)
+        user_model = get_user_model()
+        field_names = [field.attname for field in user_model._meta.concrete_fields if field.attname in entry]
+        values = [entry[field_name] for field_name in field_names]
+        user = user_model.from_db(router.db_for_read(user_model), field_names, values)
+        session_model = user_model._meta.get_field('session').related_model
+        user.session = session_model(user_id=user.id, token_expired=entry['token_expired'])
+
+        if entry['group_name']:
+            user.set_user_type(entry['group_name'])
+        return user
+
+
+auth_user_cache = AuthUserCache()
@@ -913,3 +913,67 @@ destroy_token = {
         '205': None
     },
 }
+
+account_import = {
+    'operation_summary': '[CREATE] 의사/환자 계정 일괄 생성',
+    'operation_description': """
+    - 기능: CSV 또는 NDJSON 파일로 의사(doctor) 또는 환자(patient) 계정 일괄 생성
+    - 권한: IsSuperUser
+    - 컬럼: email, password, first_name, last_name, gender, address, phone
+        - doctor: major(pk), description
+        - patient: birth(YYYY-MM-DD), emergency_call, doctor(pk) 또는 doctor_email
+    """,
+    'manual_parameters': [
+        Parameter('file', IN_FORM, description='csv 또는 ndjson 파일', type=TYPE_FILE, required=True),
+        Parameter('format', IN_FORM, description='csv, ndjson(기본값: 파일 확장자)', type=TYPE_STRING),
+    ],
+    'responses': {
+        '200': Response(
+            schema=Schema(type=TYPE_OBJECT,
+                          properties={
+                              'created': Schema(description='생성된 계정 수', type=TYPE_INTEGER),
+                              'failed': Schema(description='실패한 row 수', type=TYPE_INTEGER),
+                              'errors': Schema(description='row별 에러(line, email, errors)', type=TYPE_ARRAY,
+                                               items=Schema(type=TYPE_OBJECT)),
+                          }),
+            description='일괄 생성 결과'
+        ),
+    },
+}
+
+account_autocomplete = {
+    'operation_summary': '[LIST-AUTOCOMPLETE] 의사/환자 자동완성',
+    'operation_description': """
+    - 기능: 선택(type-ahead)용 자동완성. process memory 색인을 사용하므로 검색 시 DB를 조회하지 않음
+    - 권한
+        - doctors: IsAuthenticated
+        - patients: IsDoctor(담당 환자만 검색) 또는 IsSuperUser(doctor_id로 범위 지정 가능)
+    - 검색 대상: 이름(부분 일치), 전화번호 뒷자리, id
+    - 정렬: id 일치 -> 이름 일치 -> 이름 prefix -> 전화번호 뒷자리 -> 이름 포함
+
+    ```python
+    # example - query param
+    .../accounts/autocomplete/patients?q=일환&limit=5
+    # output
+    [
+        {"user_id": 5, "full_name": "일환자", "doctor_id": 2}
+    ]
+    ```
+    """,
+    'manual_parameters': [
+        Parameter('q', IN_QUERY, description='검색어(이름, 전화번호 뒷자리, id)', type=TYPE_STRING, required=True),
+        Parameter('limit', IN_QUERY, description='최대 결과 수(기본값: 10, 최대: 50)', type=TYPE_INTEGER),
+        Parameter('doctor_id', IN_QUERY, description='(superuser) 환자 검색 범위 - 담당 의사 id', type=TYPE_INTEGER),
+    ],
+    'responses': {
+        '200': Response(
+            schema=Schema(type=TYPE_ARRAY, items=Schema(type=TYPE_OBJECT, properties={
+                'user_id': Schema(type=TYPE_INTEGER),
+                'full_name': account_schema['full_name'],
+                'doctor_id': Schema(description='(patients) 담당 의사 id', type=TYPE_INTEGER),
+                'major_id': Schema(description='(doctors) 전공 id', type=TYPE_INTEGER),
+            })),
+            description='자동완성 결과'
+        ),
+    },
+}
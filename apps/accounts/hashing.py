@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class PasswordHashBusy(Exception):
+    pass
+
+
+class HashMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count: int = 0
+        self.rejected: int = 0
+        self.queue_seconds: float = 0.0
+        self.hash_seconds: float = 0.0
+        self.max_queue_seconds: float = 0.0
+        self.max_hash_seconds: float = 0.0
+
+    def observe(self, queue_seconds: float, hash_seconds: float):
+        with self._lock:
+            self.count += 1
+            self.queue_seconds += queue_seconds
+            self.hash_seconds += hash_seconds
+            self.max_queue_seconds = max(self.max_queue_seconds, queue_seconds)
+            self.max_hash_seconds = max(self.max_hash_seconds, hash_seconds)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'count': self.count,
+                'rejected': self.rejected,
+                'queue_seconds': self.queue_seconds,
+                'hash_seconds': self.hash_seconds,
+                'max_queue_seconds': self.max_queue_seconds,
+                'max_hash_seconds': self.max_hash_seconds,
+            }
+
+    def collect(self) -> List[Tuple[str, Dict[str, str], float]]:
+        # config.utils.metrics collector(counter)
+        snapshot = self.snapshot()
+        return [('password_hash_total', {}, snapshot['count']),
+                ('password_hash_rejected_total', {}, snapshot['rejected']),
+                ('password_hash_queue_seconds_total', {}, snapshot['queue_seconds']),
+                ('password_hash_seconds_total', {}, snapshot['hash_seconds'])]
+
+
+class PasswordHashExecutor:
+    """
+    PasswordHashExecutor: password hash(check_password, make_password)를 event loop 밖의 thread pool에서 실행
+    - pbkdf2(hashlib)는 hash 계산 중 GIL을 해제하므로 thread pool로 병렬 처리 가능
+    - 대기 중인 작업이 PASSWORD_HASH_MAX_PENDING 이상이면 PasswordHashBusy 발생(backpressure: 503 응답)
+    """
+
+    def __init__(self):
+        self.metrics: HashMetrics = HashMetrics()
+        self.pending: int = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def max_workers(self) -> int:
+        return getattr(settings, 'PASSWORD_HASH_WORKERS', 4)
+
+    @property
+    def max_pending(self) -> int:
+        return getattr(settings, 'PASSWORD_HASH_MAX_PENDING', 64)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='password-hash')
+        return self._executor
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.metrics.reject()
+                raise PasswordHashBusy('too many pending password hash requests')
+            self.pending += 1
+
+        submitted_at = time.perf_counter()
+
+        def timed_func():
+            started_at = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self.metrics.observe(started_at - submitted_at, time.perf_counter() - started_at)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed_func)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+
+def verify_password(raw_password: str, encoded: str) -> Tuple[bool, Optional[str]]:
+    # hasher 변경(또는 iteration 증가) 시 새 hash를 함께 계산(set_password와 동일한 hash)
+    new_encoded = []
+
+    def setter(password: str):
+        new_encoded.append(make_password(password))
+
+    is_valid = check_password(raw_password, encoded, setter=setter)
+    return is_valid, new_encoded[0] if new_encoded else None
+
+
+password_hash_executor = PasswordHashExecutor()
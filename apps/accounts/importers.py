@@ -0,0 +1,278 @@
+import csv
+import io
+import json
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import IO, Any, Dict, Iterable, Iterator, List, NoReturn, Optional, Tuple, Type, Union
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from accounts.api.utils import group_permission_registry
+from accounts.models import Doctor, Patient, NameSearchToken
+from hospitals.models import Major
+
+User = get_user_model()
+
+# (line number, row)
+Row = Tuple[int, Dict[str, Any]]
+
+"""
+AccountImporter: CSV 또는 NDJSON 형식의 doctor/patient 계정 일괄 생성
+- chunk 단위로 검증 -> password hash(executor) -> BaseUser, Doctor/Patient, group, permission bulk insert
+- 실패한 row는 ImportReport.errors에 line 번호와 함께 기록(나머지 row는 계속 처리)
+"""
+
+
+class ImportReport:
+    def __init__(self):
+        self.created: int = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    def add_error(self, line: int, row: Dict[str, Any], errors: Union[Dict[str, Any], str]) -> NoReturn:
+        self.errors.append({'line': line, 'email': row.get('email'), 'errors': errors})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'created': self.created, 'failed': self.failed, 'errors': self.errors}
+
+
+def read_rows(stream: IO[str], file_format: str) -> Iterator[Row]:
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if value not in (None, '')}
+    elif file_format == 'ndjson':
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_num, {'__error__': f'invalid json: {e}'}
+                continue
+            if not isinstance(row, dict):  # [1], "x" 등
+                row = {'__error__': 'row must be an object'}
+            yield line_num, row
+    else:
+        raise ValueError(f'{file_format} is invalid format(csv, ndjson)')
+
+
+def get_string(row: Dict[str, Any], field: str) -> Optional[str]:
+    # 문자열이 아닌 값(validate_row에서 row error로 기록)은 None
+    value = row.get(field)
+    return value if isinstance(value, str) else None
+
+
+def text_stream(uploaded_file: IO[bytes], encoding: str = 'utf-8-sig') -> IO[str]:
+    return io.TextIOWrapper(uploaded_file, encoding=encoding)
+
+
+class AccountImporter:
+    model: Type[Union[Doctor, Patient]] = None
+    required_fields: Tuple[str, ...] = ('email', 'password', 'first_name', 'last_name', 'address', 'phone')
+    # 문자열만 허용(NDJSON의 null, 숫자, 배열, 객체 등은 row error)
+    string_fields: Tuple[str, ...] = ('email', 'password', 'phone')
+    profile_fields: Tuple[str, ...] = ()
+    exclude_clean_fields: List[str] = ['user']
+
+    def __init__(self, executor: Executor, chunk_size: int = 1000):
+        self.executor: Executor = executor
+        self.chunk_size: int = chunk_size
+        self.report: ImportReport = ImportReport()
+        self.model_name: str = self.model._meta.model_name
+
+    def run(self, rows: Iterable[Row]) -> ImportReport:
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        return self.report
+
+    def import_chunk(self, chunk: List[Row]) -> NoReturn:
+        valid_rows = self.validate_chunk(chunk)
+        if not valid_rows:
+            return
+
+        passwords = [row.pop('password') for _, row, _ in valid_rows]
+        hashed_passwords = list(self.executor.map(make_password, passwords, chunksize=max(len(passwords) // 16, 1)))
+        try:
+            with transaction.atomic():
+                self.create_accounts(valid_rows, hashed_passwords)
+        except IntegrityError as e:  # 검증 이후 다른 요청에서 같은 email, phone이 생성된 경우
+            for line, row, _ in valid_rows:
+                self.report.add_error(line, row, str(e))
+        else:
+            self.report.created += len(valid_rows)
+
+    def validate_chunk(self, chunk: List[Row]) -> List[Tuple[int, Dict[str, Any], Union[Doctor, Patient]]]:
+        emails = {email.lower() for email in (get_string(row, 'email') for _, row in chunk) if email}
+        phones = {phone for phone in (get_string(row, 'phone') for _, row in chunk) if phone}
+        existing_emails = {email.lower() for email in User.objects.filter(email__in=emails).
+                           values_list('email', flat=True)}
+        existing_phones = set(self.model._base_manager.filter(phone__in=phones).values_list('phone', flat=True))
+        related_ids = self.get_related_ids(chunk)
+
+        valid_rows = []
+        for line, row in chunk:
+            errors = self.validate_row(row, related_ids)
+            email, phone = (get_string(row, 'email') or '').lower(), get_string(row, 'phone')
+            if email in existing_emails:
+                errors.setdefault('email', 'already exists')
+            if phone in existing_phones:
+                errors.setdefault('phone', 'already exists')
+
+            profile = None if errors else self.build_profile(row, related_ids, errors)
+            if errors:
+                self.report.add_error(line, row, errors)
+                continue
+            existing_emails.add(email)  # 파일 내 중복 row
+            existing_phones.add(row['phone'])
+            valid_rows.append((line, row, profile))
+        return valid_rows
+
+    def validate_row(self, row: Dict[str, Any], related_ids: Dict[str, Dict[Any, int]]) -> Dict[str, Any]:
+        if '__error__' in row:
+            return {'row': row['__error__']}
+        errors = {field: 'required' for field in self.required_fields if not row.get(field)}
+        errors.update({field: 'must be a string' for field in self.string_fields
+                       if row.get(field) and not isinstance(row[field], str)})
+        return errors
+
+    def build_profile(self, row: Dict[str, Any], related_ids: Dict[str, Dict[Any, int]],
+                      errors: Dict[str, Any]) -> Optional[Union[Doctor, Patient]]:
+        values = {field: row[field] for field in self.profile_fields if field in row}
+        values.update(self.get_related_values(row, related_ids))
+        profile = self.model(**values)
+        profile.set_full_name()  # bulk_create는 pre_save signal을 실행하지 않음
+        try:
+            User(email=row['email']).clean_fields(exclude=['password'])
+            profile.clean_fields(exclude=self.exclude_clean_fields)  # FK는 get_related_ids에서 일괄 검증
+        except ValidationError as e:
+            errors.update({field: messages for field, messages in e.message_dict.items()})
+            return None
+        return profile
+
+    def create_accounts(self, valid_rows: List[Tuple[int, Dict[str, Any], Union[Doctor, Patient]]],
+                        hashed_passwords: List[str]) -> NoReturn:
+        users = [User(email=User.objects.normalize_email(row['email']), password=password)
+                 for (_, row, _), password in zip(valid_rows, hashed_passwords)]
+        User.objects.bulk_create(users, batch_size=self.chunk_size)
+        # MySQL은 bulk_create 시 pk를 반환하지 않으므로 email로 id 조회
+        user_ids = dict(User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'id'))
+
+        profiles = []
+        for user, (_, _, profile) in zip(users, valid_rows):
+            profile.user_id = user_ids[user.email]
+            profiles.append(profile)
+        self.model.objects.bulk_create(profiles, batch_size=self.chunk_size)
+        NameSearchToken.objects.bulk_create(
+            [token for profile in profiles
+             for token in NameSearchToken.objects.build_tokens(profile.user_id, self.model_name, profile.full_name)],
+            batch_size=self.chunk_size
+        )
+        self.attach_group_and_permissions(list(user_ids.values()))
+
+    def attach_group_and_permissions(self, user_ids: List[int]) -> NoReturn:
+        group_id, permission_ids = group_permission_registry.get(self.model_name)
+        group_through = User.groups.through
+        permission_through = User.user_permissions.through
+        user_field = User._meta.get_field('groups').m2m_field_name()
+
+        group_through.objects.bulk_create([group_through(**{f'{user_field}_id': user_id, 'group_id': group_id})
+                                           for user_id in user_ids], batch_size=self.chunk_size)
+        permission_through.objects.bulk_create(
+            [permission_through(**{f'{user_field}_id': user_id, 'permission_id': permission_id})
+             for user_id in user_ids for permission_id in permission_ids], batch_size=self.chunk_size
+        )
+
+    def get_related_ids(self, chunk: List[Row]) -> Dict[str, Dict[Any, int]]:
+        return {}
+
+    def get_related_values(self, row: Dict[str, Any], related_ids: Dict[str, Dict[Any, int]]) -> Dict[str, Any]:
+        return {}
+
+
+class DoctorImporter(AccountImporter):
+    model = Doctor
+    required_fields = AccountImporter.required_fields + ('major',)
+    profile_fields = ('first_name', 'last_name', 'gender', 'address', 'phone', 'description')
+    exclude_clean_fields = ['user', 'major']
+
+    def get_related_ids(self, chunk: List[Row]) -> Dict[str, Dict[Any, int]]:
+        major_ids = {str(row['major']) for _, row in chunk if row.get('major')}
+        majors = Major.objects.filter(id__in=major_ids).values_list('id', flat=True)
+        return {'major': {str(major_id): major_id for major_id in majors}}
+
+    def validate_row(self, row: Dict[str, Any], related_ids: Dict[str, Dict[Any, int]]) -> Dict[str, Any]:
+        errors = super().validate_row(row, related_ids)
+        if row.get('major') and str(row['major']) not in related_ids['major']:
+            errors['major'] = 'not found'
+        return errors
+
+    def get_related_values(self, row: Dict[str, Any], related_ids: Dict[str, Dict[Any, int]]) -> Dict[str, Any]:
+        return {'major_id': related_ids['major'][str(row['major'])]}
+
+
+class PatientImporter(AccountImporter):
+    model = Patient
+    required_fields = AccountImporter.required_fields + ('birth',)
+    profile_fields = ('first_name', 'last_name', 'gender', 'address', 'phone', 'birth', 'emergency_call')
+    exclude_clean_fields = ['user', 'doctor']
+    string_fields = AccountImporter.string_fields + ('doctor_email',)
+
+    def get_related_ids(self, chunk: List[Row]) -> Dict[str, Dict[Any, int]]:
+        # doctor: doctor의 user id 또는 doctor_email(같은 파일로 생성된 의사 계정 연결)
+        doctor_ids = {str(row['doctor']) for _, row in chunk if row.get('doctor')}
+        doctor_emails = {email.lower() for email in (get_string(row, 'doctor_email') for _, row in chunk) if email}
+        doctors = Doctor.objects.filter(user_id__in=doctor_ids).values_list('user_id', flat=True)
+        doctors_by_email = Doctor.objects.filter(user__email__in=doctor_emails).values_list('user__email', 'user_id')
+        return {
+            'doctor': {str(doctor_id): doctor_id for doctor_id in doctors},
+            'doctor_email': {email.lower(): doctor_id for email, doctor_id in doctors_by_email},
+        }
+
+    def validate_row(self, row: Dict[str, Any], related_ids: Dict[str, Dict[Any, int]]) -> Dict[str, Any]:
+        errors = super().validate_row(row, related_ids)
+        if errors.get('row') or 'doctor_email' in errors:
+            return errors
+        if self.get_doctor_id(row, related_ids) is None:
+            errors['doctor'] = 'not found' if row.get('doctor') or row.get('doctor_email') else 'required'
+        return errors
+
+    def get_related_values(self, row: Dict[str, Any], related_ids: Dict[str, Dict[Any, int]]) -> Dict[str, Any]:
+        return {'doctor_id': self.get_doctor_id(row, related_ids)}
+
+    def get_doctor_id(self, row: Dict[str, Any], related_ids: Dict[str, Dict[Any, int]]) -> Optional[int]:
+        if row.get('doctor'):
+            return related_ids['doctor'].get(str(row['doctor']))
+        if row.get('doctor_email'):
+            return related_ids['doctor_email'].get(row['doctor_email'].lower())
+        return None
+
+
+IMPORTERS = {
+    'doctor': DoctorImporter,
+    'patient': PatientImporter,
+}
+
+
+def import_accounts(user_type: str, rows: Iterable[Row], workers: Optional[int] = None, chunk_size: int = 1000,
+                    use_processes: bool = True) -> ImportReport:
+    # management command: process pool / API(웹 worker 내부): thread pool(pbkdf2는 GIL을 해제함)
+    try:
+        importer_class = IMPORTERS[user_type]
+    except KeyError:
+        raise ValueError(f'{user_type} is invalid user type(doctor, patient)')
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        importer = importer_class(executor=executor, chunk_size=chunk_size)
+        return importer.run(rows)
@@ -0,0 +1,36 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importers import IMPORTERS, import_accounts, read_rows
+
+
+class Command(BaseCommand):
+    help = 'CSV 또는 NDJSON 파일로 의사/환자 계정 일괄 생성'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_type', choices=list(IMPORTERS))
+        parser.add_argument('path', help='csv 또는 ndjson 파일 경로')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='기본값: 파일 확장자')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None, help='password hash process 수(기본값: cpu 수)')
+        parser.add_argument('--report', help='row별 에러 리포트(json) 저장 경로')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in ('csv', 'ndjson'):
+            raise CommandError(f'unknown file format: {file_format}')
+
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            report = import_accounts(options['user_type'], read_rows(stream, file_format),
+                                     workers=options['workers'], chunk_size=options['chunk_size'])
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as report_file:
+                json.dump(report.to_dict(), report_file, ensure_ascii=False, indent=2, default=str)
+        else:
+            for error in report.errors:
+                self.stderr.write(json.dumps(error, ensure_ascii=False, default=str))
+        self.stdout.write(self.style.SUCCESS(f'created: {report.created}, failed: {report.failed}'))
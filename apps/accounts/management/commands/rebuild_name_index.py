@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import Doctor, NameSearchToken, Patient
+
+
+class Command(BaseCommand):
+    help = '의사/환자의 full_name column 및 이름 검색 token(NameSearchToken) 재생성'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model in (Doctor, Patient):
+            count = self.rebuild(model, batch_size)
+            self.stdout.write(self.style.SUCCESS(f'{model._meta.model_name}: {count}'))
+
+    def rebuild(self, model, batch_size: int) -> int:
+        user_type = model._meta.model_name
+        queryset = model._base_manager.only('user_id', 'first_name', 'last_name', 'full_name').order_by('user_id')
+        last_id, count = 0, 0
+        while True:
+            users = list(queryset.filter(user_id__gt=last_id)[:batch_size])
+            if not users:
+                return count
+
+            for user in users:
+                user.set_full_name()
+            user_ids = [user.user_id for user in users]
+            with transaction.atomic():
+                model._base_manager.bulk_update(users, ['full_name'])
+                NameSearchToken.objects.filter(user_type=user_type, user_id__in=user_ids).delete()
+                NameSearchToken.objects.bulk_create(
+                    [token for user in users
+                     for token in NameSearchToken.objects.build_tokens(user.user_id, user_type, user.full_name)]
+                )
+            last_id, count = user_ids[-1], count + len(users)
@@ -1,14 +1,24 @@
-from typing import TYPE_CHECKING, Tuple, Dict, List, Type, NoReturn
+import datetime
+from typing import TYPE_CHECKING, Tuple, Dict, List, Type, NoReturn, Any, Optional, Callable
 
+from django.conf import settings
 from django.contrib.auth.base_user import BaseUserManager, AbstractBaseUser
-from django.contrib.auth.models import PermissionsMixin
+from django.contrib.auth.models import PermissionsMixin, Group
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
-from django.db.models import Prefetch, Max, F
+from django.db.models import Prefetch, Max, F, Expression, Q, Count
+from django.db.models.signals import post_save, post_delete, m2m_changed, pre_delete, pre_save
+from django.dispatch import receiver
 from django.urls import reverse
+from django.utils.timezone import now
 from rest_framework.exceptions import ValidationError
 
+from accounts.autocomplete import update_autocomplete_index, remove_user_from_autocomplete_index
+from accounts.caches import auth_user_cache
 from accounts.database_function import CalculateAge
-from config.utils.utils import concatenate_name
+from accounts.revocations import token_revocations, revoke_outstanding_tokens
+from config.utils.filter_backends import create_birth_lookups
+from config.utils.utils import normalize_name, split_name_tokens
 from core.api.fields import PatientFields, DoctorFields
 from hospitals.models import Major, MedicalCenter
 
@@ -17,11 +27,23 @@ if TYPE_CHECKING:
 
 
 class CommonUserQuerySet(models.QuerySet):
+    # with_annotations에서 사용 가능한 annotation(name: expression 생성 함수)
+    annotation_expressions: Dict[str, Callable[[], Expression]] = {}
+
     def is_active(self) -> Type['QuerySet']:
         return self.filter(user__is_active=True)
 
+    def with_annotations(self, *names: str) -> Type['QuerySet']:
+        # serializer, filter가 선언한 annotation만 추가(기본 queryset은 annotation 없음)
+        annotations = {name: self.annotation_expressions[name]() for name in names
+                       if name not in self.query.annotations}
+        return self.annotate(**annotations) if annotations else self
+
 
 class CommonUserManager(models.Manager):
+    def with_annotations(self, *names: str) -> Type['CommonUserQuerySet']:
+        return self.get_queryset().with_annotations(*names)
+
     def select_all(self) -> Type['CommonUserQuerySet']:
         return self.get_queryset().select_all()
 
@@ -40,6 +62,7 @@ class Gender(models.TextChoices):
 class AccountsModel(models.Model):
     first_name = models.CharField(max_length=20, default='')
     last_name = models.CharField(max_length=20, default='')
+    full_name = models.CharField(max_length=40, default='', db_index=True, editable=False)  # 성+이름(검색용)
     gender = models.CharField(max_length=7, choices=Gender.choices, default=Gender.male)
     address = models.CharField(max_length=255, default='')
     phone = models.CharField(max_length=14, unique=True)
@@ -53,6 +76,17 @@ class AccountsModel(models.Model):
     def get_full_name(self) -> str:
         return f'{self.first_name}{self.last_name}'
 
+    def set_full_name(self) -> NoReturn:
+        self.full_name = normalize_name(f'{self.last_name}{self.first_name}')
+
+    def save(self, *args, **kwargs) -> NoReturn:
+        # save(update_fields=[이름 field]): pre_save(set_full_name)에서 계산한 full_name도 저장
+        # (signal에서는 update_fields를 변경할 수 없음)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'full_name'}
+        super().save(*args, **kwargs)
+
 
 class BaseQuerySet(models.QuerySet):
     def active(self) -> 'BaseQuerySet':
@@ -141,7 +175,6 @@ class BaseUser(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(max_length=255, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    token_expired = models.IntegerField(default=0)
 
     is_active = models.BooleanField(default=True)
     is_superuser = models.BooleanField(default=False)
@@ -159,14 +192,77 @@ class BaseUser(AbstractBaseUser, PermissionsMixin):
     def __str__(self) -> str:
         return str(self.email)
 
+    @property
+    def token_expired(self) -> int:
+        try:
+            return self.session.token_expired
+        except ObjectDoesNotExist:  # 로그인 이력이 없는 사용자
+            return 0
+
     def set_token_expired(self, time: int) -> NoReturn:
-        self.token_expired = time
-        self.save()
+        # BaseUser row 대신 UserSession row만 갱신(login, refresh, logout 시 BaseUser row lock 방지)
+        if UserSession.objects.filter(user_id=self.pk).update(token_expired=time, updated_at=now()):
+            session = UserSession(user_id=self.pk, token_expired=time)
+        else:
+            session, _ = UserSession.objects.update_or_create(user_id=self.pk, defaults={'token_expired': time})
+        self.session = session
+        auth_user_cache.delete(self.pk)
 
     def set_user_type(self, group_name: str = None):
         self.user_type = UserType(group_name)  # Has-a(composition)
 
 
+class UserSession(models.Model):
+    """
+    UserSession: 사용자의 token 만료 시간(access token의 exp) 저장.
+    """
+    user = models.OneToOneField(BaseUser, on_delete=models.CASCADE, primary_key=True, related_name='session')
+    token_expired = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f'{self.user_id}: {self.token_expired}'
+
+
+# 인증 캐시 무효화(계정 비활성화 등 BaseUser가 저장될 때)
+@receiver(post_save, sender=BaseUser)
+@receiver(post_delete, sender=BaseUser)
+def invalidate_auth_user_cache(sender, instance: BaseUser, **kwargs: Dict[str, Any]):
+    auth_user_cache.delete(instance.pk)
+
+
+# 인증 캐시 무효화(group 변경)
+@receiver(m2m_changed, sender=BaseUser.groups.through)
+def invalidate_auth_user_cache_by_groups(sender, instance, action: str, reverse: bool, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':  # group.user_set.clear()
+        user_ids = list(instance.user_set.values_list('id', flat=True))
+    elif reverse and action in ('post_add', 'post_remove'):  # group.user_set.add(user)
+        user_ids = list(pk_set)
+    elif not reverse and action in ('post_add', 'post_remove', 'post_clear'):  # user.groups.add(group)
+        user_ids = [instance.pk]
+    else:
+        return
+
+    auth_user_cache.delete_many(user_ids)
+    # 이미 발급된 token의 group claim이 유효하지 않으므로 token 만료 처리
+    if action in ('pre_clear', 'post_remove', 'post_clear'):
+        expire_user_type_claims(user_ids)
+
+
+def expire_user_type_claims(user_ids: List[int]) -> NoReturn:
+    # token의 user type claim(group, doctor_id)이 변경된 사용자의 token 만료
+    if not getattr(settings, 'JWT_USER_TYPE_CLAIMS', False):
+        return
+    UserSession.objects.filter(user_id__in=user_ids).update(token_expired=0)
+    if token_revocations.enabled:
+        revoke_outstanding_tokens(user_ids)
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_auth_user_cache_by_group_delete(sender, instance: Group, **kwargs: Dict[str, Any]):
+    auth_user_cache.delete_many(instance.user_set.values_list('id', flat=True))
+
+
 class DoctorQuerySet(CommonUserQuerySet):
     def prefetch_all(self) -> 'DoctorQuerySet':
         return self.prefetch_related('patients')
@@ -188,14 +284,13 @@ class DoctorQuerySet(CommonUserQuerySet):
 
 class DoctorManager(CommonUserManager):
     def get_queryset(self) -> DoctorQuerySet:
-        return DoctorQuerySet(self.model, using=self._db). \
-            annotate(full_name=concatenate_name()).is_active()
+        return DoctorQuerySet(self.model, using=self._db).is_active()
 
     def non_related_all(self) -> DoctorQuerySet:
         return self.defer('user', 'major')
 
     def choice_fields(self) -> DoctorQuerySet:
-        return self.only('user_id', 'major_id', 'first_name', 'last_name', 'gender'). \
+        return self.only('user_id', 'major_id', 'first_name', 'last_name', 'full_name', 'gender'). \
             annotate(major_name=F('major__name'), department_name=F('major__department__name'),
                      medical_center_name=F('major__department__medical_center__name'))
 
@@ -215,6 +310,11 @@ class Doctor(AccountsModel):
 
 
 class PatientQuerySet(CommonUserQuerySet):
+    annotation_expressions = {
+        'doctor_name': lambda: F('doctor__full_name'),
+        'age': lambda: CalculateAge('birth'),  # select에서 Function 실행(반환되는 row만 계산)
+    }
+
     def with_latest_prescription(self) -> 'PatientQuerySet':
         return self.filter(prescriptions__checked=False).annotate(latest_prescription_id=Max('prescriptions__id'))
 
@@ -255,30 +355,27 @@ class PatientQuerySet(CommonUserQuerySet):
         return self.only(*fields)
 
     def set_age(self) -> 'PatientQuerySet':
-        return self.annotate(age=CalculateAge('birth'))  # select에서 Function 실행
+        return self.with_annotations('age')
 
-    def add_extra_for_age(self, expression: str) -> 'PatientQuerySet':
-        if expression:
-            return self.extra(where=[expression])  # where에서 Function 실행
-        return self
+    def filter_by_age(self, min_age: Optional[int] = None, max_age: Optional[int] = None) -> 'PatientQuerySet':
+        return self.filter(**create_birth_lookups(min_age, max_age))  # where: birth 범위 조건
 
 
 class PatientManager(CommonUserManager):
     def get_queryset(self) -> PatientQuerySet:
-        return PatientQuerySet(self.model, using=self._db). \
-            annotate(full_name=concatenate_name(),
-                     doctor_name=concatenate_name('doctor')). \
-            is_active(). \
-            set_age()
+        return PatientQuerySet(self.model, using=self._db).is_active()
+
+    def set_age(self) -> PatientQuerySet:
+        return self.get_queryset().set_age()
 
     def choice_fields(self) -> PatientQuerySet:
-        return self.only('user_id', 'doctor__first_name', 'doctor__last_name', 'gender')
+        return self.only('user_id', 'full_name', 'doctor__first_name', 'doctor__last_name', 'gender')
 
 
 class Patient(AccountsModel):
     user = models.OneToOneField(BaseUser, on_delete=models.CASCADE, primary_key=True)
     doctor = models.ForeignKey(Doctor, on_delete=models.DO_NOTHING, related_name='patients')
-    birth = models.DateField()
+    birth = models.DateField(db_index=True)
     emergency_call = models.CharField(max_length=14, default='010')
 
     objects = PatientManager()
@@ -286,6 +383,11 @@ class Patient(AccountsModel):
     def __str__(self) -> str:
         return self.get_full_name()
 
+    def get_age(self, today: datetime.date = None) -> int:
+        # age annotation이 없는 경우 사용(calculate_age와 동일한 계산)
+        today = today or now().date()
+        return (int(today.strftime('%Y%m%d')) - int(self.birth.strftime('%Y%m%d'))) // 10000
+
     def get_absolute_url(self) -> str:
         return reverse('accounts:patient-detail-update', kwargs={'pk': self.pk})
 
@@ -302,3 +404,96 @@ class M2MPatient(AccountsModel):
 
     def get_absolute_url(self) -> str:
         return reverse('accounts:patient-detail-update', kwargs={'pk': self.pk})
+
+
+class NameSearchTokenManager(models.Manager):
+    def lookup_q(self, value: str, lookup: str, user_type: str, prefix: str = '') -> Q:
+        """
+        이름 검색 조건 생성(prefix: 의사/환자 모델까지의 경로, ex: 'writer__')
+        - exact, startswith: full_name index 사용
+        - contains: token(bigram) index로 후보 사용자를 찾은 후 full_name으로 확인
+        """
+        value = normalize_name(value)
+        if lookup != 'contains' or not value:
+            return Q(**{f'{prefix}full_name__{lookup}': value})
+
+        tokens = split_name_tokens(value, query=True)
+        user_ids = self.filter(user_type=user_type, token__in=tokens).values('user_id'). \
+            annotate(matched=Count('token', distinct=True)).filter(matched=len(tokens)).values('user_id')
+        return Q(**{f'{prefix}user_id__in': user_ids, f'{prefix}full_name__contains': value})
+
+    def build_tokens(self, user_id: int, user_type: str, full_name: str) -> List['NameSearchToken']:
+        return [self.model(user_id=user_id, user_type=user_type, token=token)
+                for token in split_name_tokens(full_name)]
+
+    def rebuild_for(self, user_id: int, user_type: str, full_name: str) -> NoReturn:
+        tokens = self.build_tokens(user_id, user_type, full_name)
+        existing = set(self.filter(user_id=user_id, user_type=user_type).values_list('token', flat=True))
+        if existing != {token.token for token in tokens}:
+            self.filter(user_id=user_id, user_type=user_type).delete()
+            self.bulk_create(tokens)
+
+
+class NameSearchToken(models.Model):
+    """
+    NameSearchToken: 의사/환자 이름의 음절 token(unigram, bigram) - 이름 부분 검색(contains)에 사용
+    """
+    user = models.ForeignKey(BaseUser, on_delete=models.CASCADE, related_name='name_tokens')
+    user_type = models.CharField(max_length=7)  # doctor, patient
+    token = models.CharField(max_length=2)
+
+    objects = NameSearchTokenManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['user_type', 'token', 'user'])]
+
+
+@receiver(pre_save, sender=Doctor)
+@receiver(pre_save, sender=Patient)
+def set_full_name(sender, instance: AccountsModel, **kwargs: Dict[str, Any]):
+    instance.set_full_name()
+
+
+@receiver(pre_save, sender=Patient)
+def check_patient_doctor_changed(sender, instance: Patient, **kwargs: Dict[str, Any]):
+    # 담당 의사 변경 시 token의 doctor_id claim이 유효하지 않음(post_save에서 token 만료)
+    instance._doctor_changed = not instance._state.adding and \
+        sender._base_manager.filter(pk=instance.pk).exclude(doctor_id=instance.doctor_id).exists()
+
+
+@receiver(post_save, sender=Patient)
+def expire_patient_tokens_by_doctor(sender, instance: Patient, created: bool, **kwargs: Dict[str, Any]):
+    if not created and getattr(instance, '_doctor_changed', False):
+        expire_user_type_claims([instance.pk])
+        instance._doctor_changed = False
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=Patient)
+def update_name_search_tokens(sender, instance: AccountsModel, created: bool, update_fields=None, **kwargs):
+    if update_fields and not {'first_name', 'last_name'} & set(update_fields):
+        return
+    user_type = sender._meta.model_name
+    if created:
+        NameSearchToken.objects.bulk_create(NameSearchToken.objects.build_tokens(instance.pk, user_type,
+                                                                                   instance.full_name))
+    else:
+        NameSearchToken.objects.rebuild_for(instance.pk, user_type, instance.full_name)
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=Patient)
+def add_to_autocomplete_index(sender, instance: AccountsModel, **kwargs: Dict[str, Any]):
+    update_autocomplete_index(instance)
+
+
+@receiver(post_delete, sender=Doctor)
+@receiver(post_delete, sender=Patient)
+def remove_from_autocomplete_index(sender, instance: AccountsModel, **kwargs: Dict[str, Any]):
+    update_autocomplete_index(instance, deleted=True)
+
+
+@receiver(post_save, sender=BaseUser)
+def remove_inactive_user_from_autocomplete_index(sender, instance: BaseUser, **kwargs: Dict[str, Any]):
+    if not instance.is_active:
+        remove_user_from_autocomplete_index(instance.pk)
@@ -0,0 +1,162 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, NoReturn, Optional
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+if TYPE_CHECKING:
+    from rest_framework_simplejwt.tokens import Token
+
+# access token이 발급된 refresh token의 jti(세션 식별자)
+REFRESH_JTI_CLAIM = 'refresh_jti'
+
+
+class BloomFilter:
+    """
+    BloomFilter: 폐기(blacklist)되지 않은 token에 대한 빠른 음성(negative) 판별
+    - false positive가 발생할 수 있으므로 TokenRevocationSet의 exact set으로 최종 확인
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity: int = max(capacity, 1)
+        self.error_rate: float = error_rate
+        self.size: int = int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)) + 1
+        self.hash_count: int = max(int(self.size / self.capacity * math.log(2)), 1)
+        self.bits: bytearray = bytearray(self.size // 8 + 1)
+        self.count: int = 0
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[index >> 3] & (1 << (index & 7)) for index in self._indexes(key))
+
+    def add(self, key: str) -> NoReturn:
+        for index in self._indexes(key):
+            self.bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+    def _indexes(self, key: str) -> Iterable[int]:
+        # double hashing: h1 + i * h2
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+
+class TokenRevocationSet:
+    """
+    TokenRevocationSet: 폐기된 refresh token의 jti를 process memory에 보관
+    - token_blacklist 테이블을 blacklisted_at 기준으로 증분 동기화(JWT_REVOCATION_SYNC_INTERVAL 초마다 1회)
+      id 순서와 commit 순서가 다를 수 있으므로 마지막 동기화 시각 - JWT_REVOCATION_SYNC_MARGIN 이후를 다시 조회
+    - access token은 refresh_jti claim으로 폐기 여부를 판단하므로 인증 시 accounts_baseuser를 조회하지 않음
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001, batch_size: int = 5000):
+        self.capacity: int = capacity
+        self.error_rate: float = error_rate
+        self.batch_size: int = batch_size
+        self.bloom: BloomFilter = BloomFilter(capacity, error_rate)
+        self.revoked: Dict[str, datetime] = {}  # jti: refresh token 만료 시간
+        self.last_synced_time: Optional[datetime] = None  # 마지막 동기화 시작 시각(DB 조회 기준)
+        self.last_synced_at: float = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'JWT_REVOCATION_SET', False)
+
+    @property
+    def sync_interval(self) -> int:
+        return getattr(settings, 'JWT_REVOCATION_SYNC_INTERVAL', 5)
+
+    @property
+    def sync_margin(self) -> timedelta:
+        return timedelta(seconds=getattr(settings, 'JWT_REVOCATION_SYNC_MARGIN', 60))
+
+    def is_revoked(self, jti: str) -> bool:
+        self.sync_if_needed()
+        return jti in self.bloom and jti in self.revoked
+
+    def revoke(self, jti: str, expires_at: datetime) -> NoReturn:
+        if jti not in self.revoked:
+            self.revoked[jti] = expires_at
+            self.bloom.add(jti)
+
+    def sync_if_needed(self) -> NoReturn:
+        if time.monotonic() - self.last_synced_at < self.sync_interval:
+            return
+        if self._lock.acquire(blocking=False):  # 다른 thread가 동기화 중이면 기존 값 사용
+            try:
+                self.sync()
+            finally:
+                self._lock.release()
+
+    def sync(self) -> NoReturn:
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        started_at = aware_utcnow()
+        queryset = BlacklistedToken.objects.order_by('id')
+        if self.last_synced_time is None:  # 최초 동기화 시 만료되지 않은 token만 로드
+            queryset = queryset.filter(token__expires_at__gt=started_at)
+        else:  # 늦게 commit된 row를 놓치지 않도록 margin 만큼 겹쳐서 조회(이미 반영된 jti는 무시)
+            queryset = queryset.filter(blacklisted_at__gte=self.last_synced_time - self.sync_margin)
+
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id).
+                        values_list('id', 'token__jti', 'token__expires_at')[:self.batch_size])
+            for blacklisted_id, jti, expires_at in rows:
+                self.revoke(jti, expires_at)
+                last_id = blacklisted_id
+            if len(rows) < self.batch_size:
+                break
+
+        self.last_synced_time = started_at
+
+        self.prune()
+        self.last_synced_at = time.monotonic()
+
+    def prune(self) -> NoReturn:
+        # 만료된 token은 검증 단계에서 거부되므로 제거, bloom filter는 재생성
+        if self.bloom.count < self.capacity:
+            return
+
+        current_time = aware_utcnow()
+        self.revoked = {jti: expires_at for jti, expires_at in self.revoked.items() if expires_at > current_time}
+        self.capacity = max(self.capacity, len(self.revoked) * 2)
+        self.bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti in self.revoked:
+            self.bloom.add(jti)
+
+
+def revoke_token(refresh: 'Token') -> NoReturn:
+    # blacklist에 등록된 refresh token을 현재 process에 즉시 반영(다른 process는 sync로 반영)
+    expires_at = datetime_from_epoch(refresh['exp'])
+    transaction.on_commit(lambda: token_revocations.revoke(refresh[api_settings.JTI_CLAIM], expires_at))
+
+
+def revoke_outstanding_tokens(user_ids: Iterable[int]) -> NoReturn:
+    # 사용자의 유효한 refresh token을 모두 blacklist에 등록(single session, group 변경)
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+
+    outstanding_tokens = OutstandingToken.objects.filter(user_id__in=user_ids,
+                                                         expires_at__gt=aware_utcnow(),
+                                                         blacklistedtoken__isnull=True). \
+        values_list('id', 'jti', 'expires_at')
+
+    revoked_tokens = list(outstanding_tokens)
+    BlacklistedToken.objects.bulk_create([BlacklistedToken(token_id=token_id) for token_id, _, _ in revoked_tokens],
+                                         ignore_conflicts=True)
+
+    def revoke_in_memory():
+        for _, jti, expires_at in revoked_tokens:
+            token_revocations.revoke(jti, expires_at)
+
+    transaction.on_commit(revoke_in_memory)
+
+
+token_revocations = TokenRevocationSet()
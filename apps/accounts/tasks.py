@@ -0,0 +1,41 @@
+import logging
+from typing import Dict
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from config.celery_settings.celery import app
+from config.utils.utils import estimate_table_rows
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(name='prune_expired_tokens')
+def prune_expired_tokens(batch_size: int = 1000, max_batches: int = 100) -> Dict[str, int]:
+    """
+    만료된 OutstandingToken(+ BlacklistedToken) 삭제
+    - 만료된 token은 id가 작은 순서로 쌓이므로 id 순서로 batch_size 만큼 삭제(lock 범위 제한)
+    - max_batches 이후에도 남은 token은 다음 실행에서 삭제
+    """
+    current_time = aware_utcnow()
+    expired_tokens = OutstandingToken.objects.filter(expires_at__lte=current_time).order_by('id')
+    deleted_outstanding, deleted_blacklisted = 0, 0
+
+    for _ in range(max_batches):
+        token_ids = list(expired_tokens.values_list('id', flat=True)[:batch_size])
+        if not token_ids:
+            break
+        # BlacklistedToken을 먼저 삭제하여 cascade collector의 추가 조회 방지
+        deleted_blacklisted += BlacklistedToken.objects.filter(token_id__in=token_ids).delete()[0]
+        deleted_outstanding += OutstandingToken.objects.filter(id__in=token_ids).delete()[0]
+        if len(token_ids) < batch_size:
+            break
+
+    metrics = {
+        'deleted_outstanding': deleted_outstanding,
+        'deleted_blacklisted': deleted_blacklisted,
+        'outstanding_rows': estimate_table_rows(OutstandingToken),
+        'blacklisted_rows': estimate_table_rows(BlacklistedToken),
+    }
+    logger.info('prune_expired_tokens: %s', metrics)
+    return metrics
@@ -0,0 +1,48 @@
+from django.contrib import admin
+
+from archives.models import ArchivedDoctorFile, ArchivedFilePrescription, ArchivedPatientFile, ArchivedPrescription
+
+
+class ArchivedModelAdmin(admin.ModelAdmin):
+    # 보관 table은 조회만 가능(archives.archivers로만 생성)
+    list_per_page = 100
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedPrescription)
+class ArchivedPrescriptionAdmin(ArchivedModelAdmin):
+    list_display = ['id', 'writer_id', 'patient_id', 'start_date', 'end_date', 'deleted_at', 'archived_at']
+    list_filter = ['archived_at']
+    search_fields = ['=id', '=writer_id', '=patient_id']
+
+
+@admin.register(ArchivedFilePrescription)
+class ArchivedFilePrescriptionAdmin(ArchivedModelAdmin):
+    list_display = ['id', 'prescription_id', 'day_number', 'date', 'uploaded', 'checked', 'archived_at']
+    list_filter = ['archived_at']
+    search_fields = ['=id', '=prescription_id']
+
+
+@admin.register(ArchivedDoctorFile)
+class ArchivedDoctorFileAdmin(ArchivedModelAdmin):
+    list_display = ['id', 'prescription_id', 'uploader_id', 'file', 'archived_at']
+    list_filter = ['archived_at']
+    search_fields = ['=prescription_id', '=uploader_id']
+
+
+@admin.register(ArchivedPatientFile)
+class ArchivedPatientFileAdmin(ArchivedModelAdmin):
+    list_display = ['id', 'file_prescription_id', 'uploader_id', 'file', 'archived_at']
+    list_filter = ['archived_at']
+    search_fields = ['=file_prescription_id', '=uploader_id']
@@ -0,0 +1,97 @@
+import datetime
+from typing import Dict, List, NoReturn, Tuple, Type
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils.timezone import now
+
+from archives.models import (ArchivedDoctorFile, ArchivedFilePrescription, ArchivedModel, ArchivedPatientFile,
+                             ArchivedPrescription)
+from files.models import DoctorFile, PatientFile
+from prescriptions.models import FilePrescription, Prescription
+
+
+class Archiver:
+    """
+    Archiver: 삭제(deleted=True)된 지 cutoff가 지난 row를 보관 table로 이동
+    - pk 순서로 batch_size 만큼 transaction 단위 이동(INSERT 보관 table -> DELETE 원본 table)
+    - 중단된 경우 다시 실행하면 남은 row부터 이동(이동된 row는 원본에 없음, 보관 table INSERT는 중복 무시)
+    - 아직 참조하는 row(references)가 원본 table에 남아 있는 경우 이동하지 않음
+    - deleted_at이 없는(기록 이전에 삭제된) row는 updated_at 기준
+    """
+    model: Type[models.Model] = None
+    archive_model: Type[ArchivedModel] = None
+    references: List[Tuple[Type[models.Model], str]] = []  # (참조하는 model, 외래 키 field)
+
+    def __init__(self, cutoff: datetime.datetime, batch_size: int = 1000):
+        self.cutoff: datetime.datetime = cutoff
+        self.batch_size: int = batch_size
+        self.fields: List[str] = [field.attname for field in self.archive_model._meta.concrete_fields
+                                  if field.attname != 'archived_at']
+
+    def get_queryset(self) -> models.QuerySet:
+        queryset = self.model._base_manager.filter(deleted=True). \
+            filter(Q(deleted_at__lte=self.cutoff) | Q(deleted_at__isnull=True, updated_at__lte=self.cutoff))
+        for related_model, field in self.references:
+            queryset = queryset.filter(~Exists(related_model._base_manager.filter(**{field: OuterRef('pk')})))
+        return queryset.order_by('pk')
+
+    def run(self, max_batches: int = 100) -> int:
+        archived, last_pk = 0, None
+        for _ in range(max_batches):
+            queryset = self.get_queryset()
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            with transaction.atomic():
+                rows = list(queryset.select_for_update()[:self.batch_size])
+                if not rows:
+                    break
+                self.archive_model.objects.bulk_create([self.to_archive(row) for row in rows],
+                                                       ignore_conflicts=True)
+                self.delete_rows([row.pk for row in rows])
+            archived, last_pk = archived + len(rows), rows[-1].pk
+            if len(rows) < self.batch_size:
+                break
+        return archived
+
+    def to_archive(self, row: models.Model) -> ArchivedModel:
+        return self.archive_model(**{field: getattr(row, field) for field in self.fields})
+
+    def delete_rows(self, pks: List) -> NoReturn:
+        self.model._base_manager.filter(pk__in=pks).delete()
+
+
+class PatientFileArchiver(Archiver):
+    model = PatientFile
+    archive_model = ArchivedPatientFile
+
+
+class DoctorFileArchiver(Archiver):
+    model = DoctorFile
+    archive_model = ArchivedDoctorFile
+
+
+class FilePrescriptionArchiver(Archiver):
+    model = FilePrescription
+    archive_model = ArchivedFilePrescription
+    references = [(PatientFile, 'file_prescription')]
+
+
+class PrescriptionArchiver(Archiver):
+    model = Prescription
+    archive_model = ArchivedPrescription
+    references = [(FilePrescription, 'prescription'), (DoctorFile, 'prescription')]
+
+
+# 참조하는 model부터 이동
+ARCHIVERS: List[Type[Archiver]] = [PatientFileArchiver, DoctorFileArchiver, FilePrescriptionArchiver,
+                                   PrescriptionArchiver]
+
+
+def archive_deleted_rows(days: int = None, batch_size: int = None, max_batches: int = 100) -> Dict[str, int]:
+    days = getattr(settings, 'ARCHIVE_DELETED_AFTER_DAYS', 90) if days is None else days
+    batch_size = batch_size or getattr(settings, 'ARCHIVE_BATCH_SIZE', 1000)
+    cutoff = now() - datetime.timedelta(days=days)
+    return {archiver_class.model._meta.label: archiver_class(cutoff, batch_size).run(max_batches)
+            for archiver_class in ARCHIVERS}
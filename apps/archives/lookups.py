@@ -0,0 +1,28 @@
+from typing import Any, Dict, Type, Union
+
+from django.db import models
+
+from archives.models import (ArchivedDoctorFile, ArchivedFilePrescription, ArchivedModel, ArchivedPatientFile,
+                             ArchivedPrescription)
+from files.models import DoctorFile, PatientFile
+from prescriptions.models import FilePrescription, Prescription
+
+# 원본 model: 보관 model
+ARCHIVE_MODELS: Dict[Type[models.Model], Type[ArchivedModel]] = {
+    Prescription: ArchivedPrescription,
+    FilePrescription: ArchivedFilePrescription,
+    DoctorFile: ArchivedDoctorFile,
+    PatientFile: ArchivedPatientFile,
+}
+
+
+def get_with_archive(model: Type[models.Model], pk: Any) -> Union[models.Model, ArchivedModel]:
+    # 관리자, 감사(audit) 조회: 원본 table(삭제된 row 포함) -> 보관 table
+    try:
+        return model._base_manager.get(pk=pk)
+    except model.DoesNotExist:
+        return ARCHIVE_MODELS[model].objects.get(pk=pk)  # 없는 경우 보관 model의 DoesNotExist
+
+
+def is_archived(instance: Union[models.Model, ArchivedModel]) -> bool:
+    return isinstance(instance, ArchivedModel)
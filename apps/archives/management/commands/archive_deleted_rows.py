@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from archives.archivers import archive_deleted_rows
+
+
+class Command(BaseCommand):
+    help = '삭제(deleted=True) 후 일정 기간이 지난 소견서, 일정, 파일을 보관(archive) table로 이동'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='기본: ARCHIVE_DELETED_AFTER_DAYS')
+        parser.add_argument('--batch-size', type=int, default=None, help='기본: ARCHIVE_BATCH_SIZE')
+        parser.add_argument('--max-batches', type=int, default=100)
+
+    def handle(self, *args, **options):
+        metrics = archive_deleted_rows(days=options['days'], batch_size=options['batch_size'],
+                                       max_batches=options['max_batches'])
+        for label, count in metrics.items():
+            self.stdout.write(self.style.SUCCESS(f'{label}: {count}'))
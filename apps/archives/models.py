@@ -0,0 +1,74 @@
+from django.db import models
+
+from prescriptions.models import HealthStatus
+
+"""
+보관(archive) table: 삭제(deleted=True) 후 ARCHIVE_DELETED_AFTER_DAYS가 지난 row를 원본 table에서 이동(archives.archivers)
+- 원본과 같은 pk, column(외래 키는 제약 조건 없는 id column)
+- 조회: archives.lookups.get_with_archive(원본 -> 보관 table 순서)
+"""
+
+
+class ArchivedModel(models.Model):
+    archived_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        abstract = True
+
+
+class ArchivedBasePrescription(ArchivedModel):
+    description = models.TextField()
+    description_for_patient = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=HealthStatus.choices, default=HealthStatus.UNKNOWN)
+    checked = models.BooleanField(default=False)
+    checked_by_patient = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    deleted = models.BooleanField(default=True)
+    deleted_at = models.DateTimeField(null=True)
+
+    class Meta:
+        abstract = True
+
+
+class ArchivedPrescription(ArchivedBasePrescription):
+    id = models.IntegerField(primary_key=True)
+    writer_id = models.IntegerField(db_index=True)
+    patient_id = models.IntegerField(db_index=True)
+    start_date = models.DateField(null=True)
+    end_date = models.DateField(null=True)
+    lazy_schedule = models.BooleanField(default=False)
+    total_days = models.IntegerField(default=0)
+    uploaded_days = models.IntegerField(default=0)
+    checked_days = models.IntegerField(default=0)
+    last_uploaded_at = models.DateTimeField(null=True)
+
+
+class ArchivedFilePrescription(ArchivedBasePrescription):
+    id = models.IntegerField(primary_key=True)
+    prescription_id = models.IntegerField(db_index=True)
+    day_number = models.IntegerField()
+    date = models.DateField(null=True)
+    active = models.BooleanField(default=True)
+    uploaded = models.BooleanField(default=False)
+
+
+class ArchivedBaseFile(ArchivedModel):
+    id = models.UUIDField(primary_key=True)
+    uploader_id = models.IntegerField(db_index=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    file = models.FileField(null=True)  # 저장된 파일은 삭제하지 않음(원본 경로 유지)
+    deleted = models.BooleanField(default=True)
+    deleted_at = models.DateTimeField(null=True)
+
+    class Meta:
+        abstract = True
+
+
+class ArchivedDoctorFile(ArchivedBaseFile):
+    prescription_id = models.IntegerField(null=True, db_index=True)
+
+
+class ArchivedPatientFile(ArchivedBaseFile):
+    file_prescription_id = models.IntegerField(null=True, db_index=True)
@@ -0,0 +1,15 @@
+import logging
+from typing import Dict
+
+from archives.archivers import archive_deleted_rows
+from config.celery_settings.celery import app
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(name='archive_deleted_rows')
+def archive_deleted_rows_task(batch_size: int = None, max_batches: int = 100) -> Dict[str, int]:
+    # 삭제 후 ARCHIVE_DELETED_AFTER_DAYS가 지난 row 이동(남은 row는 다음 실행에서 이동)
+    metrics = archive_deleted_rows(batch_size=batch_size, max_batches=max_batches)
+    logger.info('archive_deleted_rows: %s', metrics)
+    return metrics
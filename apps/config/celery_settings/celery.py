@@ -36,4 +36,12 @@ app.conf.beat_schedule = {
         'schedule': timedelta(seconds=30),
         'args': (16, 16)
     },
+    'prune-expired-tokens-every-hour': {
+        'task': 'prune_expired_tokens',
+        'schedule': crontab(minute=30),
+    },
+    'archive-deleted-rows-every-day': {
+        'task': 'archive_deleted_rows',
+        'schedule': crontab(hour=4, minute=0),
+    },
 }
@@ -1,5 +1,6 @@
 import json
 import os
+import tempfile
 from pathlib import Path
 
 from django.core.exceptions import ImproperlyConfigured
@@ -50,6 +51,7 @@ INSTALLED_APPS = [
     'prescriptions',
     'core',
     'files',
+    'archives',
 
 ]
 
@@ -61,6 +63,9 @@ CORS_ORIGIN_WHITELIST = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.utils.access_log.AccessLogMiddleware',  # JSON lines access log
+    'config.utils.metrics.MetricsMiddleware',  # internal/metrics
+    'config.utils.query_budget.QueryBudgetMiddleware',  # 요청 별 query 수, N+1 측정
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
 
@@ -68,6 +73,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+
+    'prescriptions.checks.CheckStateMiddleware',  # Prescription.checked 요청 단위 일괄 갱신
 ]
 ROOT_URLCONF = 'config.urls'
 
@@ -152,6 +159,83 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 30
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# accounts.caches.AuthUserCache
+# - multi process(worker) 환경에서는 redis 등 공유 캐시를 사용해야 무효화가 모든 worker에 적용됨
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+
+# CustomRefreshToken.for_user: token에 group 및 doctor/patient id claim 포함
+JWT_USER_TYPE_CLAIMS = True
+
+# accounts.revocations.TokenRevocationSet: token 폐기 여부를 blacklist 동기화 값(memory)으로 검사
+JWT_REVOCATION_SET = True
+JWT_REVOCATION_SYNC_INTERVAL = 5  # seconds
+JWT_REVOCATION_SYNC_MARGIN = 60  # seconds(늦게 commit된 blacklist row를 다시 조회하는 범위)
+
+# async login(token/async): password hash thread 수, 대기 가능한 hash 요청 수(초과 시 503)
+PASSWORD_HASH_WORKERS = 4
+PASSWORD_HASH_MAX_PENDING = 64
+
+# accounts.autocomplete.AutocompleteIndex: 다른 process 변경 사항 증분 동기화 / 전체 재생성 주기
+AUTOCOMPLETE_SYNC_INTERVAL = 5  # seconds
+AUTOCOMPLETE_REBUILD_INTERVAL = 600  # seconds
+
+# prescriptions.search: 소견서 본문 검색 engine('auto' 또는 engine class 경로), Python engine 동기화 주기,
+# 점수(search_rank)를 지정할 최대 결과 수(그 외 결과는 search_rank=0으로 포함)
+PRESCRIPTION_SEARCH_ENGINE = 'auto'
+PRESCRIPTION_SEARCH_SYNC_INTERVAL = 5  # seconds
+PRESCRIPTION_SEARCH_MAX_RESULTS = 1000
+
+# True: 소견서 작성 시 FilePrescription을 생성하지 않고 날짜 범위로 계산(prescriptions.schedules)
+PRESCRIPTION_LAZY_SCHEDULE = False
+
+# config.utils.pagination_backends.FasterPagination: 기본 count 방식(exact, cached, estimated, has_next)
+# - view.count_strategy로 view 별 지정, cached: 사용자 + filter parameter 별 count 캐시 시간
+# - estimated: filter가 없으면 table 통계, 있으면 EXPLAIN 예상 row 수(MySQL, 그 외 backend는 cached)
+PAGINATION_COUNT_STRATEGY = 'exact'
+PAGINATION_COUNT_CACHE_ALIAS = 'default'
+PAGINATION_COUNT_CACHE_TIMEOUT = 60  # seconds
+
+# archives: 삭제(deleted=True) 후 보관 table로 이동하기까지의 기간, transaction 당 이동할 row 수
+ARCHIVE_DELETED_AFTER_DAYS = 90
+ARCHIVE_BATCH_SIZE = 1000
+
+# config.utils.query_budget.QueryBudgetMiddleware: 요청 별 query 수, 시간(X-Query-Count, X-Query-Time header)
+# - 같은 SQL template이 QUERY_N_PLUS_ONE_THRESHOLD번 이상 실행된 경우 N+1로 판단(warning log)
+# - QUERY_BUDGET_ENFORCE: view.query_budget 초과 시 예외(테스트)
+QUERY_BUDGET_ENABLED = True
+QUERY_BUDGET_ENFORCE = False
+QUERY_N_PLUS_ONE_THRESHOLD = 5
+
+# config.utils.metrics: internal/metrics(Prometheus text format)
+# - METRICS_MULTIPROCESS_DIR: gunicorn worker 별 값을 저장할 directory(<pid>-<시작 시각>.json, 종료된 worker: archive.json)
+#   None: 요청을 처리한 process의 값만 조회(단일 process 실행에서만 사용)
+# - 조회: staff 또는 METRICS_TOKEN(secrets.json, 수집기: Authorization: Bearer <token>)
+# - METRICS_ALLOWED_IPS: token 없이 조회 가능한 REMOTE_ADDR(기본: 없음)
+#   같은 host의 reverse proxy 뒤에서는 모든 요청이 127.0.0.1이므로 proxy 없이 직접 수집하는 경우에만 지정
+METRICS_ENABLED = True
+METRICS_MULTIPROCESS_DIR = os.path.join(tempfile.gettempdir(), 'ut-project-metrics')
+METRICS_FLUSH_INTERVAL = 10  # seconds
+METRICS_TOKEN = secrets.get('METRICS_TOKEN')
+METRICS_ALLOWED_IPS = []
+
+# config.utils.access_log: JSON lines access log(queue -> listener thread에서 batch 출력)
+# - 성공 요청은 ACCESS_LOG_SAMPLE_RATE 비율로 기록, status >= 400 또는 ACCESS_LOG_SLOW_MS 이상인 요청은 항상 기록
+# - ACCESS_LOG_FILE: None인 경우 stdout, ACCESS_LOG_QUEUE_SIZE 이상 쌓인 경우 버림
+ACCESS_LOG_ENABLED = True
+ACCESS_LOG_SAMPLE_RATE = 0.1
+ACCESS_LOG_SLOW_MS = 1000
+ACCESS_LOG_BATCH_SIZE = 100
+ACCESS_LOG_FLUSH_INTERVAL = 1.0  # seconds
+ACCESS_LOG_QUEUE_SIZE = 10000
+ACCESS_LOG_FILE = None
+
 SWAGGER_SETTINGS = {
     'DEFAULT_AUTO_SCHEMA_CLASS': 'config.utils.doc_utils.CustomAutoSchema',
     'DEFAULT_GENERATOR_CLASS': 'config.utils.doc_utils.CustomOpenAPISchemaGenerator',
@@ -1,5 +1,11 @@
 from config.settings.local import *
 
+# view.query_budget 초과 시 테스트 실패
+QUERY_BUDGET_ENFORCE = True
+# access log 출력하지 않음(access_log_tests에서 지정)
+ACCESS_LOG_ENABLED = False
+# metrics: 테스트 process의 값만 조회(metrics_tests에서 지정)
+METRICS_MULTIPROCESS_DIR = None
 
 DATABASES = {
     'default': {
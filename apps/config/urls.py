@@ -4,8 +4,10 @@ from django.conf.urls import url
 from django.contrib import admin
 from django.urls import path, include
 
-from accounts.api.views import AccountsTokenPairView, TokenLogoutView, AccountsTokenRefreshView, session_logout_view
+from accounts.api.views import AccountsTokenPairView, TokenLogoutView, AccountsTokenRefreshView, session_logout_view, \
+    async_token_login_view
 from config.utils.doc_utils import schema_view
+from config.utils.metrics import metrics_view
 from files.api.views import TempFiles, TempFilesUpload, TempFilesDownload, TempFilesBulkDownload
 
 urlpatterns = [
@@ -17,12 +19,14 @@ urlpatterns = [
     path('datafiles/', include('files.api.urls', namespace='files')),
 
     path('token', AccountsTokenPairView.as_view(), name='token-login'),
+    path('token/async', async_token_login_view, name='token-login-async'),
     path('token/refresh', AccountsTokenRefreshView.as_view(), name='token-refresh'),
     path('token/logout', TokenLogoutView.as_view(), name='token-logout'),
 
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
     path('api-auth/logout', session_logout_view, name='session_logout'),
     path('ut-admin/', admin.site.urls),
+    path('internal/metrics', metrics_view, name='metrics'),
     path('', include('django.contrib.auth.urls')),
 ]
 
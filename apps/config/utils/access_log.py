@@ -0,0 +1,250 @@
+import asyncio
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, NoReturn, Optional, TextIO, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject, empty
+
+"""
+access log(JSON lines)
+- 요청 thread: 기록할 값(dict)만 queue에 추가(formatting, 출력 없음), queue가 가득 찬 경우 버림
+- QueueListener thread: JSON 변환 후 ACCESS_LOG_BATCH_SIZE 또는 ACCESS_LOG_FLUSH_INTERVAL 단위로 출력
+- 성공 요청은 ACCESS_LOG_SAMPLE_RATE 비율로 기록, 오류(status >= 400) 또는 느린 요청(ACCESS_LOG_SLOW_MS)은 항상 기록
+"""
+
+
+class JSONLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        created = datetime.datetime.fromtimestamp(record.created, tz=datetime.timezone.utc)
+        return json.dumps({'time': created.isoformat(timespec='milliseconds'), **record.access},
+                          ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    DroppingQueueHandler: 요청 thread에서 format 하지 않고 record를 그대로 queue에 추가
+    - queue.SimpleQueue(제한 없음)에 max_size 이상 쌓인 경우 버림(출력이 밀려도 요청은 대기하지 않음)
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int):
+        super().__init__(log_queue)
+        self.max_size: int = max_size
+        self.dropped: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record  # 같은 process의 listener에서 format
+
+    def enqueue(self, record: logging.LogRecord) -> NoReturn:
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    """
+    BatchStreamHandler: batch_size개 또는 flush_interval 마다 한 번에 출력(listener thread에서만 호출)
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, batch_size: int = 100, flush_interval: float = 1.0):
+        super().__init__(stream)
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.buffer: List[str] = []
+        self.flushed_at: float = time.monotonic()
+
+    def emit(self, record: logging.LogRecord) -> NoReturn:
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.batch_size or time.monotonic() - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> NoReturn:
+        self.acquire()
+        try:
+            if self.buffer:
+                self.stream.write('\n'.join(self.buffer) + '\n')
+                self.buffer = []
+            self.flushed_at = time.monotonic()
+            super().flush()
+        finally:
+            self.release()
+
+
+class BatchQueueListener(QueueListener):
+    # flush_interval 동안 기록이 없으면 handler의 buffer 출력(None은 종료 sentinel)
+    FLUSH = object()
+
+    def __init__(self, log_queue: queue.SimpleQueue, *handlers: logging.Handler, flush_interval: float = 1.0):
+        super().__init__(log_queue, *handlers)
+        self.flush_interval: float = flush_interval
+
+    def dequeue(self, block: bool) -> Any:
+        try:
+            return self.queue.get(block, timeout=self.flush_interval)
+        except queue.Empty:
+            return self.FLUSH
+
+    def handle(self, record: Any) -> NoReturn:
+        if record is self.FLUSH:
+            self.flush()
+            return
+        super().handle(record)
+
+    def flush(self) -> NoReturn:
+        for handler in self.handlers:
+            handler.flush()
+
+    def stop(self) -> NoReturn:
+        super().stop()
+        self.flush()
+
+
+class AccessLog:
+    """
+    AccessLog: process 별 queue, listener thread
+    - fork(gunicorn worker) 이후 처음 기록할 때 현재 process에서 listener 시작
+    """
+
+    def __init__(self):
+        self.logger: logging.Logger = logging.getLogger('config.access')
+        self.logger.propagate = False
+        self.handler: Optional[DroppingQueueHandler] = None
+        self.listener: Optional[BatchQueueListener] = None
+        self.pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def start(self, stream: Optional[TextIO] = None) -> NoReturn:
+        with self._lock:
+            if self.handler is not None:
+                self.logger.removeHandler(self.handler)
+            if self.listener is not None and self.pid == os.getpid():
+                self.listener.stop()
+            flush_interval = getattr(settings, 'ACCESS_LOG_FLUSH_INTERVAL', 1.0)
+            output = BatchStreamHandler(stream or self.get_stream(),
+                                        batch_size=getattr(settings, 'ACCESS_LOG_BATCH_SIZE', 100),
+                                        flush_interval=flush_interval)
+            output.setFormatter(JSONLinesFormatter())
+            log_queue = queue.SimpleQueue()
+            self.handler = DroppingQueueHandler(log_queue, getattr(settings, 'ACCESS_LOG_QUEUE_SIZE', 10000))
+            self.listener = BatchQueueListener(log_queue, output, flush_interval=flush_interval)
+            self.listener.start()
+            self.logger.addHandler(self.handler)
+            self.logger.setLevel(logging.INFO)
+            self.pid = os.getpid()
+
+    def stop(self) -> NoReturn:
+        with self._lock:
+            if self.listener is not None and self.pid == os.getpid():
+                self.listener.stop()
+            if self.handler is not None:
+                self.logger.removeHandler(self.handler)
+            self.handler, self.listener, self.pid = None, None, None
+
+    def get_stream(self) -> TextIO:
+        path = getattr(settings, 'ACCESS_LOG_FILE', None)
+        return open(path, 'a', encoding='utf-8') if path else sys.stdout
+
+    def log(self, entry: Dict[str, Any]) -> NoReturn:
+        if self.pid != os.getpid():
+            self.start()
+        self.logger.info('access', extra={'access': entry})
+
+
+access_log = AccessLog()
+atexit.register(access_log.stop)  # 종료 시 buffer 출력
+
+
+def get_user_info(request) -> Tuple[Optional[int], str]:
+    # (user id, role): DRF 인증(JWT)의 user_type, session 사용자를 아직 조회하지 않은 경우 조회하지 않음(anonymous)
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None, 'anonymous'
+    if user is None or not user.is_authenticated:
+        return None, 'anonymous'
+    user_type = getattr(user, 'user_type', None)
+    if user_type is not None:
+        role = 'doctor' if user_type.doctor else 'patient' if user_type.patient else 'user'
+    else:
+        role = 'staff' if user.is_staff else 'user'
+    return user.pk, role
+
+
+class AccessLogMiddleware(MiddlewareMixin):
+    """
+    AccessLogMiddleware: 요청 처리 후 access log 기록(config.utils.access_log)
+    - sampled: 표본으로 기록된 성공 요청인 경우 True(오류, 느린 요청은 False)
+    - async(ASGI): 기록할 요청만 entry 생성(request.user 조회 가능)을 sync_to_async로 실행
+    """
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not getattr(settings, 'ACCESS_LOG_ENABLED', True):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        sampled = self.get_sampled(response, duration_ms)
+        if sampled is not None:
+            access_log.log(self.get_entry(request, response, duration_ms, sampled=sampled))
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'ACCESS_LOG_ENABLED', True):
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        sampled = self.get_sampled(response, duration_ms)
+        if sampled is not None:
+            access_log.log(await sync_to_async(self.get_entry)(request, response, duration_ms, sampled=sampled))
+        return response
+
+    def get_sampled(self, response, duration_ms: float) -> Optional[bool]:
+        # 기록하지 않는 경우 None
+        always = response.status_code >= 400 or duration_ms >= getattr(settings, 'ACCESS_LOG_SLOW_MS', 1000)
+        if always or random.random() < getattr(settings, 'ACCESS_LOG_SAMPLE_RATE', 0.1):
+            return not always
+        return None
+
+    def get_entry(self, request, response, duration_ms: float, sampled: bool) -> Dict[str, Any]:
+        user_id, role = get_user_info(request)
+        resolver_match = getattr(request, 'resolver_match', None)
+        inspector = getattr(request, '_query_inspector', None)
+        meta = request.META
+        return {
+            'method': request.method,
+            'host': meta.get('HTTP_HOST'),
+            'path': request.path,
+            'query': meta.get('QUERY_STRING') or None,
+            'view': resolver_match.view_name if resolver_match is not None else None,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'size': None if response.streaming else len(response.content),
+            'queries': inspector.count if inspector is not None else None,
+            'user_id': user_id,
+            'role': role,
+            'ip': meta.get('REMOTE_ADDR'),
+            'agent': meta.get('HTTP_USER_AGENT'),
+            'sampled': sampled,
+        }
@@ -23,6 +23,15 @@ class CustomAutoSchema(SwaggerAutoSchema):
             elif param.name == 'offset':
                 param.description = '화면에 출력될 요소의 오프셋(시작점)'
 
+        if getattr(self.view, 'keyset_ordering', None):  # FasterPagination - keyset(cursor) pagination
+            result += [
+                Parameter(name='pagination', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['offset', 'cursor'],
+                          description='pagination 방식(cursor: offset 대신 next url의 cursor 사용, 깊은 페이지도 같은 비용)'),
+                Parameter(name='cursor', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                          description='이전 응답의 next url에 포함된 cursor 값'),
+                Parameter(name='with_count', in_=openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                          description='cursor pagination에서 전체 개수(count) 포함 여부(기본: false)'),
+            ]
         return result
 
 
@@ -1,25 +1,32 @@
-from typing import Dict
+import datetime
+from typing import Dict, Optional
 
+from django.utils.timezone import now
 from django_filters.rest_framework import DjangoFilterBackend
 
-LOOKUP_OPERATOR = {
-    'exact': '=',
-    'lte': '<=',
-    'gte': '>='
-}
 
-
-def create_extra_expression(target_expressions: Dict[str, int]) -> str:
-    expr_container = []
-    function_name = 'django_mysql.calculate_age(birth)'
-
-    for name, value in target_expressions.items():
-        expr_container.append(f"{function_name} {LOOKUP_OPERATOR[name]} {value}")
-
-    extra_expression = f"{expr_container[0]} AND {expr_container[1]}" \
-        if len(expr_container) == 2 else expr_container[0]
-
-    return extra_expression
+def shift_years(date: datetime.date, years: int) -> datetime.date:
+    try:
+        return date.replace(year=date.year - years)
+    except ValueError:  # 2월 29일 -> 평년의 2월 28일
+        return date.replace(year=date.year - years, day=28)
+
+
+def create_birth_lookups(min_age: Optional[int] = None, max_age: Optional[int] = None,
+                         today: datetime.date = None) -> Dict[str, datetime.date]:
+    """
+    나이 조건을 birth(생년월일) 범위 조건으로 변환(birth index 사용 가능)
+    - age >= min_age: birth <= (today - min_age년)
+    - age <= max_age: birth > (today - (max_age + 1)년)
+    - 나이 계산은 calculate_age(yyyymmdd 차이 / 10000)와 동일
+    """
+    today = today or now().date()
+    lookups = {}
+    if min_age is not None:
+        lookups['birth__lte'] = shift_years(today, min_age)
+    if max_age is not None:
+        lookups['birth__gt'] = shift_years(today, max_age + 1)
+    return lookups
 
 
 class CustomDjangoFilterBackend(DjangoFilterBackend):
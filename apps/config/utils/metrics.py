@@ -0,0 +1,345 @@
+import asyncio
+import fcntl
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from glob import glob
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, NoReturn, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.deprecation import MiddlewareMixin
+
+"""
+Prometheus text format metrics(internal/metrics)
+- 기록: thread 별 shard(threading.local)에만 기록하므로 요청 처리 중 lock 없음, 조회 시 shard 합산
+- multi process(gunicorn worker): 각 process가 METRICS_FLUSH_INTERVAL 마다 METRICS_MULTIPROCESS_DIR에
+  <pid>-<시작 시각>.json으로 저장하고 조회 시 모든 process의 값을 합산
+- 종료된 worker(pid 재사용 포함)의 값은 archive.json에 합산 후 파일 삭제(counter가 감소하지 않음)
+- METRICS_MULTIPROCESS_DIR=None: 현재 process의 값만 조회(단일 process 실행)
+"""
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]  # collector: (name, labels, value)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+ARCHIVE_FILE = 'archive.json'  # 종료된 worker의 값 합계
+
+
+class Metric(NamedTuple):
+    type: str  # histogram, counter
+    help: str
+    buckets: Tuple[float, ...] = ()
+
+
+class MetricsRegistry:
+    """
+    MetricsRegistry
+    - histogram 값: [bucket 별 개수(마지막: +Inf), 합계], counter 값: [합계]
+    - collector: 조회(저장) 시점의 counter 값을 반환하는 함수(ex: password hash executor)
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._reset()
+
+    def _reset(self) -> NoReturn:
+        # 생성 또는 fork 이후(worker): 부모 process의 값 제외
+        self._pid: int = os.getpid()
+        self._started: int = time.time_ns()  # 같은 pid를 사용한 이전 worker와 구분
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple[str, Labels], List[float]]] = []
+        self._lock = threading.Lock()  # shard 생성, 조회에만 사용
+        self._flushed_at: float = 0.0
+
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float]) -> NoReturn:
+        self.metrics[name] = Metric('histogram', help_text, tuple(buckets))
+
+    def counter(self, name: str, help_text: str) -> NoReturn:
+        self.metrics[name] = Metric('counter', help_text)
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]) -> NoReturn:
+        if collector not in self.collectors:
+            self.collectors.append(collector)
+
+    @property
+    def shard(self) -> Dict[Tuple[str, Labels], List[float]]:
+        if self._pid != os.getpid():
+            self._reset()
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def observe(self, name: str, value: float, **labels: str) -> NoReturn:
+        buckets = self.metrics[name].buckets
+        key = (name, tuple(sorted(labels.items())))
+        shard = self.shard
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = [0] * (len(buckets) + 2)
+        values[bisect_left(buckets, value)] += 1  # value <= le
+        values[-1] += value
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> NoReturn:
+        key = (name, tuple(sorted(labels.items())))
+        shard = self.shard
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = [0]
+        values[0] += amount
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def collect(self) -> Dict[Tuple[str, Labels], List[float]]:
+        # 현재 process의 값
+        with self._lock:
+            shards = list(self._shards)
+        merged = {}
+        for shard in shards:
+            for key, values in list(shard.items()):
+                merge_values(merged, key, values)
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                merged[(name, tuple(sorted(labels.items())))] = [value]
+        return merged
+
+    @property
+    def directory(self) -> str:
+        return getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+
+    @property
+    def flush_due(self) -> bool:
+        # METRICS_FLUSH_INTERVAL이 지나 저장할 값이 있는 경우
+        return bool(self.directory) and \
+            time.monotonic() - self._flushed_at >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+
+    def flush(self, force: bool = False) -> NoReturn:
+        # 요청 종료 시 호출: METRICS_FLUSH_INTERVAL 마다 현재 process의 값 저장(임시 파일 -> rename)
+        directory = self.directory
+        if not directory:
+            return
+        if self._pid != os.getpid():
+            self._reset()
+        current = time.monotonic()
+        if not force and current - self._flushed_at < getattr(settings, 'METRICS_FLUSH_INTERVAL', 10):
+            return
+        self._flushed_at = current
+        os.makedirs(directory, exist_ok=True)
+        write_samples(os.path.join(directory, f'{self._pid}-{self._started}.json'), self.collect())
+
+    def collect_all(self) -> Dict[Tuple[str, Labels], List[float]]:
+        # 모든 process의 값(실행 중인 worker + archive)
+        directory = self.directory
+        if not directory:
+            return self.collect()
+        self.flush(force=True)
+        self.archive_dead_workers(directory)
+        merged = {}
+        for path in glob(os.path.join(directory, '*.json')):
+            for key, values in read_samples(path).items():
+                merge_values(merged, key, values)
+        return merged
+
+    def archive_dead_workers(self, directory: str) -> NoReturn:
+        # 종료된 worker의 파일을 archive.json에 합산 후 삭제(rename으로 한 process만 처리)
+        for path in glob(os.path.join(directory, '*-*.json')):
+            if not self.is_dead_worker(path):
+                continue
+            claimed = f'{path}.{os.getpid()}.archiving'
+            try:
+                os.rename(path, claimed)
+            except OSError:  # 다른 process가 처리 중
+                continue
+            with open(os.path.join(directory, 'archive.lock'), 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                archive_path = os.path.join(directory, ARCHIVE_FILE)
+                archive = read_samples(archive_path)
+                for key, values in read_samples(claimed).items():
+                    merge_values(archive, key, values)
+                write_samples(archive_path, archive)
+                os.remove(claimed)
+
+    def is_dead_worker(self, path: str) -> bool:
+        try:
+            pid, started = map(int, os.path.basename(path)[:-len('.json')].split('-'))
+        except ValueError:
+            return False
+        if pid == self._pid:  # 현재 process의 pid를 사용했던 이전 worker
+            return started != self._started
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def render(self) -> str:
+        samples: Dict[str, List[Tuple[Labels, List[float]]]] = {}
+        for (name, labels), values in sorted(self.collect_all().items()):
+            samples.setdefault(name, []).append((labels, values))
+
+        lines = []
+        for name, metric in self.metrics.items():
+            if name not in samples:
+                continue
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for labels, values in samples[name]:
+                if metric.type != 'histogram':
+                    lines.append(f'{name}{format_labels(labels)} {format_value(values[0])}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), values[:-1]):
+                    cumulative += count
+                    le_labels = labels + (('le', format_value(bound)),)
+                    lines.append(f'{name}_bucket{format_labels(le_labels)} {format_value(cumulative)}')
+                lines.append(f'{name}_sum{format_labels(labels)} {format_value(values[-1])}')
+                lines.append(f'{name}_count{format_labels(labels)} {format_value(cumulative)}')
+        return '\n'.join(lines) + '\n'
+
+
+def merge_values(merged: Dict[Tuple[str, Labels], List[float]], key: Tuple[str, Labels],
+                 values: List[float]) -> NoReturn:
+    total = merged.get(key)
+    if total is None or len(total) != len(values):
+        merged[key] = list(values)
+        return
+    for index, value in enumerate(values):
+        total[index] += value
+
+
+def read_samples(path: str) -> Dict[Tuple[str, Labels], List[float]]:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {(name, tuple(tuple(label) for label in labels)): values for name, labels, values in data}
+
+
+def write_samples(path: str, samples: Dict[Tuple[str, Labels], List[float]]) -> NoReturn:
+    data = [[name, [list(label) for label in labels], values] for (name, labels), values in samples.items()]
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+metrics = MetricsRegistry()
+metrics.histogram('http_request_duration_seconds', 'Request latency by url name.', LATENCY_BUCKETS)
+metrics.histogram('http_response_size_bytes', 'Response body size by url name.', SIZE_BUCKETS)
+metrics.histogram('http_response_render_seconds', 'Response rendering(serializer data to body) time by url name.',
+                  LATENCY_BUCKETS)
+metrics.histogram('db_queries_per_request', 'DB query count per request by url name.', QUERY_COUNT_BUCKETS)
+metrics.histogram('db_query_duration_seconds', 'DB query time per request by url name.', LATENCY_BUCKETS)
+metrics.histogram('pagination_count_seconds', 'Pagination count time by view and count strategy.', LATENCY_BUCKETS)
+
+
+def get_view_name(request) -> str:
+    resolver_match = getattr(request, 'resolver_match', None)
+    return resolver_match.view_name if resolver_match is not None else 'unresolved'
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    MetricsMiddleware: url name 별 latency, response 크기, rendering 시간, DB query 수/시간(QueryBudgetMiddleware) 기록
+    - QueryBudgetMiddleware보다 앞(바깥)에 위치
+    - async(ASGI): 기록은 event loop thread의 shard, 파일 저장(flush)은 thread pool에서 실행
+    """
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        metrics.flush()
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        if metrics.flush_due:
+            await sync_to_async(metrics.flush, thread_sensitive=False)()
+        return response
+
+    def observe(self, request, response, duration: float) -> NoReturn:
+        view = get_view_name(request)
+        metrics.observe('http_request_duration_seconds', duration, view=view, method=request.method,
+                        status=str(response.status_code))
+        if not response.streaming:
+            metrics.observe('http_response_size_bytes', len(response.content), view=view)
+        render_seconds = getattr(request, '_metrics_render_seconds', None)
+        if render_seconds is not None:
+            metrics.observe('http_response_render_seconds', render_seconds, view=view)
+        inspector = getattr(request, '_query_inspector', None)
+        if inspector is not None:
+            metrics.observe('db_queries_per_request', inspector.count, view=view)
+            metrics.observe('db_query_duration_seconds', inspector.duration, view=view)
+
+    def process_template_response(self, request, response):
+        # DRF Response: process_template_response 이후 render(renderer) 실행
+        start = time.perf_counter()
+
+        def rendered(_):
+            request._metrics_render_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def has_metrics_access(request) -> bool:
+    # METRICS_TOKEN(Authorization: Bearer <token>), METRICS_ALLOWED_IPS(opt-in) 또는 staff
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return True
+    if request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', []):
+        return True
+    return request.user.is_staff
+
+
+def metrics_view(request) -> HttpResponse:
+    if not has_metrics_access(request):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type=CONTENT_TYPE)
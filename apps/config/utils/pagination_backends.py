@@ -1,11 +1,265 @@
-from django.db.models import QuerySet
-from rest_framework.pagination import LimitOffsetPagination
+import base64
+import datetime
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 from accounts.models import AccountsModel
+from config.utils.metrics import metrics
+from config.utils.query_plans import estimate_rows
+from config.utils.utils import estimate_table_rows
+
+
+class KeysetPagination(BasePagination):
+    """
+    KeysetPagination: (정렬 field, pk) 기준 cursor pagination
+    - OFFSET 대신 마지막 객체의 (정렬 field 값, pk) 이후 조건(WHERE)을 사용하므로 모든 page의 비용이 동일
+    - view.keyset_ordering: 기본 정렬(ex: ('-created_at', '-id'))
+    - view.keyset_fields: ordering query parameter로 선택할 수 있는 정렬 field(기본: keyset_ordering의 field)
+    - count는 with_count=true인 경우에만 계산
+    - 정렬 field가 NULL인 객체는 제외됨
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    count_query_param = 'with_count'
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = None
+
+    def __init__(self):
+        self.ordering: Optional[Tuple[str, str]] = None
+        self.limit: Optional[int] = None
+        self.count: Optional[int] = None
+        self.next_cursor: Optional[str] = None
+        self.request = None
+
+    def get_ordering(self, queryset: QuerySet, view) -> Optional[Tuple[str, str]]:
+        # 지정된 정렬(ordering filter 등)의 첫 field가 keyset_fields에 없는 경우 None(offset pagination 사용)
+        default = getattr(view, 'keyset_ordering', None)
+        if not default:
+            return None
+        pk_name = queryset.model._meta.pk.name
+        allowed = getattr(view, 'keyset_fields', (default[0].lstrip('-'),))
+        order_by = queryset.query.order_by
+        if not order_by:
+            return default[0], default[1]
+        first = order_by[0]
+        if not isinstance(first, str) or first.lstrip('-') not in allowed:
+            return None
+        prefix = '-' if first.startswith('-') else ''
+        return first, prefix + pk_name
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> List[Any]:
+        self.request = request
+        self.ordering = self.ordering or self.get_ordering(queryset, view)
+        self.limit = self.get_limit(request)
+        # NULL은 비교(cursor 조건)할 수 없으므로 제외
+        queryset = queryset.filter(**{f'{self.ordering[0].lstrip("-")}__isnull': False}).order_by(*self.ordering)
+        if request.query_params.get(self.count_query_param) in ('true', 'True', '1'):
+            with metrics.timer('pagination_count_seconds', view=type(view).__name__, strategy='keyset'):
+                self.count = queryset.count()
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.get_cursor_filter(cursor))
+
+        objects = list(queryset[:self.limit + 1])
+        self.next_cursor = self.encode_cursor(objects[self.limit - 1]) if len(objects) > self.limit else None
+        return objects[:self.limit]
+
+    def get_cursor_filter(self, cursor: List[Any]) -> Q:
+        (field, pk_field), (value, pk) = self.ordering, cursor
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        field, pk_field = field.lstrip('-'), pk_field.lstrip('-')
+        return Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'{pk_field}__{lookup}': pk})
+
+    def get_limit(self, request) -> int:
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        limit = max(limit, 1)
+        return min(limit, self.max_limit) if self.max_limit else limit
+
+    def encode_cursor(self, obj: Any) -> str:
+        field, pk_field = (name.lstrip('-') for name in self.ordering)
+        value = getattr(obj, field)
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            value = value.isoformat()
+        data = json.dumps([value, getattr(obj, pk_field)], separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, request) -> Optional[List[Any]]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(cursor, list) or len(cursor) != 2 or None in cursor:
+            raise NotFound('Invalid cursor')
+        return cursor
+
+    def get_next_link(self) -> Optional[str]:
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_first_link(self) -> Optional[str]:
+        if not self.request.query_params.get(self.cursor_query_param):
+            return None
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data: List[Any]) -> Response:
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['first'] = self.get_first_link()
+        response['results'] = data
+        return Response(response)
+
+
+class CountStrategy:
+    EXACT = 'exact'  # SELECT COUNT
+    CACHED = 'cached'  # 사용자 + filter parameter 별 COUNT 캐시(PAGINATION_COUNT_CACHE_TIMEOUT)
+    # filter 없음: table 통계(information_schema), filter(작성자 등 소유자 범위) 있음: EXPLAIN 예상 row 수(MySQL)
+    # - EXPLAIN 예상 row 수를 사용할 수 없는 backend의 filter query는 cached
+    ESTIMATED = 'estimated'
+    HAS_NEXT = 'has_next'  # count 없음(limit + 1개 조회로 다음 페이지 여부만 판단)
+
+    choices = (EXACT, CACHED, ESTIMATED, HAS_NEXT)
 
 
 class FasterPagination(LimitOffsetPagination):
-    def get_count(self, queryset: QuerySet) -> int:
+    """
+    FasterPagination: LimitOffsetPagination(기본) + keyset(cursor) pagination
+    - keyset: view.keyset_ordering이 지정된 view에서 pagination=cursor, cursor query parameter 또는
+      view.pagination_mode='cursor'인 경우
+    - queryset이 아닌 경우(list), keyset과 맞지 않는 정렬(ex: 검색 관련도 순)은 offset pagination
+    - count: view.count_strategy(기본: PAGINATION_COUNT_STRATEGY), 응답의 count_strategy에 사용된 방식 표시
+    """
+    mode_query_param = 'pagination'
+    # cached count key에서 제외(페이지 위치)
+    page_query_params = ('limit', 'offset', 'cursor', 'pagination', 'with_count')
+
+    def __init__(self):
+        self.keyset: Optional[KeysetPagination] = None
+        self.view = None
+        self.count_strategy: Optional[str] = None
+        self.has_next: Optional[bool] = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.get_keyset_paginator(queryset, request, view)
+        if self.keyset is not None:
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        self.request, self.view, self.has_next = request, view, None
+        self.count_strategy = self.get_count_strategy(queryset, view)
+        if self.count_strategy == CountStrategy.EXACT:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        # 다음 페이지 여부는 count가 아닌 limit + 1개 조회로 판단(approximate count에도 정확한 next link)
+        objects = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(objects) > self.limit
+        objects = objects[:self.limit]
+        if self.count_strategy == CountStrategy.HAS_NEXT:
+            self.count = None
+        elif self.count_strategy == CountStrategy.ESTIMATED and not self.has_next and (objects or not self.offset):
+            self.count = self.offset + len(objects)  # 마지막 페이지: 정확한 count
+        else:
+            self.count = self.get_count(queryset)
+            if self.count_strategy == CountStrategy.ESTIMATED:  # 근사치는 현재 페이지까지의 수 이상
+                self.count = max(self.count, self.offset + len(objects) + int(self.has_next))
+        return objects
+
+    def get_count(self, queryset) -> int:
+        # LimitOffsetPagination(exact)도 get_count 사용
+        with metrics.timer('pagination_count_seconds', view=type(self.view).__name__,
+                           strategy=self.count_strategy or CountStrategy.EXACT):
+            return self.get_count_by_strategy(queryset)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('count_strategy', self.count_strategy),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if self.has_next is None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_keyset_paginator(self, queryset, request, view=None) -> Optional[KeysetPagination]:
+        if not isinstance(queryset, QuerySet):
+            return None
+        mode = request.query_params.get(self.mode_query_param, getattr(view, 'pagination_mode', 'offset'))
+        if mode != 'cursor' and not request.query_params.get(KeysetPagination.cursor_query_param):
+            return None
+        keyset = KeysetPagination()
+        keyset.max_limit = self.max_limit
+        keyset.ordering = keyset.get_ordering(queryset, view)
+        return keyset if keyset.ordering else None
+
+    def get_count_strategy(self, queryset, view=None) -> str:
+        if not isinstance(queryset, QuerySet):  # list: len()
+            return CountStrategy.EXACT
+        strategy = getattr(view, 'count_strategy', None) or \
+            getattr(settings, 'PAGINATION_COUNT_STRATEGY', CountStrategy.EXACT)
+        if strategy not in CountStrategy.choices:
+            raise ImproperlyConfigured(f'{strategy} is invalid count strategy{CountStrategy.choices}')
+        if strategy == CountStrategy.ESTIMATED and queryset.query.has_filters() and connection.vendor != 'mysql':
+            return CountStrategy.CACHED  # table 통계는 전체 row 수, EXPLAIN 예상 row 수 없음
+        return strategy
+
+    def get_count_by_strategy(self, queryset: QuerySet) -> int:
+        if self.count_strategy == CountStrategy.ESTIMATED:
+            if not queryset.query.has_filters():
+                return estimate_table_rows(queryset.model)
+            rows = estimate_rows(queryset)
+            return rows if rows is not None else self.count_queryset(queryset)
+        if self.count_strategy == CountStrategy.CACHED:
+            cache = caches[getattr(settings, 'PAGINATION_COUNT_CACHE_ALIAS', 'default')]
+            timeout = getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60)
+            return cache.get_or_set(self.get_count_cache_key(queryset), lambda: self.count_queryset(queryset),
+                                    timeout)
+        return self.count_queryset(queryset)
+
+    def get_count_cache_key(self, queryset: QuerySet) -> str:
+        # view + 사용자 + 정규화된 filter parameter(정렬, 페이지 위치 제외)
+        params = sorted((key, sorted(values)) for key, values in self.request.query_params.lists()
+                        if key not in self.page_query_params)
+        digest = hashlib.md5(json.dumps([queryset.model._meta.label, params]).encode()).hexdigest()
+        view_name = type(self.view).__name__ if self.view is not None else ''
+        return f'pagination-count:{view_name}:{self.request.user.pk}:{digest}'
+
+    def count_queryset(self, queryset: QuerySet) -> int:
         id_field = 'id'
         try:
             if issubclass(queryset.model, AccountsModel):
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from typing import Any, Dict, List, NoReturn, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+# IN (%s, %s, ...) -> IN (%s): 개수만 다른 query는 같은 template
+PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryInspector:
+    """
+    QueryInspector: 요청 1회 동안 실행된 query 수, 시간, 반복된 SQL template(N+1) 기록
+    - connection.execute_wrapper로 설치(DEBUG 설정과 관계 없이 동작)
+    """
+
+    def __init__(self):
+        self.count: int = 0
+        self.duration: float = 0.0
+        self.templates: Counter = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.templates[PLACEHOLDER_LIST.sub('%s', sql)] += 1
+
+    def get_repeated(self, threshold: int) -> Dict[str, int]:
+        return {sql: count for sql, count in self.templates.items() if count >= threshold}
+
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    """
+    QueryBudgetMiddleware: view 별 query 수, 시간, N+1(같은 SQL template 반복) 측정
+    - 응답 header: X-Query-Count, X-Query-Time(ms), X-Query-Repeated(N+1로 판단된 template 수)
+    - log: config.utils.query_budget(budget 초과 또는 N+1: warning)
+    - view.query_budget: view 별 최대 query 수, QUERY_BUDGET_ENFORCE=True(테스트)인 경우 초과 시 QueryBudgetExceeded
+    - async(ASGI): view가 실행되는 thread(sync_to_async)의 connection에 execute_wrapper 설치
+    """
+
+    @property
+    def threshold(self) -> int:
+        return getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 5)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', True):
+            return self.get_response(request)
+
+        inspector = request._query_inspector = QueryInspector()  # MetricsMiddleware
+        with connection.execute_wrapper(inspector):
+            response = self.get_response(request)
+        return self.process_budget(request, response, inspector)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', True):
+            return await self.get_response(request)
+
+        inspector = request._query_inspector = QueryInspector()
+        stack = ExitStack()
+        await sync_to_async(lambda: stack.enter_context(connection.execute_wrapper(inspector)))()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.process_budget(request, response, inspector)
+
+    def process_budget(self, request, response, inspector: QueryInspector):
+        view_class = getattr(request, '_query_budget_view', None)
+        repeated = inspector.get_repeated(self.threshold)
+        budget = getattr(view_class, 'query_budget', None)
+        response['X-Query-Count'] = str(inspector.count)
+        response['X-Query-Time'] = f'{inspector.duration * 1000:.2f}'
+        response['X-Query-Repeated'] = str(len(repeated))
+        self.log(request, view_class, inspector, repeated, budget)
+
+        if budget is not None and inspector.count > budget and getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+            raise QueryBudgetExceeded(f'{view_class.__name__}: {inspector.count} queries '
+                                      f'(budget: {budget}), repeated: {list(repeated.values())}')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs) -> NoReturn:
+        # APIView.as_view(): cls, View.as_view(): view_class
+        request._query_budget_view = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+
+    def log(self, request, view_class: Optional[type], inspector: QueryInspector, repeated: Dict[str, int],
+            budget: Optional[int]) -> NoReturn:
+        over_budget = budget is not None and inspector.count > budget
+        extra: Dict[str, Any] = {
+            'view': view_class.__name__ if view_class else None,
+            'path': request.path,
+            'method': request.method,
+            'query_count': inspector.count,
+            'query_time_ms': round(inspector.duration * 1000, 2),
+            'query_budget': budget,
+            'repeated_queries': repeated,
+        }
+        level = logging.WARNING if over_budget or repeated else logging.DEBUG
+        logger.log(level, 'query budget: %s %s %s queries%s%s', request.method, request.path, inspector.count,
+                   f' (budget {budget} exceeded)' if over_budget else '',
+                   f', N+1: {self.format_repeated(repeated)}' if repeated else '', extra=extra)
+
+    def format_repeated(self, repeated: Dict[str, int]) -> List[str]:
+        return [f'{count}x {sql[:120]}' for sql, count in repeated.items()]
@@ -0,0 +1,93 @@
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.db import connection
+from django.db.models import QuerySet
+from django.utils.module_loading import autodiscover_modules
+
+"""
+hot query(자주 실행되는 목록 query) EXPLAIN 검사
+- 각 app의 query_plans.py에서 register_query_plan()으로 등록
+- check_query_plans command(core): 등록된 query 중 full table scan이 있으면 실패
+  (index가 있어도 optimizer가 사용하지 않은 경우 포함)
+- MySQL: EXPLAIN FORMAT=JSON의 access_type=ALL, SQLite: EXPLAIN QUERY PLAN의 SCAN(index 미사용)
+- allow_full_scan: row 수가 적어 full scan이 정상인 table(query 별로 지정)
+- estimate_rows: EXPLAIN의 예상 결과 row 수(pagination estimated count)
+"""
+
+# name: queryset을 반환하는 함수(EXPLAIN만 실행하므로 id 등은 임의 값 사용)
+query_plan_registry: Dict[str, Callable[[], QuerySet]] = {}
+# name: full scan을 허용하는 table 이름
+query_plan_allowed_full_scans: Dict[str, Tuple[str, ...]] = {}
+
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(?P<table>\S+)(?P<rest>.*)$')
+
+
+class FullScan(NamedTuple):
+    query: str
+    table: str
+
+
+def register_query_plan(name: str, allow_full_scan: Iterable[str] = ()) -> \
+        Callable[[Callable[[], QuerySet]], Callable[[], QuerySet]]:
+    def decorator(func: Callable[[], QuerySet]) -> Callable[[], QuerySet]:
+        query_plan_registry[name] = func
+        query_plan_allowed_full_scans[name] = tuple(allow_full_scan)
+        return func
+
+    return decorator
+
+
+def autodiscover_query_plans() -> Dict[str, Callable[[], QuerySet]]:
+    autodiscover_modules('query_plans')
+    return query_plan_registry
+
+
+def find_full_scans(name: str, queryset: QuerySet, allowed_tables: Iterable[str] = ()) -> List[FullScan]:
+    allowed_tables = set(allowed_tables)
+    if connection.vendor == 'mysql':
+        plan = json.loads(queryset.explain(format='json'))
+        # possible_keys가 있어도 access_type=ALL이면 index를 사용하지 않은 것
+        tables = [table['table_name'] for table in iter_mysql_tables(plan) if table.get('access_type') == 'ALL']
+    elif connection.vendor == 'sqlite':
+        tables = []
+        for line in queryset.explain().splitlines():
+            detail = line.split(' ', 3)[-1] if line[:1].isdigit() else line  # "id parent notused detail"
+            match = SQLITE_SCAN.match(detail.strip())
+            if match and 'INDEX' not in match.group('rest'):
+                tables.append(match.group('table'))
+    else:
+        tables = []
+    return [FullScan(name, table) for table in tables if table not in allowed_tables]
+
+
+def iter_mysql_tables(plan: Any, subqueries: bool = True) -> Iterator[Dict[str, Any]]:
+    # query_block -> (nested_loop, ordering_operation, subquery 등) -> table
+    if isinstance(plan, dict):
+        for key, value in plan.items():
+            if not subqueries and 'subquer' in key:  # attached_subqueries, materialized_from_subquery 등
+                continue
+            if key == 'table' and isinstance(value, dict) and 'table_name' in value:
+                yield value
+            yield from iter_mysql_tables(value, subqueries)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from iter_mysql_tables(value, subqueries)
+
+
+def estimate_rows(queryset: QuerySet) -> Optional[int]:
+    # MySQL: join 순서상 마지막 table의 rows_produced_per_join(index 통계 기반), 그 외 backend: None
+    if connection.vendor != 'mysql':
+        return None
+    plan = json.loads(queryset.explain(format='json'))
+    tables = list(iter_mysql_tables(plan, subqueries=False))
+    rows = tables[-1].get('rows_produced_per_join') if tables else None
+    return int(rows) if rows is not None else None
+
+
+def check_query_plans() -> List[FullScan]:
+    full_scans = []
+    for name, func in sorted(autodiscover_query_plans().items()):
+        full_scans += find_full_scans(name, func(), query_plan_allowed_full_scans.get(name, ()))
+    return full_scans
@@ -1,10 +1,9 @@
 import re
-import sys
-from urllib import parse
+from typing import List
 
-from django.db.models import F
+from django.db import connection
+from django.db.models import F, Model
 from django.db.models.functions import Concat
-from django.utils.timezone import now
 
 
 def concatenate_name(target_field: str = None) -> Concat:
@@ -17,18 +16,34 @@ def concatenate_name(target_field: str = None) -> Concat:
     return full_name
 
 
-def log_request(sender, environ, **kwargs):  # HTTP_USER_AGENT, HTTP_HOST, REMOTE_ADDR
-    if "pytest" not in sys.modules:
-        current_time = now().strftime("%Y-%m-%dT%H:%M:%S")
-        method = environ['REQUEST_METHOD']
-        host = environ['HTTP_HOST']
-        path = environ['PATH_INFO']
-        query = environ['QUERY_STRING']
-        client_ip = environ['REMOTE_ADDR']
-        client_agent = environ['HTTP_USER_AGENT']
-        query = '?' + parse.unquote(query) if query else ''
-        print(f'[{current_time}][{method}] {host}{path}{query} | IP_addr:{client_ip} | Agent: {client_agent}')
-
+def normalize_name(name: str) -> str:
+    # full_name(성+이름) 저장 및 검색에 사용: 공백 제거, 소문자
+    return ''.join(str(name).split()).lower()
+
+
+def split_name_tokens(name: str, query: bool = False) -> List[str]:
+    """
+    이름 부분 검색(contains)에 사용되는 token(음절 unigram, bigram)
+    - 저장: 모든 unigram + bigram
+    - 검색(query=True): bigram(검색어가 1음절인 경우 unigram)
+    """
+    name = normalize_name(name)
+    bigrams = [name[i:i + 2] for i in range(len(name) - 1)]
+    if query:
+        return list(dict.fromkeys(bigrams or ([name] if name else [])))
+    return list(dict.fromkeys(list(name) + bigrams))
+
+
+def estimate_table_rows(model: Model) -> int:
+    # MySQL: information_schema의 통계값(근사치) 사용, 그 외 backend는 COUNT
+    if connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT TABLE_ROWS FROM information_schema.TABLES '
+                           'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s', [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] is not None:
+            return int(row[0])
+    return model._default_manager.count()
 
 
 def convert_camel_case_to_snake(camel_str: str) -> str:
@@ -18,7 +18,9 @@ DOCTOR_OPTION_FIELD = ['address', 'phone', 'description']
 PATIENT_BASEFIELD = ['user', 'doctor', 'birth', 'age'] + COMMON_ACCOUNT_BASEFIELD
 PATIENT_OPTION_FIELD = ['address', 'phone', 'emergency_call']
 
-PRESCRIPTION_BASEFIELD = ['id', 'writer', 'patient', 'status', 'checked', 'created_at']
+# 진행 상황(prescriptions.checks에서 갱신되는 read only field)
+PRESCRIPTION_PROGRESS_FIELD = ['total_days', 'uploaded_days', 'checked_days', 'last_uploaded_at']
+PRESCRIPTION_BASEFIELD = ['id', 'writer', 'patient', 'status', 'checked', 'created_at'] + PRESCRIPTION_PROGRESS_FIELD
 PRESCRIPTION_OPTION_FIELD = COMMON_PRESCRIPTION_FIELD + ['start_date', 'end_date']
 
 FILEPRESCRIPTION_BASEFIELD = ['id', 'prescription', 'uploaded', 'checked', 'date', 'status', 'created_at']
@@ -46,6 +46,7 @@ class PatientWithPrescriptionSerializer(PatientDetailSerializer):
     class Meta:
         model = Patient
         fields = PatientFields.detail_field + ['prescriptions']
+        annotations = ['age']
 
 
 # 2: 소견서에 연결된 중계 모델(FilePrescription)에 업로드된 환자의 파일 정보
@@ -3,9 +3,11 @@ from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.generics import RetrieveAPIView, ListAPIView
 
+from accounts.api.mixins import AnnotationQuerySetMixin, get_serializer_annotations
 from accounts.api.permissions import IsDoctor, IsOwner, CareDoctorReadOnly
 from accounts.models import Doctor, Patient
 from core import docs
+from core.api.core_serializers import CorePatientListSerializer
 from core.api.serializers import (DoctorWithPatientSerializer,
                                   PatientWithPrescriptionSerializer,
                                   PrescriptionNestedFilePrescriptionSerializer,
@@ -23,7 +25,9 @@ from prescriptions.models import Prescription, FilePrescription
 
 # doctor - main
 class DoctorWithPatients(RetrieveAPIView):
-    queryset = Doctor.objects.select_all()
+    queryset = Doctor.objects.select_all().prefetch_related(
+        Prefetch('patients',
+                 queryset=Patient.objects.with_annotations(*get_serializer_annotations(CorePatientListSerializer))))
     permission_classes = [IsOwner]
     serializer_class = DoctorWithPatientSerializer
     lookup_field = 'pk'
@@ -33,7 +37,7 @@ class DoctorWithPatients(RetrieveAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class PatientWithPrescriptions(RetrieveAPIView):
+class PatientWithPrescriptions(AnnotationQuerySetMixin, RetrieveAPIView):
     queryset = Patient.objects.select_all().prefetch_prescription_with_writer()
     permission_classes = [CareDoctorReadOnly]
     serializer_class = PatientWithPrescriptionSerializer
@@ -79,6 +83,8 @@ class UploadedPatientFileHistory(HistoryMixin, ListAPIView):
     queryset = FilePrescription.objects.nested_all().filter_new_uploaded_file()
     permission_classes = [IsDoctor]
     serializer_class = UploadedPatientFileHistorySerializer
+    keyset_ordering = ('-date', '-id')  # pagination=cursor(FasterPagination)
+    keyset_fields = ('date', 'created_at')
 
     @swagger_auto_schema(**docs.uploaded_patient_file_history)
     def get(self, request, *args, **kwargs):
@@ -89,6 +95,8 @@ class ExpiredFilePrescriptionHistory(HistoryMixin, ListAPIView):
     queryset = FilePrescription.objects.nested_all().filter_upload_date_expired()
     permission_classes = [IsDoctor]
     serializer_class = ExpiredFilePrescriptionHistorySerializer
+    keyset_ordering = ('-date', '-id')  # pagination=cursor(FasterPagination)
+    keyset_fields = ('date', 'created_at')
 
     @swagger_auto_schema(**docs.expired_file_prescription_history)
     def get(self, request, *args, **kwargs):
@@ -96,7 +104,7 @@ class ExpiredFilePrescriptionHistory(HistoryMixin, ListAPIView):
 
 
 # todo: 아래 환자 부분 문서 -> docs로 변환
-class PatientWithDoctor(RetrieveAPIView):  # 환자 첫 페이지 - 담당 의사 정보 포함
+class PatientWithDoctor(AnnotationQuerySetMixin, RetrieveAPIView):  # 환자 첫 페이지 - 담당 의사 정보 포함
     """
     [DETAIL][Patient] 담당 의사 정보를 환자의 정보 페이지
 
@@ -192,7 +200,7 @@ class FilePrescriptionDetailForPatient(RetrieveAPIView):
     lookup_field = 'pk'
 
 
-class PatientMain(RetrieveAPIView):
+class PatientMain(AnnotationQuerySetMixin, RetrieveAPIView):
     """
     [DETAIL][Patient] 환자용 메인 페이지
 
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from config.utils.query_plans import check_query_plans, query_plan_registry
+
+
+class Command(BaseCommand):
+    help = '등록된 hot query(app/query_plans.py)의 EXPLAIN 검사 - full table scan이 있으면 실패'
+
+    def handle(self, *args, **options):
+        full_scans = check_query_plans()
+        for full_scan in full_scans:
+            self.stderr.write(f'{full_scan.query}: full scan on {full_scan.table}')
+        if full_scans:
+            raise CommandError(f'{len(full_scans)} full table scan(s) in registered queries')
+        self.stdout.write(self.style.SUCCESS(f'query plans: {len(query_plan_registry)} checked'))
@@ -2,6 +2,7 @@ from typing import Type, Union, TYPE_CHECKING
 
 from django.contrib.auth import get_user_model
 from django.db.models import QuerySet
+from django.utils.timezone import now
 
 from files.api.utils import delete_file
 
@@ -24,7 +25,7 @@ class CommonUploaderCheckMixin:
 class CommonFileQuerysetMixin:
     def shallow_delete(self) -> str:
         obj_name_list = [str(obj_name) for obj_name in self]
-        self.update(deleted=True)
+        self.update(deleted=True, deleted_at=now())
         return f'finish shallow delete [{obj_name_list}]'
 
     def hard_delete(self) -> str:
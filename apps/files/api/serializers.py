@@ -1,13 +1,16 @@
-from typing import Optional, Type, Union, TYPE_CHECKING
+from typing import Optional, Type, Union, TYPE_CHECKING, Dict, Any
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.fields import CurrentUserDefault
 
 from files.temp_models import TempHospitalFiles
 from files.models import DoctorFile, PatientFile
 
+from prescriptions.api.serializers.fields import ScheduleRelatedPrescriptionField
 from prescriptions.models import Prescription, FilePrescription, PrescriptionQuerySet, FilePrescriptionQuerySet
+from prescriptions.schedules import materialize_file_prescription
 
 if TYPE_CHECKING:
     from django.db.models import QuerySet
@@ -189,11 +192,37 @@ class PatientFlieUpdateSerializer(PatientFileSerializer):
 
 class PatientFileUploadSerializer(PatientFileSerializer):
     uploader = serializers.HiddenField(default=CurrentUserDefault())
-    file_prescription = CurrentUserPrimaryKeyRelatedField(queryset=FilePrescription.objects.select_all(), required=True)
+    file_prescription = CurrentUserPrimaryKeyRelatedField(queryset=FilePrescription.objects.select_all(),
+                                                          required=False)
+    # lazy schedule 소견서: file_prescription 대신 소견서와 날짜로 업로드(해당 날짜의 FilePrescription 생성)
+    prescription = ScheduleRelatedPrescriptionField(required=False, write_only=True)
+    date = serializers.DateField(required=False, write_only=True)
     file = serializers.FileField(use_url=False)
 
     class Meta(PatientFileSerializer.Meta):
-        fields = PatientFileSerializer.Meta.fields + ['file']
+        fields = PatientFileSerializer.Meta.fields + ['file', 'prescription', 'date']
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        if attrs.get('file_prescription'):
+            attrs.pop('prescription', None), attrs.pop('date', None)
+            return attrs
+        prescription, date = attrs.get('prescription'), attrs.get('date')
+        if not prescription or not date:
+            raise serializers.ValidationError({'file_prescription': 'file_prescription or (prescription, date) '
+                                                                    'is required'})
+        if prescription.patient_id != attrs['uploader'].id:
+            raise serializers.ValidationError({'prescription': 'invalid prescription'})
+        if not prescription.start_date <= date <= prescription.end_date:
+            raise serializers.ValidationError({'date': f'{date} is not in the prescription schedule'})
+        return attrs
+
+    def create(self, validated_data: Dict[str, Any]) -> PatientFile:
+        # lazy schedule: 해당 날짜의 FilePrescription 생성과 파일 저장을 같은 transaction에서 처리
+        prescription, date = validated_data.pop('prescription', None), validated_data.pop('date', None)
+        with transaction.atomic():
+            if prescription is not None:
+                validated_data['file_prescription'] = materialize_file_prescription(prescription.id, date)
+            return super().create(validated_data)
 
 
 class PatientFileDownloadSerializer(PatientFileSerializer):
@@ -6,6 +6,7 @@ from django.db import models
 from django.db.models import F
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils.timezone import now
 
 from files.api.mixins import CommonFileQuerysetMixin
 from files.api.utils import delete_file, concatenate_name, directory_path
@@ -21,6 +22,7 @@ class BaseFile(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     file = models.FileField(upload_to=directory_path, null=True)
     deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)  # 보관(archives) 기준 시간
 
     class Meta:
         abstract = True
@@ -29,13 +31,12 @@ class BaseFile(models.Model):
         return str(self.file)
 
     def is_uploader(self, user: User) -> bool:
-        if self.uploader.email == str(user.email):
-            return True
-        return False
+        return self.uploader_id == user.id  # uploader 조회 없이 비교
 
     def shallow_delete(self) -> str:
         obj_name = str(self)
         self.deleted = True
+        self.deleted_at = now()
         self.save()
         return f'shallow delete [{obj_name}]'
 
@@ -94,6 +95,11 @@ class DoctorFile(BaseFile):
     objects = DoctorFileManager()
     origin_objects = OriginDoctorFileManager()
 
+    class Meta:
+        # 삭제되지 않은 소견서/업로더 별 파일 목록: owner + deleted=False + -created_at
+        indexes = [models.Index(fields=['prescription', 'deleted', 'created_at']),
+                   models.Index(fields=['uploader', 'deleted', 'created_at'])]
+
 
 class PatientFileQuerySet(CommonFileQuerysetMixin, models.QuerySet):
     def filter_unchecked_list(self) -> 'PatientFileQuerySet':
@@ -145,12 +151,18 @@ class PatientFile(BaseFile):
     objects = PatientFileManager()
     original_objects = OriginalPatientFileManager()
 
+    class Meta:
+        # 삭제되지 않은 FilePrescription/업로더 별 파일 목록: owner + deleted=False + -created_at
+        indexes = [models.Index(fields=['file_prescription', 'deleted', 'created_at']),
+                   models.Index(fields=['uploader', 'deleted', 'created_at'])]
+
 
 @receiver(post_save, sender=PatientFile)
 def post_save_patient_file(sender, **kwargs: Dict[str, Any]):
     instance = kwargs['instance']
     file_prescription = instance.file_prescription
-    if not file_prescription.uploaded:
+    if file_prescription and not file_prescription.uploaded:
         file_prescription.uploaded = True
         file_prescription.checked = False  # 환자가 파일을 업로드한 시점은 의사가 확인을 하지 않은 상태
-        file_prescription.save()
+        # Prescription.checked는 commit 이후 일괄 반영(prescriptions.checks)
+        file_prescription.save(update_fields=['uploaded', 'checked', 'updated_at'])
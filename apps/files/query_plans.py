@@ -0,0 +1,24 @@
+from config.utils.query_plans import register_query_plan
+from files.models import DoctorFile, PatientFile
+
+# config.utils.query_plans: check_query_plans command에서 EXPLAIN 검사(id는 임의 값)
+
+
+@register_query_plan('doctor_files.prescription_list')
+def prescription_doctor_files():
+    return DoctorFile.objects.filter_not_deleted().filter(prescription_id=1)
+
+
+@register_query_plan('doctor_files.uploader_list')
+def uploader_doctor_files():
+    return DoctorFile.objects.filter_not_deleted().filter(uploader_id=1)
+
+
+@register_query_plan('patient_files.file_prescription_list')
+def file_prescription_patient_files():
+    return PatientFile.objects.filter_not_deleted().filter(file_prescription_id=1)
+
+
+@register_query_plan('patient_files.uploader_list')
+def uploader_patient_files():
+    return PatientFile.objects.filter_not_deleted().filter_uploader(1)
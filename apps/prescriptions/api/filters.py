@@ -1,9 +1,18 @@
-from typing import Optional
+import datetime
+import operator
+from typing import Optional, List, Any, Iterable, Tuple
 
-from django_filters.rest_framework import FilterSet, NumberFilter, DateFilter, CharFilter, BooleanFilter, ChoiceFilter, \
-    OrderingFilter, LookupChoiceFilter
+from django.db.models import QuerySet
+from django_filters import Filter
+from django_filters.constants import EMPTY_VALUES
+from django_filters.fields import Lookup
+from django_filters.rest_framework import FilterSet, NumberFilter, DateFilter, BooleanFilter, ChoiceFilter, \
+    OrderingFilter, LookupChoiceFilter, CharFilter
 
+from accounts.api.filters import NameLookupChoiceFilter
+from config.utils.utils import normalize_name
 from prescriptions.models import Prescription, HealthStatus, FilePrescription
+from prescriptions.search import prescription_search
 
 
 class DateLookupChoiceFilter(LookupChoiceFilter):
@@ -12,12 +21,64 @@ class DateLookupChoiceFilter(LookupChoiceFilter):
         super().__init__(self.field_name, lookup_choices, field_class, **kwargs)
 
 
+VIRTUAL_LOOKUPS = {
+    'exact': operator.eq,
+    'gte': operator.ge,
+    'lte': operator.le,
+    'startswith': lambda value, target: value.startswith(target),
+    'contains': lambda value, target: target in value,
+}
+
+
+class VirtualScheduleFilterMixin:
+    """
+    가상 일정(lazy schedule, prescriptions.schedules)에 filter 조건 적용(python)
+    - filter 이름과 같은 속성 값으로 비교(DateLookupChoiceFilter: date 비교, NameLookupChoiceFilter: full_name 비교)
+    - date: 가상 일정 생성 범위(get_date_range)로 적용
+    """
+
+    def filter_virtual(self, objects: List[Any], exclude: Iterable[str] = ()) -> List[Any]:
+        if not self.is_valid():
+            return []
+        for name, value in self.form.cleaned_data.items():
+            if value in EMPTY_VALUES or isinstance(self.filters[name], OrderingFilter) or name in exclude:
+                continue
+            objects = [obj for obj in objects if self.match_virtual(self.filters[name], name, obj, value)]
+        return objects
+
+    def match_virtual(self, filter_: Filter, name: str, obj: Any, value: Any) -> bool:
+        target = getattr(obj, name, None)
+        if not isinstance(value, Lookup):
+            return target == value
+
+        expected = value.value
+        if isinstance(filter_, NameLookupChoiceFilter):
+            target, expected = target or '', normalize_name(expected)
+        elif isinstance(filter_, DateLookupChoiceFilter) and isinstance(target, datetime.datetime):
+            target = target.date()
+        return target is not None and VIRTUAL_LOOKUPS[value.lookup_expr](target, expected)
+
+    def get_date_range(self, name: str = 'date') -> Tuple[Optional[datetime.date], Optional[datetime.date]]:
+        # date filter(exact, gte, lte) -> (date_from, date_to)
+        value = self.form.cleaned_data.get(name) if self.is_valid() else None
+        if not isinstance(value, Lookup) or value.value in EMPTY_VALUES:
+            return None, None
+        date_from = value.value if value.lookup_expr in ('exact', 'gte') else None
+        date_to = value.value if value.lookup_expr in ('exact', 'lte') else None
+        return date_from, date_to
+
+    def get_ordering(self) -> List[str]:
+        ordering = self.form.cleaned_data.get('ordering') if self.is_valid() else None
+        return list(ordering or self.queryset.model._meta.ordering)
+
+
 class PrescriptionFilter(FilterSet):
     writer_id = NumberFilter(field_name='writer', label='작성자(의사) 계정의 pk')
-    writer_name = CharFilter(field_name='writer_name', label='작성자(의사)의 이름')
+    writer_name = NameLookupChoiceFilter(prefix='writer__', user_type='doctor', label='작성자(의사)의 이름')
     patient_id = NumberFilter(field_name='patient', label='소견서의 대상이 되는 환자 계정의 pk')
-    patient_name = CharFilter(field_name='patient_name', label='환자의 이름')
+    patient_name = NameLookupChoiceFilter(prefix='patient__', user_type='patient', label='환자의 이름')
     status = ChoiceFilter(choices=HealthStatus.choices)
+    search = CharFilter(method='filter_search', label='소견서 내용 검색(관련도 순 정렬)')
     ordering = OrderingFilter(
         fields={
             'created_at': 'created_at',
@@ -55,15 +116,21 @@ class PrescriptionFilter(FilterSet):
     class Meta:
         model = Prescription
         fields = ['writer_id', 'writer_name', 'patient_id', 'patient_name', 'start_date', 'end_date', 'created_at',
-                  'checked', 'status', 'ordering']
+                  'checked', 'status', 'search', 'ordering']
+
+    def filter_search(self, queryset: QuerySet, name: str, value: str) -> QuerySet:
+        # search_rank 순 정렬(ordering 지정 시 OrderingFilter가 덮어씀)
+        return prescription_search.search(queryset, value).order_by('-search_rank', '-created_at')
 
 
-class FilePrescriptionFilter(FilterSet):
+class FilePrescriptionFilter(VirtualScheduleFilterMixin, FilterSet):
     prescription_id = NumberFilter(field_name='prescription_id', label='소견서 객체의 pk')
     writer_id = NumberFilter(label='작성자(의사) 계정의 id')
-    writer_name = CharFilter(label='작성자(의사)의 이름')
+    writer_name = NameLookupChoiceFilter(prefix='prescription__writer__', user_type='doctor',
+                                         label='작성자(의사)의 이름')
     patient_id = NumberFilter(label='환자 계정의 id')
-    patient_name = CharFilter(label='환자의 이름')
+    patient_name = NameLookupChoiceFilter(prefix='prescription__patient__', user_type='patient',
+                                          label='환자의 이름')
     status = ChoiceFilter(field_name='status', choices=HealthStatus.choices)
     created_at = DateLookupChoiceFilter(
         field_class=DateFilter.field_class,
@@ -0,0 +1,17 @@
+from typing import TYPE_CHECKING
+
+from django.db.models import Q
+from rest_framework import serializers
+
+from prescriptions.models import Prescription
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+
+
+class ScheduleRelatedPrescriptionField(serializers.PrimaryKeyRelatedField):
+    # 요청한 의사(작성자) 또는 환자의 lazy schedule 소견서
+    def get_queryset(self) -> 'QuerySet':
+        user = self.context['request'].user
+        queryset = Prescription.origin_objects.filter(lazy_schedule=True, deleted=False)
+        return queryset.filter(Q(writer_id=user.id) | Q(patient_id=user.id))
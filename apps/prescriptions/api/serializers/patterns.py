@@ -1,13 +1,19 @@
 import datetime
+import uuid
 from abc import ABCMeta, abstractmethod
-from typing import TYPE_CHECKING, Any, Dict, NoReturn, List, Optional, Type
+from typing import TYPE_CHECKING, Any, Dict, NoReturn, List, Optional, Set, Type
 
+from django.conf import settings
 from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
 from rest_framework.exceptions import AuthenticationFailed, ValidationError
 
 from accounts.models import Doctor
 from files.models import DoctorFile
+from prescriptions.checks import check_state
 from prescriptions.models import Prescription, FilePrescription
+from prescriptions.schedules import schedule_days
 
 if TYPE_CHECKING:
     from django.core.files.uploadedfile import UploadedFile
@@ -17,7 +23,7 @@ if TYPE_CHECKING:
 
 PRESCRIPTION_ATTRS = ['writer']  # pop
 FILEPRESCRIPTION_ATTRS = ['start_date', 'end_date']  # get
-DOCTORFILE_ATTRS = ['doctor_upload_files']  # pop
+DOCTORFILE_ATTRS = ['doctor_upload_files', 'retained_doctor_files']  # pop
 
 
 class PrescriptionDirector:
@@ -83,6 +89,7 @@ class FileBuilder(BuilderInterface):
     def __init__(self, director):
         self.director: PrescriptionDirector = director
         self.doctor_upload_files: Optional[Type[UploadedFile]] = None
+        self.retained_doctor_files: Optional[List[uuid.UUID]] = None  # 수정 시 유지할 DoctorFile id
         self.is_update: bool = False
         self.status: bool = False
 
@@ -96,7 +103,7 @@ class FileBuilder(BuilderInterface):
         self.is_update = director.is_update
 
     def validate_builder(self) -> NoReturn:
-        if self.doctor_upload_files:
+        if self.doctor_upload_files or (self.is_update and self.retained_doctor_files is not None):
             self.status = True
         else:
             self.status = False
@@ -104,10 +111,15 @@ class FileBuilder(BuilderInterface):
     def execute(self) -> NoReturn:
         if self.is_update:
             self.delete_old_instance_for_update()
-        self.create_doctor_files(self.doctor_upload_files, self.director.prescription)
+        if self.doctor_upload_files:
+            self.create_doctor_files(self.doctor_upload_files, self.director.prescription)
 
     def delete_old_instance_for_update(self) -> NoReturn:
-        self.director.prescription.doctor_files.update(deleted=True)
+        # retained_doctor_files를 지정한 경우 해당 파일은 유지(지정하지 않은 경우 기존 파일 모두 교체)
+        doctor_files = self.director.prescription.doctor_files.filter(deleted=False)
+        if self.retained_doctor_files:
+            doctor_files = doctor_files.exclude(id__in=self.retained_doctor_files)
+        doctor_files.update(deleted=True, deleted_at=now())
 
     def create_doctor_files(self, upload_files: 'InMemoryUploadedFile', instance: Prescription) -> NoReturn:
         bulk_list = []
@@ -160,10 +172,19 @@ class PrescriptionBuilder(BuilderInterface):
 
 
 class FilePrescriptionBuilder(BuilderInterface):
+    """
+    FilePrescription(파일 업로드 일정) 생성 및 수정
+    - 수정: 기존 범위와 새 범위의 차이만 반영(범위 밖 날짜 삭제, 추가된 날짜 생성, 유지되는 날짜의 업로드 정보 보존)
+    - lazy schedule(Prescription.lazy_schedule): 추가된 날짜를 생성하지 않음(prescriptions.schedules)
+    """
+
     def __init__(self, director):
         self.director: PrescriptionDirector = director
         self.start_date: datetime = None
         self.end_date: datetime = None
+        # 수정 전 범위(PrescriptionBuilder가 먼저 실행되므로 초기화 시점에 저장)
+        self.old_start_date: Optional[datetime.date] = None
+        self.old_end_date: Optional[datetime.date] = None
         self.is_update: bool = False
         self.status: bool = False
         self.initialize_attributes()
@@ -174,6 +195,9 @@ class FilePrescriptionBuilder(BuilderInterface):
         for attr in FILEPRESCRIPTION_ATTRS:
             setattr(self, attr, director.validated_data.get(attr, None))
         self.is_update = director.is_update
+        if self.is_update:
+            self.old_start_date = director.prescription.start_date
+            self.old_end_date = director.prescription.end_date
 
     def validate_builder(self) -> NoReturn:
         try:
@@ -183,30 +207,50 @@ class FilePrescriptionBuilder(BuilderInterface):
             self.status = False
 
     def execute(self) -> NoReturn:
+        prescription = self.director.prescription
         if self.is_update:
-            self.delete_old_instance_for_update()
-        self.create_file_prescriptions(self.director.prescription.id, self.start_date, self.end_date)
+            self.update_file_prescriptions(prescription)
+            return
 
-    def delete_old_instance_for_update(self) -> NoReturn:
-        file_prescription_list = []
-        file_prescriptions = self.director.prescription.file_prescriptions.all()
-
-        for file_prescription in file_prescriptions:
-            file_prescription.deleted = True
-            file_prescription_list.append(file_prescription)
-
-        file_prescriptions.bulk_update(file_prescription_list, ['deleted'])
-
-    def create_file_prescriptions(self, prescription_id: int, start_date: datetime, end_date: datetime) -> NoReturn:
-        bulk_list = (
-            FilePrescription(
-                prescription_id=prescription_id,
-                day_number=day_number + 1,
-                date=start_date + datetime.timedelta(days=day_number))
-            for day_number in range((end_date - start_date).days + 1))
-        _ = FilePrescription.objects.bulk_create(bulk_list)
-        self.apply_check_to_prescription()
+        prescription.lazy_schedule = getattr(settings, 'PRESCRIPTION_LAZY_SCHEDULE', False)
+        if prescription.lazy_schedule:  # 가상 일정(row 생성 x) - prescriptions.schedules
+            prescription.save(update_fields=['lazy_schedule'])
+            self.apply_check_to_prescription()
+        else:
+            self.create_file_prescriptions(prescription.id, self.start_date, self.end_date)
+
+    def update_file_prescriptions(self, prescription: Prescription) -> NoReturn:
+        if (self.old_start_date, self.old_end_date) == (self.start_date, self.end_date):
+            return
+
+        self.apply_check_to_prescription()  # 범위 변경: checked 및 진행 상황(total_days 등) 재계산
+        file_prescriptions = FilePrescription.origin_objects.filter(prescription_id=prescription.id, deleted=False)
+        # 삭제: 새 범위 밖의 날짜(UPDATE 1회)
+        file_prescriptions.exclude(date__range=(self.start_date, self.end_date)). \
+            update(deleted=True, deleted_at=now())
+        retained = file_prescriptions.filter(date__range=(self.start_date, self.end_date))
+        # 유지: 시작일이 변경된 경우 day_number만 이동(UPDATE 1회)
+        shift = (self.old_start_date - self.start_date).days if self.old_start_date else 0
+        if shift:
+            retained.update(day_number=F('day_number') + shift)
+        if prescription.lazy_schedule:
+            return
+
+        # 추가: 기존 row가 없는 날짜만 생성
+        existing_dates = set(retained.values_list('date', flat=True))
+        self.create_file_prescriptions(prescription.id, self.start_date, self.end_date, exclude=existing_dates)
+
+    def create_file_prescriptions(self, prescription_id: int, start_date: datetime, end_date: datetime,
+                                  exclude: Optional[Set[datetime.date]] = None) -> NoReturn:
+        exclude = exclude or set()
+        bulk_list = [
+            FilePrescription(prescription_id=prescription_id, day_number=day_number, date=date)
+            for day_number, date in schedule_days(start_date, end_date) if date not in exclude
+        ]
+        if bulk_list:
+            _ = FilePrescription.objects.bulk_create(bulk_list)
+            self.apply_check_to_prescription()
 
     def apply_check_to_prescription(self):
-        self.director.prescription.checked = False
-        self.director.prescription.save()
+        # 일괄 생성/삭제는 signal이 실행되지 않으므로 직접 수집(commit 이후 checked 갱신)
+        check_state.mark(self.director.prescription.id)
@@ -1,5 +1,8 @@
-from typing import Type, Optional, TYPE_CHECKING, Any, Dict
+from typing import Type, Optional, TYPE_CHECKING, Any, Dict, Set
 
+from django.utils.timezone import now
+from django_filters.constants import EMPTY_VALUES
+from django_filters.rest_framework import LookupChoiceFilter, OrderingFilter
 from rest_framework import serializers
 from rest_framework.fields import CurrentUserDefault
 
@@ -9,11 +12,17 @@ from files.api.serializers import DoctorFileInPrescriptionSerializer
 from files.models import DoctorFile
 from prescriptions.api.serializers.patterns import (PrescriptionDirector, PrescriptionBuilder, FilePrescriptionBuilder,
                                                     FileBuilder)
-from prescriptions.models import Prescription, FilePrescription
+from prescriptions.api.filters import FilePrescriptionFilter
+from prescriptions.api.serializers.fields import ScheduleRelatedPrescriptionField
+from prescriptions.checks import check_state
+from prescriptions.models import Prescription, FilePrescription, HealthStatus
+from prescriptions.schedules import materialize_file_prescription
 
 if TYPE_CHECKING:
     from django.db.models import QuerySet
 
+BULK_UPDATE_FIELDS = ('checked', 'status')  # FilePrescriptionBulkUpdateSerializer
+
 
 class PrescriptionModelSerializer(serializers.ModelSerializer):
     url = serializers.HyperlinkedIdentityField(
@@ -92,7 +101,12 @@ class PrescriptionDetailSerializer(PrescriptionModelSerializer):
         ret = super().get_fields()
         request = self.context['request']
         if request.user.is_authenticated:
-            if request.user.user_type.patient or request.user.groups.filter(name='patient').exists():
+            user_type = request.user.user_type
+            if user_type is not None:
+                is_patient = user_type.patient
+            else:
+                is_patient = request.user.groups.filter(name='patient').exists()
+            if is_patient:
                 ret.pop('url')
         return ret
 
@@ -101,11 +115,13 @@ class PrescriptionUpdateSerializer(UpdateSupporterSerailzier):
     writer = serializers.HiddenField(default=CurrentUserDefault())
     doctor_files = serializers.SerializerMethodField()
     doctor_upload_files = serializers.ListField(child=serializers.FileField(), write_only=True)
+    # 지정한 경우 목록의 파일은 유지하고 나머지만 삭제(지정하지 않은 경우 업로드한 파일로 모두 교체)
+    retained_doctor_files = serializers.ListField(child=serializers.UUIDField(), write_only=True, required=False)
 
     class Meta:
         model = Prescription
-        fields = ['url', 'writer', 'status', 'description', 'doctor_upload_files', 'doctor_files',
-                  'start_date', 'end_date', 'checked']
+        fields = ['url', 'writer', 'status', 'description', 'doctor_upload_files', 'retained_doctor_files',
+                  'doctor_files', 'start_date', 'end_date', 'checked']
 
     def get_doctor_files(self, instance):
         doctor_files = DoctorFile.objects.filter(prescription_id=instance.id).filter_not_deleted()
@@ -170,6 +186,80 @@ class FilePrescriptionCreateSerializer(FilePrescriptionModelSerializer):
         fields = ['url', 'prescription', 'description', 'status', 'date', 'day_number', 'checked']
 
 
+class FilePrescriptionBulkUpdateSerializer(serializers.Serializer):
+    # 대상: ids 또는 filters(FilePrescriptionFilter 조건) - 요청한 의사가 작성한 소견서의 FilePrescription만 수정
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    filters = serializers.DictField(required=False, allow_empty=False)
+    checked = serializers.BooleanField(required=False)
+    status = serializers.ChoiceField(choices=HealthStatus.choices, required=False)
+
+    def validate_filters(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        # 알 수 없는 key(오타)는 무시되어 전체가 수정되므로 거부, 정렬(ordering)은 사용하지 않음
+        if 'ordering' in filters:
+            raise serializers.ValidationError("'ordering' is not allowed")
+        unknown = sorted(set(filters) - self.get_filter_keys())
+        if unknown:
+            raise serializers.ValidationError(f'unknown filters: {unknown}')
+        filterset = FilePrescriptionFilter(data=filters, queryset=FilePrescription.objects.none())
+        if not filterset.is_valid():
+            raise serializers.ValidationError(filterset.errors)
+        if all(value in EMPTY_VALUES for value in filterset.form.cleaned_data.values()):
+            raise serializers.ValidationError('at least one filter condition is required')
+        return filters
+
+    @staticmethod
+    def get_filter_keys() -> Set[str]:
+        # LookupChoiceFilter: <name>, <name>_lookup
+        keys = set()
+        for name, filter_ in FilePrescriptionFilter.base_filters.items():
+            if isinstance(filter_, OrderingFilter):
+                continue
+            keys.add(name)
+            if isinstance(filter_, LookupChoiceFilter):
+                keys.add(f'{name}_lookup')
+        return keys
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        if 'ids' not in attrs and 'filters' not in attrs:
+            raise serializers.ValidationError("'ids' or 'filters' is required")
+        if not any(field in attrs for field in BULK_UPDATE_FIELDS):
+            raise serializers.ValidationError(f"at least one of {BULK_UPDATE_FIELDS} is required")
+        return attrs
+
+    def get_queryset(self) -> 'QuerySet':
+        user = self.context['request'].user
+        queryset = FilePrescription.objects.filter_prescription_writer(user.id)
+        if 'filters' in self.validated_data:
+            filterset = FilePrescriptionFilter(data=self.validated_data['filters'], queryset=queryset)
+            if not filterset.is_valid():
+                raise serializers.ValidationError({'filters': filterset.errors})
+            queryset = filterset.qs
+        if 'ids' in self.validated_data:
+            queryset = queryset.filter(id__in=self.validated_data['ids'])
+        return queryset
+
+    def save(self, **kwargs) -> Dict[str, Any]:
+        # 대상 조회 1회 + UPDATE 1회, Prescription.checked 및 진행 상황은 commit 이후 소견서 별 1회 갱신
+        rows = list(self.get_queryset().order_by().values_list('id', 'prescription_id'))
+        values = {field: self.validated_data[field] for field in BULK_UPDATE_FIELDS if field in self.validated_data}
+        updated = 0
+        if rows:
+            updated = FilePrescription.origin_objects.filter(id__in=[row_id for row_id, _ in rows]). \
+                update(updated_at=now(), **values)
+        prescription_ids = sorted({prescription_id for _, prescription_id in rows})
+        if 'checked' in values:
+            check_state.mark(*prescription_ids)
+        return {'updated': updated, 'prescriptions': prescription_ids}
+
+
+class FilePrescriptionMaterializeSerializer(serializers.Serializer):
+    prescription = ScheduleRelatedPrescriptionField()
+    date = serializers.DateField()
+
+    def create(self, validated_data: Dict[str, Any]) -> FilePrescription:
+        return materialize_file_prescription(validated_data['prescription'].id, validated_data['date'])
+
+
 class FilePrescriptionChoiceSerializer(serializers.ModelSerializer):
     writer_id = serializers.SerializerMethodField()
     writer_name = serializers.SerializerMethodField()
@@ -15,6 +15,10 @@ urlpatterns = [
          name='file-prescription-list'),
     path('file-prescriptions/create', views.FilePrescriptionCreateAPIView.as_view(),
          name='file-prescription-list'),
+    path('file-prescriptions/materialize', views.FilePrescriptionMaterializeAPIView.as_view(),
+         name='file-prescription-materialize'),
+    path('file-prescriptions/bulk-update', views.FilePrescriptionBulkUpdateAPIView.as_view(),
+         name='file-prescription-bulk-update'),
     path('file-prescriptions/<int:pk>', views.FilePrescriptionRetrieveAPIView.as_view(),
          name='file-prescription-detail'),
     path('file-prescriptions/<int:pk>/update', views.FilePrescriptionUpdateAPIView.as_view(),
@@ -1,11 +1,13 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Dict, Union
 
 from django.contrib.auth import get_user_model
-from django.db.models import F, QuerySet
-from django.db.models.functions import Concat
+from django.db.models import QuerySet
+from django_filters.constants import EMPTY_VALUES
 from rest_framework.generics import ListAPIView
 
 if TYPE_CHECKING:
+    from prescriptions.schedules import MergedSchedule
+
     User = get_user_model()
 
 
@@ -42,6 +44,53 @@ class CommonListAPIView(ListAPIView):
         return target_field
 
 
-def concatenate_name(target_field: str) -> Concat:
-    full_name = Concat(F(f'{target_field}__last_name'), F(f'{target_field}__first_name'))
-    return full_name
+class VirtualScheduleMixin:
+    """
+    FilePrescription list에 lazy schedule 소견서의 가상 일정(prescriptions.schedules)을 병합
+    - lazy schedule 소견서가 없는 경우: 기존 queryset(DB pagination)
+    - 있는 경우: materialize된 row와 가상 일정을 ordering 순으로 병합한 MergedSchedule(offset pagination,
+      page 범위까지의 row만 조회)
+    - filter_class(VirtualScheduleFilterMixin)의 조건은 가상 일정에도 동일하게 적용
+      (date 외의 조건은 소견서 단위로 적용, date는 가상 일정 생성 범위로 적용)
+    """
+
+    def filter_queryset(self, queryset: QuerySet) -> Union[QuerySet, 'MergedSchedule']:
+        from prescriptions.models import Prescription
+        from prescriptions.schedules import VirtualSchedule, build_virtual_file_prescription, merge_virtual_schedule
+
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset
+
+        prescriptions = Prescription.objects.filter(lazy_schedule=True, deleted=False)
+        prescriptions = self.filter_currentuser(prescriptions, self.request.user)
+        filterset = self.get_virtual_filterset(queryset)
+        if filterset is not None and filterset.is_valid():
+            prescriptions = prescriptions.filter(**self.get_prescription_lookups(filterset.form.cleaned_data))
+        prescriptions = list(prescriptions.only('id', 'writer_id', 'patient_id', 'start_date', 'end_date',
+                                                'created_at'))
+        if not prescriptions:
+            return queryset
+
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        date_from = date_to = None
+        if filterset is not None:
+            # date 외의 조건은 소견서 안의 모든 날짜에 동일(소견서 별 첫 날짜로 판단)
+            prescriptions = [prescription for prescription in prescriptions if filterset.filter_virtual(
+                [build_virtual_file_prescription(prescription, 1, prescription.start_date)], exclude=('date',))]
+            ordering = filterset.get_ordering()
+            date_from, date_to = filterset.get_date_range()
+        virtual = VirtualSchedule(prescriptions, ordering, date_from, date_to)
+        return merge_virtual_schedule(queryset, virtual, ordering)
+
+    def get_virtual_filterset(self, queryset: QuerySet):
+        filterset_class = getattr(self, 'filter_class', None)
+        if filterset_class is None:
+            return None
+        return filterset_class(self.request.query_params, queryset=queryset, request=self.request)
+
+    def get_prescription_lookups(self, cleaned_data: Dict[str, Any]) -> Dict[str, Any]:
+        # 소견서 단위 조건은 SQL로 먼저 적용
+        fields = {'prescription_id': 'id', 'writer_id': 'writer_id', 'patient_id': 'patient_id'}
+        return {field: cleaned_data[name] for name, field in fields.items()
+                if cleaned_data.get(name) not in EMPTY_VALUES}
@@ -1,5 +1,7 @@
 from drf_yasg.utils import swagger_auto_schema
-from rest_framework.generics import RetrieveAPIView, CreateAPIView, UpdateAPIView
+from rest_framework import status
+from rest_framework.generics import RetrieveAPIView, CreateAPIView, UpdateAPIView, GenericAPIView
+from rest_framework.response import Response
 
 from accounts.api.permissions import IsDoctor, IsOwner, RelatedPatientReadOnly, IsPatient, PatientReadOnly
 from prescriptions import docs
@@ -14,8 +16,10 @@ from prescriptions.api.serializers.serializers import (PrescriptionCreateSeriali
                                                        PrescriptionUpdateSerializer,
                                                        PrescriptionChoiceSerializer,
                                                        FilePrescriptionChoiceSerializer,
+                                                       FilePrescriptionMaterializeSerializer,
+                                                       FilePrescriptionBulkUpdateSerializer,
                                                        )
-from prescriptions.api.utils import CommonListAPIView
+from prescriptions.api.utils import CommonListAPIView, VirtualScheduleMixin
 from prescriptions.models import Prescription, FilePrescription
 
 
@@ -23,6 +27,8 @@ class PrescriptionListAPIView(CommonListAPIView):
     queryset = Prescription.objects.all().only_list()
     serializer_class = PrescriptionListSerializer
     permission_classes = [IsDoctor | PatientReadOnly]
+    keyset_ordering = ('-created_at', '-id')  # pagination=cursor(FasterPagination)
+    query_budget = 10  # QueryBudgetMiddleware
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
@@ -50,6 +56,7 @@ class PrescriptionRetrieveAPIView(RetrieveAPIView):
     serializer_class = PrescriptionDetailSerializer
     permission_classes = [IsOwner | RelatedPatientReadOnly]
     lookup_field = 'pk'
+    query_budget = 10
 
     @swagger_auto_schema(**docs.prescription_detail)
     def get(self, request, *args, **kwargs):
@@ -87,10 +94,13 @@ class PrescriptionChoiceAPIView(CommonListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class FilePrescriptionListAPIView(CommonListAPIView):
+class FilePrescriptionListAPIView(VirtualScheduleMixin, CommonListAPIView):
     queryset = FilePrescription.objects.all()
     serializer_class = FilePrescriptionListSerializer
     permission_classes = [IsDoctor | IsPatient]
+    keyset_ordering = ('date', 'id')  # pagination=cursor(FasterPagination)
+    keyset_fields = ('date', 'created_at')
+    query_budget = 10
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
@@ -112,6 +122,20 @@ class FilePrescriptionCreateAPIView(CreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
+class FilePrescriptionMaterializeAPIView(CreateAPIView):
+    # lazy schedule 소견서의 가상 일정(날짜)을 FilePrescription row로 생성(이미 생성된 경우 해당 객체 반환)
+    serializer_class = FilePrescriptionMaterializeSerializer
+    permission_classes = [IsDoctor | IsPatient]
+
+    @swagger_auto_schema(**docs.file_prescription_materialize)
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        file_prescription = serializer.save()
+        data = FilePrescriptionDetailSerializer(instance=file_prescription, context=self.get_serializer_context()).data
+        return Response(data=data, status=status.HTTP_201_CREATED)
+
+
 class FilePrescriptionRetrieveAPIView(RetrieveAPIView):
     queryset = FilePrescription.objects.all()
     serializer_class = FilePrescriptionDetailSerializer
@@ -138,7 +162,19 @@ class FilePrescriptionUpdateAPIView(UpdateAPIView):
         return super().patch(request, *args, **kwargs)
 
 
-class FilePrescriptionChoiceAPIView(CommonListAPIView):
+class FilePrescriptionBulkUpdateAPIView(GenericAPIView):
+    # 여러 FilePrescription의 checked/status 일괄 수정(요청 1회)
+    serializer_class = FilePrescriptionBulkUpdateSerializer
+    permission_classes = [IsDoctor]
+
+    @swagger_auto_schema(**docs.file_prescription_bulk_update)
+    def put(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(data=serializer.save(), status=status.HTTP_200_OK)
+
+
+class FilePrescriptionChoiceAPIView(VirtualScheduleMixin, CommonListAPIView):
     queryset = FilePrescription.objects.all()
     serializer_class = FilePrescriptionChoiceSerializer
     permission_classes = [IsDoctor]
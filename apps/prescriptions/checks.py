@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, NoReturn, Set
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.timezone import now
+
+
+class CheckStateAggregator:
+    """
+    CheckStateAggregator: Prescription.checked(모든 FilePrescription의 확인 여부) 및 진행 상황 일괄 갱신
+    - FilePrescription 저장, 일괄 생성/수정 시 mark()로 prescription id만 수집
+    - transaction commit 이후(요청 단위: CheckStateMiddleware 종료 시) 수집된 prescription을
+      집계 query 1회 + 조건부 UPDATE 1회로 갱신(변경된 row만)
+    - 진행 상황: total_days, uploaded_days, checked_days, last_uploaded_at(PROGRESS_FIELDS)
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def pending(self) -> Set[int]:
+        if not hasattr(self._local, 'pending'):
+            self._local.pending = set()
+        return self._local.pending
+
+    @property
+    def deferred(self) -> int:
+        return getattr(self._local, 'deferred', 0)
+
+    def mark(self, *prescription_ids: int) -> NoReturn:
+        self.pending.update(prescription_id for prescription_id in prescription_ids if prescription_id)
+        if self.pending and not self.deferred:
+            self.schedule()
+
+    @property
+    def scheduled(self) -> bool:
+        # 등록한 callback이 아직 실행 대기 중인 경우 True
+        # rollback(savepoint 포함) 시 Django가 callback을 버리므로 weakref가 해제됨
+        registered = getattr(self._local, 'scheduled', None)
+        return registered is not None and registered() is not None
+
+    def schedule(self) -> NoReturn:
+        # transaction 당 1회 등록, atomic block 밖에서는 항상 등록(on_commit 즉시 실행)
+        if connection.in_atomic_block and self.scheduled:
+            return
+        callback = self.flush  # 등록마다 새 bound method(weakref 대상)
+        self._local.scheduled = weakref.ref(callback)
+        transaction.on_commit(callback)
+
+    def begin(self) -> NoReturn:
+        self._local.deferred = self.deferred + 1
+
+    def end(self) -> NoReturn:
+        self._local.deferred -= 1
+        if self.pending and not self.deferred:
+            self.schedule()
+
+    @contextmanager
+    def collect(self) -> Iterator[NoReturn]:
+        # 요청 단위 수집: 종료 시 1회 반영
+        self.begin()
+        try:
+            yield
+        finally:
+            self.end()
+
+    def flush(self) -> NoReturn:
+        self._local.scheduled = None
+        prescription_ids, self._local.pending = self.pending, set()
+        if prescription_ids:
+            update_prescription_progress(prescription_ids)
+
+
+# 집계로 갱신되는 Prescription field
+PROGRESS_FIELDS = ('checked', 'total_days', 'uploaded_days', 'checked_days', 'last_uploaded_at')
+
+
+def get_progress(prescription) -> Dict[str, Any]:
+    # annotate_progress()의 집계 값 -> Prescription field 값
+    if prescription.lazy_schedule:  # materialize 되지 않은 날짜는 업로드, 확인되지 않은 상태
+        total_days = prescription.count_schedule_days()
+    else:
+        total_days = prescription.live_days_count
+    return {
+        'checked': prescription.checked_days_count >= total_days and
+                   prescription.checked_days_count == prescription.live_days_count,
+        'total_days': total_days,
+        'uploaded_days': prescription.uploaded_days_count,
+        'checked_days': prescription.checked_days_count,
+        'last_uploaded_at': prescription.last_uploaded,
+    }
+
+
+def update_prescription_progress(prescription_ids: Iterable[int]) -> int:
+    from prescriptions.models import Prescription
+
+    prescriptions = Prescription.origin_objects.filter(id__in=list(prescription_ids)). \
+        only('id', 'lazy_schedule', 'start_date', 'end_date', *PROGRESS_FIELDS).annotate_progress()
+    changed = {}
+    for prescription in prescriptions:
+        progress = get_progress(prescription)
+        if any(getattr(prescription, field) != value for field, value in progress.items()):
+            changed[prescription.id] = progress
+    if not changed:
+        return 0
+
+    # 변경된 row만 UPDATE 1회(field 별 CASE id WHEN ...)
+    values = {}
+    for field in PROGRESS_FIELDS:
+        output_field = Prescription._meta.get_field(field)
+        values[field] = Case(*[When(id=prescription_id, then=Value(progress[field], output_field=output_field))
+                               for prescription_id, progress in changed.items()],
+                             default=F(field), output_field=output_field)
+    return Prescription.origin_objects.filter(id__in=list(changed)).update(updated_at=now(), **values)
+
+
+class CheckStateMiddleware(MiddlewareMixin):
+    # 요청 중 저장된 FilePrescription의 확인 상태를 응답 직전에 1회 반영(sync, async)
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with check_state.collect():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        # 수집 상태(thread local), flush(DB)는 view가 실행되는 thread(sync_to_async)에서 처리
+        await sync_to_async(check_state.begin)()
+        try:
+            return await self.get_response(request)
+        finally:
+            await sync_to_async(check_state.end)()
+
+
+check_state = CheckStateAggregator()
@@ -50,6 +50,12 @@ prescription_query_parameters = {
         type=openapi.TYPE_STRING,
         in_=openapi.IN_QUERY,
     ),
+    'search': openapi.Parameter(
+        name='search',
+        description="소견서 내용(description, description_for_patient) 검색 - 모든 단어 포함, 관련도 순 정렬",
+        type=openapi.TYPE_STRING,
+        in_=openapi.IN_QUERY,
+    ),
     'start_date': openapi.Parameter(
         name='start_date',
         description="파일 업로드 시작일",
@@ -554,12 +560,18 @@ prescription_update_propoerties = {
     'end_date': openapi.Schema(
         description='파일 업로드 종료일',
         type=openapi.TYPE_STRING
+    ),
+    'retained_doctor_files': openapi.Schema(
+        description='(선택) 유지할 의사 파일(DoctorFile)의 id 목록 - 지정하지 않은 경우 업로드한 파일로 모두 교체',
+        type=openapi.TYPE_ARRAY,
+        items=openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID)
     )
 }
 prescription_update = {
     'operation_summary': '[UPDATE] 소견서 수정',
     'operation_description': """
     - 기능: 작성된 소견서의 세부사항 수정
+        - start_date, end_date 변경 시 범위에서 제외된 날짜만 삭제, 추가된 날짜만 생성(유지되는 날짜의 업로드 정보 보존)
     - 권한: IsOwner
     """,
     'manual_parameters': [
@@ -857,6 +869,49 @@ file_prescription_update = {
     },
 }
 
+file_prescription_bulk_update = {
+    'operation_summary': "[UPDATE] FilePrescription 일괄 수정(확인 여부, 상태)",
+    'operation_description': """
+    - 기능: 여러 FilePrescription 객체의 checked, status를 한번에 수정
+        - 대상: ids(FilePrescription pk 리스트) 또는 filters(FilePrescription 리스트의 query parameter와 동일한 조건)
+        - 둘 다 지정한 경우 두 조건을 모두 만족하는 객체만 수정
+        - 소견서(Prescription)의 확인 여부 및 진행 상황은 소견서 별로 1회 갱신
+    - 권한: IsDoctor(작성한 소견서의 FilePrescription만 수정)
+    """,
+    'request_body': openapi.Schema(
+        title='FilePrescription 일괄 수정',
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'ids': openapi.Schema(description='FilePrescription 객체의 pk 리스트', type=openapi.TYPE_ARRAY,
+                                  items=openapi.Items(type=openapi.TYPE_INTEGER)),
+            'filters': openapi.Schema(description='filter 조건(example: {"prescription_id": 1, "uploaded": true})',
+                                      type=openapi.TYPE_OBJECT),
+            'checked': file_prescription_update_properties['checked'],
+            'status': file_prescription_update_properties['status'],
+        },
+    ),
+    'responses': {
+        '200': openapi.Response(
+            schema=openapi.Schema(
+                title='FilePrescription 일괄 수정 결과',
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'updated': openapi.Schema(description='수정된 객체 수', type=openapi.TYPE_INTEGER),
+                    'prescriptions': openapi.Schema(description='수정된 객체의 소견서 pk 리스트',
+                                                    type=openapi.TYPE_ARRAY,
+                                                    items=openapi.Items(type=openapi.TYPE_INTEGER)),
+                }),
+            description='FilePrescription 일괄 수정 완료',
+            examples={
+                'application/json': {
+                    "updated": 2,
+                    "prescriptions": [1]
+                }
+            }
+        )
+    },
+}
+
 file_prescription_detail_properties = {
     'url': openapi.Schema(
         description='detail url',
@@ -1009,6 +1064,32 @@ file_prescription_create = {
     },
 }
 
+file_prescription_materialize = {
+    'operation_summary': '[CREATE] 가상 일정(lazy schedule)의 FilePrescription 생성',
+    'operation_description': """
+    - 기능: lazy schedule 소견서(lazy_schedule=true)의 날짜에 해당하는 FilePrescription 객체 생성
+        - lazy schedule 소견서의 일정은 목록(file-prescriptions, choices/file-prescriptions)에 id=null로 표시됨
+        - 파일 업로드, 의사의 확인/수정 전에 호출(이미 생성된 날짜는 기존 객체 반환)
+    - 권한: IsDoctor(작성자) or IsPatient(소견서 대상 환자)
+    """,
+    'request_body': openapi.Schema(
+        title='가상 일정 생성',
+        type=openapi.TYPE_OBJECT,
+        required=['prescription', 'date'],
+        properties={
+            'prescription': openapi.Schema(description='소견서(Prescription 객체)의 pk', type=openapi.TYPE_INTEGER),
+            'date': openapi.Schema(description='업로드 날짜(start_date ~ end_date)', type=openapi.TYPE_STRING,
+                                   format=openapi.FORMAT_DATE),
+        }
+    ),
+    'responses': {
+        201: openapi.Response(
+            schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties=file_prescription_detail_properties),
+            description='생성된(또는 기존) file prescription 객체',
+        )
+    },
+}
+
 file_prescription_choice = {
     'operation_summary': '[LIST-CHOICE] FilePrescription 선택 리스트',
     'operation_description': """
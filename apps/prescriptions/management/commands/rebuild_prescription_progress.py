@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from prescriptions.checks import update_prescription_progress
+from prescriptions.models import Prescription
+
+
+class Command(BaseCommand):
+    help = '소견서의 확인 여부 및 진행 상황(total_days, uploaded_days, checked_days, last_uploaded_at) 재계산'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Prescription.origin_objects.order_by('id').values_list('id', flat=True)
+        last_id, count, updated = 0, 0, 0
+        while True:
+            prescription_ids = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not prescription_ids:
+                break
+            updated += update_prescription_progress(prescription_ids)  # 변경된 row만 UPDATE
+            last_id, count = prescription_ids[-1], count + len(prescription_ids)
+        self.stdout.write(self.style.SUCCESS(f'prescription: {count}, updated: {updated}'))
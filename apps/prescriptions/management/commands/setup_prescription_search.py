@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from prescriptions.search import prescription_search
+
+
+class Command(BaseCommand):
+    help = '소견서 본문 검색 index 생성(MySQL: FULLTEXT ngram index, SQLite: FTS5 table 및 trigger)'
+
+    def handle(self, *args, **options):
+        engine = prescription_search.setup()
+        self.stdout.write(self.style.SUCCESS(f'search engine: {engine.name}'))
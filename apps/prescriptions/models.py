@@ -1,14 +1,16 @@
 import datetime
-from typing import Dict, Any, List, NoReturn
+import re
+from typing import Dict, Any, List
 
 from django.db import models
-from django.db.models import F, Prefetch
-from django.db.models.signals import post_save
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from accounts.models import Patient, Doctor
 from core.api.fields import FilePrescriptionFields, PrescriptionFields
-from prescriptions.api.utils import concatenate_name
+from prescriptions.checks import check_state
+from prescriptions.search import prescription_search, split_words
 
 
 class HealthStatus(models.TextChoices):
@@ -27,6 +29,7 @@ class BasePrescription(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)  # 보관(archives) 기준 시간
 
     class Meta:
         abstract = True
@@ -67,6 +70,19 @@ class PrescriptionQuerySet(models.QuerySet):
         return self.only('id', 'writer_id', 'patient_id', 'start_date', 'end_date',
                          'created_at', 'status', 'checked')
 
+    def annotate_progress(self) -> 'PrescriptionQuerySet':
+        # 삭제되지 않은 FilePrescription 집계 + 환자의 마지막 업로드 시간
+        from files.models import PatientFile  # files.models가 prescriptions.models를 import
+        live = Q(file_prescriptions__deleted=False)
+        last_uploaded = PatientFile.objects.filter(file_prescription__prescription_id=OuterRef('pk'), deleted=False). \
+            order_by('-created_at').values('created_at')[:1]
+        return self.annotate(
+            live_days_count=Count('file_prescriptions', filter=live),
+            uploaded_days_count=Count('file_prescriptions', filter=live & Q(file_prescriptions__uploaded=True)),
+            checked_days_count=Count('file_prescriptions', filter=live & Q(file_prescriptions__checked=True)),
+            last_uploaded=Subquery(last_uploaded)
+        )
+
 
 class ParentPrescriptionManager(models.Manager):
     def select_all(self) -> 'PrescriptionQuerySet':
@@ -90,8 +106,8 @@ class PrescriptionManager(ParentPrescriptionManager):
     def get_queryset(self) -> 'PrescriptionQuerySet':
         return PrescriptionQuerySet(self.model, using=self._db). \
             annotate(user=F('writer_id'),
-                     writer_name=concatenate_name('writer'),
-                     patient_name=concatenate_name('patient'))
+                     writer_name=F('writer__full_name'),
+                     patient_name=F('patient__full_name'))
 
 
 """
@@ -105,16 +121,36 @@ class Prescription(BasePrescription):
     patient = models.ForeignKey(Patient, on_delete=models.DO_NOTHING, related_name='prescriptions')
     start_date = models.DateField(null=True)
     end_date = models.DateField(null=True)
+    # True: FilePrescription을 날짜 범위로 계산(업로드, 의사 조치가 있는 날짜만 row 생성) - prescriptions.schedules
+    lazy_schedule = models.BooleanField(default=False)
+    # 진행 상황(FilePrescription 집계): prescriptions.checks에서 갱신, rebuild_prescription_progress로 재계산
+    total_days = models.IntegerField(default=0, editable=False)
+    uploaded_days = models.IntegerField(default=0, editable=False)
+    checked_days = models.IntegerField(default=0, editable=False)
+    last_uploaded_at = models.DateTimeField(null=True, editable=False)
 
     objects = PrescriptionManager()
     origin_objects = OriginPrescriptionManager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # 작성자/환자 별 목록의 keyset pagination: (created_at, id)
+            models.Index(fields=['writer', 'created_at', 'id']),
+            models.Index(fields=['patient', 'created_at', 'id']),
+            # 삭제되지 않은 작성자/환자 별 목록(select_all, nested_all): deleted=False + owner + -created_at
+            models.Index(fields=['writer', 'deleted', 'created_at']),
+            models.Index(fields=['patient', 'deleted', 'created_at']),
+        ]
 
     def get_writer_name(self) -> str:
         return self.writer.get_full_name()
 
+    def count_schedule_days(self) -> int:
+        if not self.start_date or not self.end_date:
+            return 0
+        return (self.end_date - self.start_date).days + 1
+
     def __str__(self) -> str:
         return f'{self.patient.get_full_name()}-{str(self.created_at)}'
 
@@ -184,6 +220,12 @@ class ParentFilePrescriptionManager(models.Manager):
     def choice_fields(self) -> 'FilePrescriptionQuerySet':
         return self.get_queryset().choice_fields()
 
+    def filter_prescription_writer(self, user_id: int) -> 'FilePrescriptionQuerySet':
+        return self.get_queryset().filter_prescription_writer(user_id)
+
+    def filter_upload_date_expired(self) -> 'FilePrescriptionQuerySet':
+        return self.get_queryset().filter_upload_date_expired()
+
 
 class OriginalFilePrescriptionManager(ParentFilePrescriptionManager):
     def get_queryset(self) -> 'FilePrescriptionQuerySet':
@@ -195,8 +237,8 @@ class FilePrescriptionManager(ParentFilePrescriptionManager):
         return FilePrescriptionQuerySet(self.model, using=self._db). \
             filter(deleted=False).annotate_user().annotate(writer_id=F('prescription__writer_id'),
                                                            patient_id=F('prescription__patient_id'),
-                                                           writer_name=concatenate_name('prescription__writer'),
-                                                           patient_name=concatenate_name('prescription__patient'))
+                                                           writer_name=F('prescription__writer__full_name'),
+                                                           patient_name=F('prescription__patient__full_name'))
 
     def unchecked_by(self, prescription_id) -> FilePrescriptionQuerySet:
         return FilePrescriptionQuerySet(self.model, using=self._db).filter(prescription_id=prescription_id).filter(
@@ -215,46 +257,46 @@ class FilePrescription(BasePrescription):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['prescription', 'date']),
+            # keyset pagination: (date, id), (created_at, id)
+            models.Index(fields=['date', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            # unchecked_by, 확인 여부 집계(prescriptions.checks)
+            models.Index(fields=['prescription', 'checked']),
+            # filter_upload_date_expired: date < today + uploaded=False + checked=False
+            models.Index(fields=['date', 'uploaded', 'checked']),
+        ]
 
     def __str__(self) -> str:
         return f'prescription_id:{self.prescription.id}-{self.date}: {self.day_number}일'
 
+    @property
+    def is_virtual(self) -> bool:
+        # lazy schedule의 저장되지 않은 일정
+        return self.pk is None
 
-class ParentCheckHandler:
-    def __init__(self, instance: FilePrescription):
-        self.prescription = instance.prescription
-        self.file_prescription = instance
 
-    def update_prescription(self) -> NoReturn:
-        check_flag = self.convert_checked_flag()
-        self.update_prescription_checked(check_flag)
-
-    def convert_checked_flag(self) -> bool:  # change? convert? get?
-        check_flag = False
+# Prescription.checked 갱신: prescription id만 수집 -> commit 이후 일괄 반영(prescriptions.checks)
+@receiver(post_save, sender=FilePrescription)
+def post_save_file_prescription(sender, instance: FilePrescription, **kwargs: Dict[str, Any]):
+    check_state.mark(instance.prescription_id)
 
-        if self.has_all_checked(self.file_prescription) and not self.is_checked(self.prescription):
-            check_flag = True
-        elif not self.is_checked(self.prescription):
-            check_flag = False
-        return check_flag
 
-    def update_prescription_checked(self, check_value: bool) -> NoReturn:
-        self.prescription.checked = check_value
-        self.prescription.save()
+@receiver(post_delete, sender=FilePrescription)
+def post_delete_file_prescription(sender, instance: FilePrescription, **kwargs: Dict[str, Any]):
+    check_state.mark(instance.prescription_id)
 
-    def has_all_checked(self, file_prescription: FilePrescription) -> bool:
-        file_prescriptions = FilePrescription.objects.unchecked_by(file_prescription.prescription_id)
-        return not file_prescriptions.exists()
 
-    def is_checked(self, prescription: Prescription) -> bool:
-        return not prescription.checked
+# 본문 검색 engine(prescriptions.search) 갱신 - Python engine만 사용(MySQL, SQLite는 index/trigger로 갱신)
+@receiver(post_save, sender=Prescription)
+def update_prescription_search_index(sender, instance: Prescription, **kwargs: Dict[str, Any]):
+    prescription_search.update(instance)
 
 
-# 단일 FilePrescription 업데이트 시
-@receiver(post_save, sender=FilePrescription)
-def post_save_file_prescription(sender, **kwargs: Dict[str, Any]):
-    handler = ParentCheckHandler(kwargs['instance'])
-    handler.update_prescription()
+@receiver(post_delete, sender=Prescription)
+def remove_prescription_search_index(sender, instance: Prescription, **kwargs: Dict[str, Any]):
+    prescription_search.remove(instance.id)
 
 
 # TextField Lookup - Full-text search
@@ -267,3 +309,12 @@ class FullTextSearch(models.Lookup):
         rhs, rhs_params = self.process_rhs(compiler, connection)
         params = lhs_params + rhs_params
         return f"MATCH (%s) AGAINST (%s IN BOOLEAN MODE)" % (lhs, rhs), params
+
+    def as_sql(self, compiler, connection):
+        # MySQL 이외의 backend: 모든 단어를 포함(LIKE)하는 row
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        words = split_words(self.rhs) or ['']
+        conditions = ' AND '.join(f"{lhs} LIKE %s ESCAPE '\\'" for _ in words)
+        params = [param for word in words
+                  for param in lhs_params + ['%' + re.sub(r'([%_\\])', r'\\\1', word) + '%']]
+        return f'({conditions})', params
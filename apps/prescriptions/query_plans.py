@@ -0,0 +1,29 @@
+from config.utils.query_plans import register_query_plan
+from prescriptions.models import FilePrescription, Prescription
+
+# config.utils.query_plans: check_query_plans command에서 EXPLAIN 검사(id는 임의 값)
+
+
+@register_query_plan('prescriptions.writer_list')
+def writer_prescriptions():
+    return Prescription.objects.select_all().filter(writer_id=1)
+
+
+@register_query_plan('prescriptions.patient_list')
+def patient_prescriptions():
+    return Prescription.objects.select_all().filter(patient_id=1)
+
+
+@register_query_plan('file_prescriptions.writer_list')
+def writer_file_prescriptions():
+    return FilePrescription.objects.filter_prescription_writer(1).order_by('-created_at')
+
+
+@register_query_plan('file_prescriptions.unchecked_by')
+def unchecked_file_prescriptions():
+    return FilePrescription.objects.unchecked_by(1)
+
+
+@register_query_plan('file_prescriptions.upload_date_expired')
+def expired_file_prescriptions():
+    return FilePrescription.objects.filter_upload_date_expired().filter_prescription_writer(1)
@@ -0,0 +1,215 @@
+import datetime
+import heapq
+from collections import defaultdict
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from prescriptions.models import FilePrescription, Prescription
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+
+"""
+lazy schedule(Prescription.lazy_schedule=True)
+- FilePrescription은 start_date ~ end_date 범위로 계산되는 가상(virtual) 일정
+- 파일 업로드 또는 의사의 조치(수정, 확인)가 있는 날짜만 materialize_file_prescription()으로 row 생성
+- 가상 일정은 저장되지 않은 FilePrescription 객체(pk=None)로 표현
+- 목록: VirtualSchedule이 page에 필요한 날짜만 ordering 순으로 생성(date filter 범위 밖의 날짜는 생성하지 않음)
+"""
+
+
+def schedule_days(start_date: datetime.date, end_date: datetime.date) -> Iterator[Tuple[int, datetime.date]]:
+    # (day_number, date): FilePrescriptionBuilder.create_file_prescriptions와 동일한 day_number
+    if not start_date or not end_date:
+        return
+    for day_number in range((end_date - start_date).days + 1):
+        yield day_number + 1, start_date + datetime.timedelta(days=day_number)
+
+
+def clip_schedule_days(start_date: datetime.date, end_date: datetime.date,
+                       date_from: Optional[datetime.date] = None, date_to: Optional[datetime.date] = None,
+                       reverse: bool = False) -> Iterator[Tuple[int, datetime.date]]:
+    # schedule_days 중 date_from ~ date_to 범위(reverse: 마지막 날짜부터)
+    if not start_date or not end_date:
+        return
+    first, last = max(start_date, date_from or start_date), min(end_date, date_to or end_date)
+    days = range((first - start_date).days, (last - start_date).days + 1)
+    for day_number in reversed(days) if reverse else days:
+        yield day_number + 1, start_date + datetime.timedelta(days=day_number)
+
+
+def build_virtual_file_prescription(prescription: Prescription, day_number: int,
+                                    date: datetime.date) -> FilePrescription:
+    file_prescription = FilePrescription(prescription=prescription, day_number=day_number, date=date,
+                                         created_at=prescription.created_at, updated_at=prescription.created_at)
+    # FilePrescriptionManager annotation과 동일한 속성
+    file_prescription.user = prescription.writer_id
+    file_prescription.writer_id = prescription.writer_id
+    file_prescription.patient_id = prescription.patient_id
+    file_prescription.writer_name = getattr(prescription, 'writer_name', None)
+    file_prescription.patient_name = getattr(prescription, 'patient_name', None)
+    return file_prescription
+
+
+def materialize_file_prescription(prescription_id: int, date: datetime.date) -> FilePrescription:
+    # 같은 날짜에 대한 동시 요청: prescription row lock으로 직렬화
+    with transaction.atomic():
+        prescription = Prescription.origin_objects.select_for_update().get(id=prescription_id)
+        file_prescription = FilePrescription.objects.filter(prescription_id=prescription.id, date=date).first()
+        if file_prescription is not None:
+            return file_prescription
+
+        days = dict((day_date, day_number) for day_number, day_date in
+                    schedule_days(prescription.start_date, prescription.end_date))
+        if date not in days:
+            raise ValidationError({'date': f'{date} is not in the prescription schedule'})
+        FilePrescription.objects.create(prescription=prescription, day_number=days[date], date=date)
+        # annotation(writer_id, patient_id 등)을 포함한 객체
+        return FilePrescription.objects.get(prescription_id=prescription.id, date=date)
+
+
+class Descending:
+    # 정렬 key의 역순 비교(date, datetime 등 부호를 바꿀 수 없는 값)
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __lt__(self, other: 'Descending') -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: 'Descending') -> bool:
+        return self.value == other.value
+
+
+def ordering_key(ordering: Iterable[str]) -> Callable[[FilePrescription], Tuple[Any, ...]]:
+    # ordering: ['-created_at', 'date'] 형식(앞의 field가 우선), 동일 값은 day_number 역순
+    fields = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+    def key(obj: FilePrescription) -> Tuple[Any, ...]:
+        values = [Descending(getattr(obj, name)) if descending else getattr(obj, name) for name, descending in fields]
+        return (*values, Descending(obj.day_number))
+
+    return key
+
+
+def sort_file_prescriptions(file_prescriptions: List[FilePrescription],
+                            ordering: Iterable[str]) -> List[FilePrescription]:
+    return sorted(file_prescriptions, key=ordering_key(ordering))
+
+
+class VirtualSchedule:
+    """
+    VirtualSchedule: lazy schedule 소견서들의 가상 일정(materialize 되지 않은 날짜)
+    - 소견서 별 날짜를 ordering 순으로 필요한 만큼만 생성하여 병합(heapq.merge), [:n]은 앞의 n개만 생성
+    - date_from, date_to: date filter 범위(범위 밖의 날짜는 생성하지 않음)
+    - len: 소견서 별 (범위 내 날짜 수 - materialize된 날짜 수), 가상 일정 객체를 생성하지 않음
+    """
+
+    def __init__(self, prescriptions: Iterable[Prescription], ordering: Iterable[str],
+                 date_from: Optional[datetime.date] = None, date_to: Optional[datetime.date] = None):
+        self.prescriptions: List[Prescription] = list(prescriptions)
+        self.ordering: List[str] = list(ordering)
+        self.date_from: Optional[datetime.date] = date_from
+        self.date_to: Optional[datetime.date] = date_to
+        self.key = ordering_key(self.ordering)
+        self.materialized: Dict[int, Set[datetime.date]] = self.get_materialized()
+        self._count = None
+
+    def get_materialized(self) -> Dict[int, Set[datetime.date]]:
+        queryset = FilePrescription.origin_objects.filter(
+            prescription_id__in=[prescription.id for prescription in self.prescriptions], deleted=False)
+        if self.date_from:
+            queryset = queryset.filter(date__gte=self.date_from)
+        if self.date_to:
+            queryset = queryset.filter(date__lte=self.date_to)
+        materialized = defaultdict(set)
+        for prescription_id, date in queryset.values_list('prescription_id', 'date'):
+            materialized[prescription_id].add(date)
+        return materialized
+
+    @property
+    def reverse_days(self) -> bool:
+        # 소견서 안에서는 date(day_number)만 달라지므로 첫 date, day_number 정렬 방향을 따름(기본: day_number 역순)
+        for field in self.ordering:
+            if field.lstrip('-') in ('date', 'day_number'):
+                return field.startswith('-')
+        return True
+
+    def count_days(self, prescription: Prescription) -> int:
+        if not prescription.start_date or not prescription.end_date:
+            return 0
+        first = max(prescription.start_date, self.date_from or prescription.start_date)
+        last = min(prescription.end_date, self.date_to or prescription.end_date)
+        if last < first:
+            return 0
+        materialized = sum(first <= date <= last for date in self.materialized[prescription.id])
+        return (last - first).days + 1 - materialized
+
+    def iter_days(self, prescription: Prescription) -> Iterator[FilePrescription]:
+        materialized = self.materialized[prescription.id]
+        for day_number, date in clip_schedule_days(prescription.start_date, prescription.end_date,
+                                                   self.date_from, self.date_to, reverse=self.reverse_days):
+            if date not in materialized:
+                yield build_virtual_file_prescription(prescription, day_number, date)
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = sum(self.count_days(prescription) for prescription in self.prescriptions)
+        return self._count
+
+    def __iter__(self) -> Iterator[FilePrescription]:
+        return heapq.merge(*[self.iter_days(prescription) for prescription in self.prescriptions], key=self.key)
+
+    def __getitem__(self, item: slice) -> List[FilePrescription]:
+        start, stop, step = item.indices(len(self))
+        return list(islice(iter(self), start, stop, step))
+
+
+class MergedSchedule:
+    """
+    MergedSchedule: materialize된 row(queryset)와 가상 일정을 ordering 순으로 병합한 sequence
+    - slice(pagination의 offset:offset + limit)마다 queryset은 앞의 offset + limit개만 조회(DB LIMIT)
+    - len: queryset COUNT + 가상 일정 수
+    """
+
+    def __init__(self, queryset: 'QuerySet', virtual: Union[VirtualSchedule, List[FilePrescription]],
+                 ordering: Iterable[str]):
+        self.ordering: List[str] = list(ordering)
+        # sort_file_prescriptions와 같은 순서(동일 값은 day_number 역순)
+        self.queryset: 'QuerySet' = queryset.order_by(*self.ordering, '-day_number')
+        if isinstance(virtual, list):
+            virtual = sort_file_prescriptions(virtual, self.ordering)
+        self.virtual: Union[VirtualSchedule, List[FilePrescription]] = virtual
+        self._count = None
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = self.queryset.count() + len(self.virtual)
+        return self._count
+
+    def __iter__(self) -> Iterator[FilePrescription]:
+        return iter(self[:len(self)])
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[FilePrescription, List[FilePrescription]]:
+        if not isinstance(item, slice):
+            index = item if item >= 0 else len(self) + item
+            objects = self[index:index + 1]
+            if not objects:
+                raise IndexError('schedule index out of range')
+            return objects[0]
+        start, stop, step = item.indices(len(self))
+        if stop <= start:
+            return []
+        # 병합 결과의 앞 stop개는 각각 정렬된 queryset, 가상 일정의 앞 stop개 안에 있음
+        objects = list(self.queryset[:stop]) + self.virtual[:stop]
+        return sort_file_prescriptions(objects, self.ordering)[start:stop:step]
+
+
+def merge_virtual_schedule(queryset: 'QuerySet', virtual: Union[VirtualSchedule, List[FilePrescription]],
+                           ordering: Iterable[str]) -> MergedSchedule:
+    # materialize된 row + 가상 일정(pagination은 offset 기준)
+    return MergedSchedule(queryset, virtual, ordering)
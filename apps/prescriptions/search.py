@@ -0,0 +1,326 @@
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, List, NoReturn, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, FloatField, Func, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+
+if TYPE_CHECKING:
+    from prescriptions.models import Prescription
+
+"""
+Prescription 본문(description, description_for_patient) 검색
+- 검색어의 단어는 모두 포함(AND), 결과는 search_rank(클수록 관련도 높음) annotation 포함
+- PRESCRIPTION_SEARCH_ENGINE: 'auto'(MySQL -> SQLite FTS5 -> Python 순으로 사용 가능한 engine) 또는 engine class 경로
+  (MySQL, SQLite는 index, FTS5 table이 생성된 경우에만 사용)
+- MySQL FULLTEXT(ngram parser) index, SQLite FTS5 table은 setup_prescription_search command로 생성
+"""
+
+SEARCH_FIELDS = ('description', 'description_for_patient')
+# FTS5 external content table(원본: prescriptions_prescription)
+FTS_TABLE = 'prescriptions_prescription_fts'
+FULLTEXT_INDEX = 'prescriptions_prescription_fulltext'
+
+
+def split_words(query: str) -> List[str]:
+    # boolean mode, FTS5 query 문법 문자 제거
+    words = re.sub(r'[^\w\s]', ' ', str(query)).lower().split()
+    return list(dict.fromkeys(words))
+
+
+def split_ngrams(word: str) -> List[str]:
+    # bigram(1음절 단어는 unigram) - MySQL ngram parser(ngram_token_size=2)와 동일한 token
+    return [word[i:i + 2] for i in range(len(word) - 1)] or [word]
+
+
+class MatchAgainst(Func):
+    # MATCH (columns) AGAINST (query IN BOOLEAN MODE): relevance 값
+    output_field = FloatField()
+
+    def __init__(self, *columns: str, query: str):
+        super().__init__(*columns, Value(query))
+
+    def as_mysql(self, compiler, connection, **extra_context) -> Tuple[str, List]:
+        *columns, query = self.source_expressions
+        compiled = [compiler.compile(column) for column in columns]
+        query_sql, query_params = compiler.compile(query)
+        sql = 'MATCH (%s) AGAINST (%s IN BOOLEAN MODE)' % (', '.join(column for column, _ in compiled), query_sql)
+        return sql, [param for _, params in compiled for param in params] + list(query_params)
+
+
+class SearchEngine:
+    name: str = ''
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        words = split_words(query)
+        if not words:
+            return queryset.none()
+        return self.search_words(queryset, words)
+
+    def search_words(self, queryset: QuerySet, words: List[str]) -> QuerySet:
+        raise NotImplementedError
+
+    def update(self, prescription: 'Prescription') -> NoReturn:
+        pass
+
+    def remove(self, prescription_id: int) -> NoReturn:
+        pass
+
+    def setup(self) -> NoReturn:
+        pass
+
+
+class MySQLSearchEngine(SearchEngine):
+    # FULLTEXT(ngram parser) index - index는 MySQL이 갱신
+    name = 'mysql'
+
+    @classmethod
+    def is_available(cls) -> bool:
+        # FULLTEXT index가 없는 경우(setup 이전) 다음 engine 사용
+        return connection.vendor == 'mysql' and cls.has_fulltext_index()
+
+    @classmethod
+    def has_fulltext_index(cls) -> bool:
+        from prescriptions.models import Prescription
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM information_schema.STATISTICS '
+                           'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s',
+                           [Prescription._meta.db_table, FULLTEXT_INDEX])
+            return bool(cursor.fetchone()[0])
+
+    def search_words(self, queryset: QuerySet, words: List[str]) -> QuerySet:
+        query = ' '.join(f'+"{word}"' for word in words)
+        return queryset.annotate(search_rank=MatchAgainst(*SEARCH_FIELDS, query=query)).filter(search_rank__gt=0)
+
+    def setup(self) -> NoReturn:
+        from prescriptions.models import Prescription
+
+        if self.has_fulltext_index():
+            return
+        table = Prescription._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON {table} '
+                           f'({", ".join(SEARCH_FIELDS)}) WITH PARSER ngram')
+
+
+class SQLiteSearchEngine(SearchEngine):
+    # FTS5 external content table - 원본 table의 trigger로 갱신
+    name = 'sqlite'
+
+    @classmethod
+    def is_available(cls) -> bool:
+        if connection.vendor != 'sqlite':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            return cursor.fetchone() is not None
+
+    def search_words(self, queryset: QuerySet, words: List[str]) -> QuerySet:
+        table = queryset.model._meta.db_table
+        query = ' '.join(f'"{word}"*' for word in words)  # prefix 검색(조사가 붙은 단어)
+        rank = RawSQL(f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                      f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id', [query],
+                      output_field=FloatField())
+        matched = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [query])
+        return queryset.filter(id__in=matched).annotate(search_rank=rank)
+
+    def setup(self) -> NoReturn:
+        from prescriptions.models import Prescription
+
+        table = Prescription._meta.db_table
+        columns = ', '.join(SEARCH_FIELDS)
+        new_values = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+        old_values = ', '.join(f'old.{field}' for field in SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                           f"{columns}, content='{table}', content_rowid='id')")
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN "
+                           f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END")
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN "
+                           f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                           f"VALUES ('delete', old.id, {old_values}); END")
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {table} BEGIN "
+                           f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                           f"VALUES ('delete', old.id, {old_values}); "
+                           f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+class PythonSearchEngine(SearchEngine):
+    """
+    process memory 역색인(단어 bigram -> 소견서 id별 출현 횟수)
+    - 최초 검색 시 전체 로드, 이후 post_save signal(commit 이후) 및 updated_at 기준 증분 동기화
+    - 후보(모든 bigram 포함) 중 원문에 단어가 포함된 소견서만 tf-idf 점수로 정렬
+    - 결과: queryset 범위 안의 일치하는 소견서 전체(id__in, count/pagination 정확),
+      search_rank(Case/When)는 상위 PRESCRIPTION_SEARCH_MAX_RESULTS 개만 지정하고 나머지는 0
+    - lock: _lock(동기화, DB 조회 포함), _index_lock(색인 변경과 점수 계산, 메모리 작업만)
+    """
+    name = 'python'
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.documents: Dict[int, Tuple[str, Tuple[str, ...]]] = {}  # id: (본문, bigram)
+        self.loaded: bool = False
+        self.last_synced_at: float = 0.0
+        self.last_updated_at = None
+        self._lock = threading.RLock()
+        self._index_lock = threading.Lock()  # 동기화 중(DB 조회)에도 검색은 대기하지 않음
+
+    @property
+    def sync_interval(self) -> int:
+        return getattr(settings, 'PRESCRIPTION_SEARCH_SYNC_INTERVAL', 5)
+
+    @property
+    def max_results(self) -> int:
+        return getattr(settings, 'PRESCRIPTION_SEARCH_MAX_RESULTS', 1000)
+
+    def search_words(self, queryset: QuerySet, words: List[str]) -> QuerySet:
+        scores = self.score(words)
+        if not scores:
+            return queryset.none()
+        # 점수 순위는 queryset 범위(예: 작성자 본인) 안에서 계산, 상위 max_results 개 외의 결과도 포함(rank 0)
+        matched = list(queryset.filter(id__in=list(scores)).values_list('id', flat=True))
+        if not matched:
+            return queryset.none()
+        ranked = sorted(matched, key=lambda document_id: (-scores[document_id], -document_id))[:self.max_results]
+        rank = Case(*[When(id=document_id, then=Value(scores[document_id])) for document_id in ranked],
+                    default=Value(0.0), output_field=FloatField())
+        return queryset.filter(id__in=matched).annotate(search_rank=rank)
+
+    def score(self, words: List[str]) -> Dict[int, float]:
+        self.sync_if_needed()
+        with self._index_lock:  # sync(), signal의 _set_document와 동시에 색인을 읽지 않음
+            return self._score(words)
+
+    def _score(self, words: List[str]) -> Dict[int, float]:
+        total = max(len(self.documents), 1)
+        scores: Dict[int, float] = {}
+        for index, word in enumerate(words):
+            grams = split_ngrams(word)
+            postings = sorted((self.postings.get(gram, {}) for gram in grams), key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting.keys()
+            matched = [document_id for document_id in candidates if word in self.documents[document_id][0]]
+            if not matched:
+                return {}
+            idf = math.log(1 + total / len(matched))
+            word_scores = {document_id: idf * min(self.postings[gram][document_id] for gram in grams)
+                           for document_id in matched}
+            if index:  # 모든 단어를 포함한 소견서만 유지
+                word_scores = {document_id: scores[document_id] + score
+                               for document_id, score in word_scores.items() if document_id in scores}
+            scores = word_scores
+            if not scores:
+                return {}
+        return scores
+
+    def update(self, prescription: 'Prescription') -> NoReturn:
+        if not self.loaded:
+            return
+        prescription_id = prescription.id
+        document = None if prescription.deleted else \
+            ' '.join(getattr(prescription, field) or '' for field in SEARCH_FIELDS)
+        transaction.on_commit(lambda: self._set_document(prescription_id, document))
+
+    def remove(self, prescription_id: int) -> NoReturn:
+        if self.loaded:
+            transaction.on_commit(lambda: self._set_document(prescription_id, None))
+
+    def _set_document(self, document_id: int, text: Optional[str]) -> NoReturn:
+        with self._lock, self._index_lock:
+            _, old_grams = self.documents.pop(document_id, ('', ()))
+            for gram in set(old_grams):
+                posting = self.postings.get(gram)
+                if posting is not None:
+                    posting.pop(document_id, None)
+                    if not posting:
+                        del self.postings[gram]
+            if text is None:
+                return
+
+            text = text.lower()
+            grams = tuple(gram for word in split_words(text) for gram in split_ngrams(word))
+            self.documents[document_id] = (text, grams)
+            for gram, count in Counter(grams).items():
+                self.postings.setdefault(gram, {})[document_id] = count
+
+    def sync_if_needed(self) -> NoReturn:
+        if self.loaded and time.monotonic() - self.last_synced_at < self.sync_interval:
+            return
+        if not self._lock.acquire(blocking=not self.loaded):
+            return
+        try:
+            self.sync()
+        finally:
+            self._lock.release()
+
+    def sync(self) -> NoReturn:
+        from prescriptions.models import Prescription
+
+        with self._lock:
+            synced_at = now()
+            queryset = Prescription.origin_objects.values_list('id', 'deleted', *SEARCH_FIELDS)
+            if self.loaded:
+                queryset = queryset.filter(updated_at__gte=self.last_updated_at)
+            for document_id, deleted, *texts in queryset.iterator():
+                self._set_document(document_id, None if deleted else ' '.join(text or '' for text in texts))
+            self.loaded = True
+            self.last_updated_at = synced_at
+            self.last_synced_at = time.monotonic()
+
+
+ENGINES = (MySQLSearchEngine, SQLiteSearchEngine, PythonSearchEngine)
+
+
+class SearchEngineProxy:
+    # 최초 사용 시 PRESCRIPTION_SEARCH_ENGINE 설정에 따라 engine 선택
+    def __init__(self):
+        self._engine: Optional[SearchEngine] = None
+
+    @property
+    def engine(self) -> SearchEngine:
+        if self._engine is None:
+            self._engine = self.select_engine(getattr(settings, 'PRESCRIPTION_SEARCH_ENGINE', 'auto'))
+        return self._engine
+
+    def select_engine(self, engine: str) -> SearchEngine:
+        if engine != 'auto':
+            return import_string(engine)()
+        return next(engine_class() for engine_class in ENGINES if engine_class.is_available())
+
+    def reset(self) -> NoReturn:
+        self._engine = None
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        return self.engine.search(queryset, query)
+
+    def update(self, prescription: 'Prescription') -> NoReturn:
+        self.engine.update(prescription)
+
+    def remove(self, prescription_id: int) -> NoReturn:
+        self.engine.remove(prescription_id)
+
+    def setup(self) -> SearchEngine:
+        # 현재 DB에서 사용 가능한 index(FULLTEXT, FTS5) 생성 후 engine 재선택
+        if connection.vendor == 'mysql':
+            MySQLSearchEngine().setup()
+        elif connection.vendor == 'sqlite':
+            SQLiteSearchEngine().setup()
+        self.reset()
+        return self.engine
+
+
+prescription_search = SearchEngineProxy()
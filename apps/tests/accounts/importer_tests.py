@@ -0,0 +1,81 @@
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.reverse import reverse
+
+from accounts.importers import import_accounts, read_rows
+from accounts.models import BaseUser, Doctor, Patient
+
+DOCTOR_CSV = """email,password,first_name,last_name,gender,address,phone,major,description
+import_doctor0@test.com,test1234,의사,김,MALE,광주,010-9000-0000,{major},
+import_doctor1@test.com,test1234,의사,이,FEMALE,광주,010-9000-0001,{major},소개
+import_doctor0@test.com,test1234,의사,박,MALE,광주,010-9000-0002,{major},
+,test1234,의사,최,MALE,광주,010-9000-0003,{major},
+import_doctor4@test.com,test1234,의사,정,MALE,광주,010-9000-0004,0,
+"""
+
+PATIENT_NDJSON = """{{"email": "import_patient0@test.com", "password": "test1234", "first_name": "환자", "last_name": "김", "address": "광주", "phone": "010-9100-0000", "birth": "1990-01-01", "doctor_email": "import_doctor0@test.com"}}
+{{"email": "import_patient1@test.com", "password": "test1234", "first_name": "환자", "last_name": "이", "address": "광주", "phone": "010-9100-0001", "birth": "1990-13-01", "doctor": {doctor}}}
+{{"email": "import_patient2@test.com", "password": "test1234", "first_name": "환자", "last_name": "박", "address": "광주", "phone": "010-9100-0002", "birth": "1990-01-01"}}
+not json
+[1]
+"x"
+"""
+
+
+@pytest.mark.django_db
+def test_import_accounts(major):
+    rows = read_rows(io.StringIO(DOCTOR_CSV.format(major=major.id)), 'csv')
+    report = import_accounts('doctor', rows, chunk_size=2, use_processes=False)
+
+    assert report.created == 2
+    assert [error['line'] for error in report.errors] == [4, 5, 6]  # 중복 email, email 누락, major 없음
+    doctor = Doctor.objects.get(user__email='import_doctor0@test.com')
+    assert doctor.user.groups.filter(name='doctor').exists()
+    assert BaseUser.objects.get(email='import_doctor0@test.com').check_password('test1234')
+
+    rows = read_rows(io.StringIO(PATIENT_NDJSON.format(doctor=doctor.user_id)), 'ndjson')
+    report = import_accounts('patient', rows, use_processes=False)
+    assert report.created == 1
+    # birth 형식, doctor 누락, json 형식, object가 아닌 row
+    assert [error['line'] for error in report.errors] == [2, 3, 4, 5, 6]
+    assert report.errors[-1]['errors'] == {'row': 'row must be an object'}
+    patient = Patient.objects.get(user__email='import_patient0@test.com')
+    assert patient.doctor_id == doctor.user_id
+    assert patient.user.groups.filter(name='patient').exists()
+
+
+INVALID_TYPE_NDJSON = """{"email": null, "password": "test1234", "first_name": "환자", "last_name": "김", "address": "광주", "phone": "010-9200-0000", "birth": "1990-01-01"}
+{"email": 1234, "password": "test1234", "first_name": "환자", "last_name": "이", "address": "광주", "phone": "010-9200-0001", "birth": "1990-01-01"}
+{"email": "import_type2@test.com", "password": "test1234", "first_name": "환자", "last_name": "박", "address": "광주", "phone": ["010"], "birth": "1990-01-01"}
+{"email": "import_type3@test.com", "password": "test1234", "first_name": "환자", "last_name": "최", "address": "광주", "phone": {"a": 1}, "birth": "1990-01-01", "doctor_email": 1}
+"""
+
+
+@pytest.mark.django_db
+def test_import_accounts_invalid_types():
+    # null, 숫자, 배열, 객체 값: 예외 없이 row error로 기록
+    rows = read_rows(io.StringIO(INVALID_TYPE_NDJSON), 'ndjson')
+    report = import_accounts('patient', rows, use_processes=False)
+    assert report.created == 0
+    errors = {error['line']: error['errors'] for error in report.errors}
+    assert errors[1]['email'] == 'required' and errors[2]['email'] == 'must be a string'
+    assert errors[3]['phone'] == 'must be a string'
+    assert errors[4]['phone'] == 'must be a string' and errors[4]['doctor_email'] == 'must be a string'
+
+
+@pytest.mark.django_db
+def test_api_import_accounts(api_client, super_user, major):
+    url = reverse('accounts:account-import', kwargs={'user_type': 'doctor'})
+    uploaded_file = SimpleUploadedFile('doctors.csv', DOCTOR_CSV.format(major=major.id).encode('utf-8'))
+
+    response = api_client.post(url, data={'file': uploaded_file}, format='multipart')
+    assert response.status_code in (401, 403)
+
+    api_client.force_authenticate(user=super_user)
+    uploaded_file.seek(0)
+    response = api_client.post(url, data={'file': uploaded_file}, format='multipart')
+    assert response.status_code == 200
+    assert response.data['created'] == 2
+    assert response.data['failed'] == 3
@@ -5,6 +5,9 @@ from django.contrib.auth.models import Group
 from django.utils.timezone import now
 
 from accounts.models import *
+from config.utils.filter_backends import create_birth_lookups
+from config.utils.utils import normalize_name, split_name_tokens
+from accounts.api.utils import PostProcessingUserDirector, group_permission_registry
 from hospitals.models import Major
 from tests.constants import *
 
@@ -74,9 +77,11 @@ def test_create_patient():
     assert patient.user.email == 'testpatient@patient.com'
     assert patient.doctor.user_id == doctor.user_id
     assert not hasattr(patient, 'age')
-    # manager->queryset이 실행되어야 age 호출 가능
-    patient = Patient.objects.get(user_id=user.id)
+    # age annotation은 with_annotations(set_age)로 선언한 경우에만 추가됨
+    assert not hasattr(Patient.objects.get(user_id=user.id), 'age')
+    patient = Patient.objects.with_annotations('age').get(user_id=user.id)
     assert patient.age
+    assert patient.age == patient.get_age()
 
 
 @pytest.mark.django_db
@@ -86,14 +91,14 @@ def test_patient_age_by_birth():
     patient.save()
 
     # 오늘 날짜를 기준으로 생일이 지나지 않은 유저
-    patient = Patient.objects.first()
+    patient = Patient.objects.set_age().first()
     assert patient.age == 32
 
     # 오늘 날짜를 기준으로 생일이 지난 유저
     now_date = now().date()
     patient.birth = datetime.date(1988, now_date.month, now_date.day)
     patient.save()
-    patient = Patient.objects.first()
+    patient = Patient.objects.set_age().first()
     assert patient.age == 33
 
 
@@ -131,3 +136,105 @@ def test_check_user_type():
     assert baseuser.user_type
     assert baseuser.user_type.doctor
     assert not baseuser.user_type.patient
+
+
+@pytest.mark.django_db
+def test_set_token_expired_with_user_session(django_assert_num_queries):
+    baseuser = BaseUser.objects.create_user(email='session@test.com', password='test1234')
+    updated_at = BaseUser.objects.values_list('updated_at', flat=True).get(id=baseuser.id)
+    assert baseuser.token_expired == 0
+
+    baseuser.set_token_expired(1000)  # UserSession 생성
+    with django_assert_num_queries(1):
+        baseuser.set_token_expired(2000)  # UserSession update
+    assert baseuser.token_expired == 2000
+
+    baseuser = BaseUser.objects.select_related('session').get(id=baseuser.id)
+    assert baseuser.token_expired == 2000
+    assert baseuser.updated_at == updated_at
+
+
+@pytest.mark.django_db
+def test_group_permission_builder_with_registry(django_assert_num_queries):
+    group_permission_registry.clear()
+    doctor = Doctor.objects.first()
+    group_permission_registry.get('doctor')  # permission, group 조회 후 저장
+
+    baseuser = User.objects.create_user(email='registry@test.com', password='test1234')
+    with django_assert_num_queries(2):  # group insert, permission insert
+        PostProcessingUserDirector(user=doctor, baseuser=baseuser).build_user_group_and_permission()
+
+    assert baseuser.user_type.doctor
+    assert baseuser.groups.filter(name='doctor').exists()
+    assert set(baseuser.user_permissions.values_list('id', flat=True)) == set(group_permission_registry.get('doctor')[1])
+
+
+def test_create_birth_lookups():
+    today = datetime.date(2021, 3, 1)
+    assert create_birth_lookups(min_age=30, today=today) == {'birth__lte': datetime.date(1991, 3, 1)}
+    assert create_birth_lookups(max_age=30, today=today) == {'birth__gt': datetime.date(1990, 3, 1)}
+
+    # 2월 29일 -> 평년은 2월 28일
+    leap_day = datetime.date(2020, 2, 29)
+    assert create_birth_lookups(min_age=1, max_age=1, today=leap_day) == {
+        'birth__lte': datetime.date(2019, 2, 28),
+        'birth__gt': datetime.date(2018, 2, 28)
+    }
+
+
+@pytest.mark.django_db
+def test_patient_filter_by_age():
+    patient = Patient.objects.first()
+    now_date = now().date()
+    patient.birth = datetime.date(now_date.year - 30, now_date.month, 1)
+    patient.save()
+
+    ages = [patient.age for patient in Patient.objects.set_age().filter_by_age(min_age=30, max_age=30)]
+    assert ages and set(ages) == {30}
+    assert all(patient.age >= 30 for patient in Patient.objects.set_age().filter_by_age(min_age=30))
+    assert all(patient.age <= 30 for patient in Patient.objects.set_age().filter_by_age(max_age=30))
+
+
+@pytest.mark.django_db
+def test_patient_with_annotations():
+    patient = Patient.objects.first()
+    assert not hasattr(patient, 'doctor_name')
+
+    patient = Patient.objects.with_annotations('doctor_name').first()
+    assert patient.full_name == f'{patient.last_name}{patient.first_name}'
+    assert patient.doctor_name == f'{patient.doctor.last_name}{patient.doctor.first_name}'
+    assert not hasattr(patient, 'age')
+    assert 'CONCAT' not in str(Patient.objects.all().query).upper()
+
+
+@pytest.mark.django_db
+def test_name_search_tokens(doctor_with_group):
+    doctor = doctor_with_group
+    assert doctor.full_name == normalize_name(f'{doctor.last_name}{doctor.first_name}')
+    tokens = set(NameSearchToken.objects.filter(user=doctor.user, user_type='doctor').values_list('token', flat=True))
+    assert tokens == set(split_name_tokens(doctor.full_name))
+
+    # 이름 변경 시 full_name, token 갱신
+    doctor.first_name = '길동'
+    doctor.last_name = '홍'
+    doctor.save()
+    tokens = set(NameSearchToken.objects.filter(user=doctor.user, user_type='doctor').values_list('token', flat=True))
+    assert doctor.full_name == '홍길동'
+    assert tokens == {'홍', '길', '동', '홍길', '길동'}
+
+    def search(value, lookup):
+        q = NameSearchToken.objects.lookup_q(value, lookup, 'doctor')
+        return set(Doctor.objects.filter(q).values_list('user_id', flat=True))
+
+    assert search('홍길동', 'exact') == {doctor.user_id}
+    assert search('홍 길', 'startswith') == {doctor.user_id}
+    assert search('길동', 'contains') == {doctor.user_id}
+    assert search('동', 'contains') == {doctor.user_id}
+    assert doctor.user_id not in search('동길', 'contains')  # 연속되지 않은 문자열
+    assert doctor.user_id not in search('길동', 'exact')
+
+    # update_fields에 이름 field만 지정한 경우에도 full_name 저장
+    doctor.first_name = '순신'
+    doctor.save(update_fields=['first_name'])
+    assert Doctor.objects.get(user_id=doctor.user_id).full_name == '홍순신'
+    assert search('홍순신', 'exact') == {doctor.user_id}
@@ -1,12 +1,16 @@
+import datetime
 import time
 
 import pytest
 from rest_framework.reverse import reverse
 from rest_framework_simplejwt.token_blacklist.models import *
 from rest_framework_simplejwt.utils import datetime_from_epoch
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 
 from accounts.api.authentications import CustomJWTTokenUserAuthentication, CustomRefreshToken
 from accounts.models import *
+from accounts.revocations import BloomFilter, TokenRevocationSet, token_revocations
+from accounts.tasks import prune_expired_tokens
 
 
 @pytest.mark.django_db
@@ -68,3 +72,115 @@ def test_compare_user_token_expired_with_accesstoken_expired(get_token_from_doct
     assert access_token['token_type'] == 'access'
     # user 모델에 등록된 토큰 만료 시간과 발급된 토큰(access_token)의 만료 시간이 동일한지 확인
     assert access_token['exp'] == doctor.user.token_expired
+
+
+@pytest.mark.django_db
+def test_authenticate_jwt_token_user_with_cache(rf, django_assert_num_queries):
+    doctor = Doctor.objects.first()
+    token = CustomRefreshToken.for_user(doctor.user)
+    access_token = token.access_token
+
+    url = reverse('token-login')
+    authentication = CustomJWTTokenUserAuthentication()
+    authentication.authenticate(rf.post(url, HTTP_AUTHORIZATION=f'Bearer {str(access_token)}'))
+
+    # 두 번째 요청부터 인증 캐시 사용
+    with django_assert_num_queries(0):
+        auth_user, _ = authentication.authenticate(rf.post(url, HTTP_AUTHORIZATION=f'Bearer {str(access_token)}'))
+    assert auth_user.id == doctor.user_id
+    assert auth_user.user_type.doctor
+
+    # 재로그인 시 이전 세션의 token 폐기
+    CustomRefreshToken.for_user(doctor.user)
+    token_revocations.sync()
+    with pytest.raises(AuthenticationFailed):
+        authentication.authenticate(rf.post(url, HTTP_AUTHORIZATION=f'Bearer {str(access_token)}'))
+
+
+@pytest.mark.django_db
+def test_user_type_claims_in_token(get_token_from_doctor, get_token_from_patient, patient_with_group):
+    doctor_access = get_token_from_doctor.access_token
+    assert doctor_access['user_type'] == 'doctor'
+    assert doctor_access['doctor_id'] == patient_with_group.doctor_id
+
+    patient_access = get_token_from_patient.access_token
+    assert patient_access['user_type'] == 'patient'
+    assert patient_access['patient_id'] == patient_with_group.user_id
+    assert patient_access['doctor_id'] == patient_with_group.doctor_id
+
+
+@pytest.mark.django_db
+def test_doctor_id_claim_expired_on_reassign(get_token_from_patient, patient_with_group):
+    # 담당 의사 변경 시 doctor_id claim이 포함된 token 만료
+    user_id = patient_with_group.user_id
+    assert BaseUser.objects.get(id=user_id).token_expired != 0
+    patient_with_group.doctor = Doctor.objects.exclude(user_id=patient_with_group.doctor_id).first()
+    patient_with_group.save()
+    assert BaseUser.objects.get(id=user_id).token_expired == 0
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f'jti-{i}')
+
+    assert all(f'jti-{i}' in bloom for i in range(1000))
+    false_positives = sum(f'other-{i}' in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+def test_token_revocation_set():
+    revocations = TokenRevocationSet(capacity=10)
+    revocations.last_synced_at = time.monotonic() + 60  # sync(DB) 생략
+    revocations.revoke('revoked-jti', datetime_from_epoch(time.time() + 60))
+
+    assert revocations.is_revoked('revoked-jti')
+    assert not revocations.is_revoked('valid-jti')
+
+
+@pytest.mark.django_db
+def test_token_revocation_set_late_commit():
+    # 이전 동기화 이후 commit된 blacklist row(blacklisted_at이 동기화 시각보다 이전)도 반영
+    user = BaseUser.objects.get(id=2)
+    revocations = TokenRevocationSet(capacity=10)
+    revocations.sync()
+    expires_at = datetime_from_epoch(time.time() + 60)
+    token = OutstandingToken.objects.create(user=user, jti='late-jti', token='token', expires_at=expires_at)
+    blacklisted = BlacklistedToken.objects.create(token=token)
+    BlacklistedToken.objects.filter(id=blacklisted.id).update(
+        blacklisted_at=revocations.last_synced_time - datetime.timedelta(seconds=10))
+
+    revocations.sync()
+    assert revocations.is_revoked('late-jti')
+
+
+@pytest.mark.django_db
+def test_rotated_refresh_token_revoked_on_login(api_client):
+    user = BaseUser.objects.get(id=2)
+    refresh = CustomRefreshToken.for_user(user)
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+    response = api_client.post(reverse('token-refresh'), {'refresh': str(refresh)}, format='json')
+    assert response.status_code == 200
+
+    # 재발급된 refresh token도 OutstandingToken으로 기록되어 재로그인 시 폐기
+    rotated = CustomRefreshToken(response.data['refresh'])
+    assert OutstandingToken.objects.filter(jti=rotated['jti']).exists()
+    CustomRefreshToken.for_user(user)
+    assert BlacklistedToken.objects.filter(token__jti=rotated['jti']).exists()
+
+
+@pytest.mark.django_db
+def test_prune_expired_tokens():
+    user = BaseUser.objects.get(id=2)
+    expired_time = datetime_from_epoch(time.time() - 60)
+    for i in range(5):
+        token = OutstandingToken.objects.create(user=user, jti=f'expired-jti-{i}', token='token',
+                                                created_at=expired_time, expires_at=expired_time)
+        BlacklistedToken.objects.create(token=token)
+    refresh = CustomRefreshToken.for_user(user)
+
+    metrics = prune_expired_tokens(batch_size=2)
+    assert metrics['deleted_outstanding'] == 5
+    assert metrics['deleted_blacklisted'] == 5
+    assert not OutstandingToken.objects.filter(jti__startswith='expired-jti').exists()
+    assert OutstandingToken.objects.filter(jti=refresh['jti']).exists()
@@ -2,6 +2,7 @@ import pytest
 from rest_framework.reverse import reverse
 
 from accounts.api.authentications import CustomRefreshToken
+from accounts.autocomplete import autocomplete_index, entry_from_instance
 from accounts.models import Doctor, Patient
 from tests.conftest import DOCTOR_PARAMETER, PATIENT_PARAMETER
 
@@ -75,6 +76,30 @@ def test_api_create_token_by_login_with_doctor_info(api_client, doctor_with_grou
     assert response.status_code == 401
 
 
+@pytest.mark.django_db
+def test_async_token_login(api_client, doctor_with_group, settings):
+    doctor = doctor_with_group
+    url = reverse('token-login-async')
+    response = api_client.post(url, data={'email': doctor.user.email, 'password': 'test12345'}, format='json')
+    data = response.json()
+    assert response.status_code == 200
+    assert 'access' in data
+    assert 'refresh' not in data  # refresh token은 cookie로 전달
+    assert response.cookies['refresh_token'].value
+    assert data['main_url'] == reverse('core-api:doctors:detail', kwargs={'pk': doctor.user_id})
+
+    response = api_client.post(url, data={'email': doctor.user.email, 'password': 'invalidpasswd'}, format='json')
+    assert response.status_code == 401
+    response = api_client.post(url, data={'email': 'unknownuser', 'password': 'test12345'}, format='json')
+    assert response.status_code == 401
+
+    # backpressure: 대기 가능한 hash 요청 수 초과
+    settings.PASSWORD_HASH_MAX_PENDING = 0
+    response = api_client.post(url, data={'email': doctor.user.email, 'password': 'test12345'}, format='json')
+    assert response.status_code == 503
+    assert response['Retry-After'] == '1'
+
+
 @pytest.mark.django_db
 def test_api_create_token_by_login_with_patient_info(api_client, patient_with_group):
     patient = patient_with_group
@@ -158,3 +183,33 @@ def test_api_update_doctor(api_client):
     response = api_client.put(url, data=data, format='json')
     assert response.status_code == 200
     assert response.data['description'] == 'changed description'
+
+
+@pytest.mark.django_db
+def test_autocomplete_patients(doctor_client_with_token_auth, patient_with_group, django_assert_num_queries):
+    patient = patient_with_group
+    autocomplete_index.rebuild()
+    url = reverse('accounts:patient-autocomplete')
+
+    response = doctor_client_with_token_auth.get(url, data={'q': 'lastpat'})
+    assert response.status_code == 200
+    assert response.data[0] == {'user_id': patient.user_id, 'full_name': 'lastpatientfirstpatient',
+                                'doctor_id': patient.doctor_id}
+
+    # 색인 로드 이후 DB 조회 없음(인증 cache 사용)
+    with django_assert_num_queries(0):
+        response = doctor_client_with_token_auth.get(url, data={'q': '3333'})  # 전화번호 뒷자리
+    assert [data['user_id'] for data in response.data] == [patient.user_id]
+
+    # 다른 의사의 환자는 검색되지 않음
+    other_patient = Patient.objects.exclude(doctor_id=patient.doctor_id).first()
+    response = doctor_client_with_token_auth.get(url, data={'q': other_patient.full_name})
+    assert other_patient.user_id not in [data['user_id'] for data in response.data]
+
+    # signal(commit 이후)로 반영되는 변경 사항
+    patient.first_name = 'renamed'
+    patient.save()
+    autocomplete_index.add(entry_from_instance(patient))
+    response = doctor_client_with_token_auth.get(url, data={'q': 'renamed'})
+    assert [data['user_id'] for data in response.data] == [patient.user_id]
+    autocomplete_index.loaded = False
@@ -0,0 +1,39 @@
+import datetime
+
+import pytest
+from django.utils.timezone import now
+
+from archives.archivers import archive_deleted_rows
+from archives.lookups import get_with_archive, is_archived
+from archives.models import ArchivedFilePrescription, ArchivedPrescription
+from prescriptions.models import FilePrescription, Prescription
+
+
+@pytest.mark.django_db
+def test_archive_deleted_rows(doctor_with_group, patient_with_group):
+    old = now() - datetime.timedelta(days=100)
+    create = lambda **kwargs: Prescription.objects.create(writer=doctor_with_group, patient=patient_with_group,
+                                                          description='archive', **kwargs)
+    archived = create(deleted=True, deleted_at=old)
+    FilePrescription.objects.create(prescription=archived, day_number=1, date=datetime.date(2021, 1, 1),
+                                    deleted=True, deleted_at=old)
+    recent = create(deleted=True, deleted_at=now())
+    referenced = create(deleted=True, deleted_at=old)  # 삭제되지 않은 FilePrescription이 남아 있음
+    FilePrescription.objects.create(prescription=referenced, day_number=1, date=datetime.date(2021, 1, 1))
+
+    metrics = archive_deleted_rows(days=30, batch_size=1)
+    assert metrics['prescriptions.Prescription'] >= 1
+    assert metrics['prescriptions.FilePrescription'] >= 1
+
+    # 원본 table에서 이동
+    assert not Prescription.origin_objects.filter(id=archived.id).exists()
+    assert not FilePrescription.origin_objects.filter(prescription_id=archived.id).exists()
+    assert ArchivedFilePrescription.objects.filter(prescription_id=archived.id).count() == 1
+    assert Prescription.origin_objects.filter(id__in=[recent.id, referenced.id]).count() == 2
+
+    # read-through: 원본 -> 보관 table
+    instance = get_with_archive(Prescription, archived.id)
+    assert is_archived(instance) and instance.description == 'archive' and instance.writer_id == archived.writer_id
+    assert not is_archived(get_with_archive(Prescription, recent.id))
+    with pytest.raises(ArchivedPrescription.DoesNotExist):
+        get_with_archive(Prescription, 0)
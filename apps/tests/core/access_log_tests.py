@@ -0,0 +1,64 @@
+import asyncio
+import io
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from rest_framework.reverse import reverse
+
+from accounts.api.authentications import CustomRefreshToken
+from accounts.models import Doctor
+from config.utils.access_log import AccessLogMiddleware, access_log
+
+
+@pytest.fixture
+def access_log_stream(settings):
+    settings.ACCESS_LOG_ENABLED = True
+    stream = io.StringIO()
+    access_log.start(stream)
+    yield stream
+    access_log.stop()
+
+
+def read_entries(stream: io.StringIO):
+    access_log.stop()  # listener 종료: buffer 출력
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.mark.django_db
+def test_access_log(api_client, settings, access_log_stream):
+    doctor = Doctor.objects.get(user_id=2)
+    token = CustomRefreshToken.for_user(doctor.user)
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token.access_token))
+    url = reverse('prescriptions:prescription-list')
+
+    settings.ACCESS_LOG_SAMPLE_RATE = 1
+    api_client.get(url + '?limit=1')
+    # 성공 요청은 기록하지 않고, 오류 요청은 항상 기록
+    settings.ACCESS_LOG_SAMPLE_RATE = 0
+    api_client.get(url)
+    api_client.get(reverse('prescriptions:prescription-detail', kwargs={'pk': 0}))
+
+    entries = read_entries(access_log_stream)
+    assert len(entries) == 2
+    success, error = entries
+    assert success['path'] == url and success['query'] == 'limit=1' and success['status'] == 200
+    assert success['view'] == 'prescriptions:prescription-list' and success['sampled'] is True
+    assert success['user_id'] == doctor.user_id and success['role'] == 'doctor'
+    assert success['duration_ms'] >= 0 and success['size'] > 0 and 'time' in success
+    assert error['status'] == 404 and error['sampled'] is False
+
+
+def test_access_log_middleware_async(rf, settings, access_log_stream):
+    async def get_response(request):
+        return HttpResponse(status=500)
+
+    middleware = AccessLogMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    async_to_sync(middleware)(rf.get('/async?page=1'))
+
+    entries = read_entries(access_log_stream)
+    assert len(entries) == 1
+    assert entries[0]['path'] == '/async' and entries[0]['query'] == 'page=1' and entries[0]['status'] == 500
+    assert entries[0]['role'] == 'anonymous' and entries[0]['sampled'] is False
@@ -0,0 +1,91 @@
+import asyncio
+import os
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from rest_framework.reverse import reverse
+
+from accounts.api.authentications import CustomRefreshToken
+from accounts.models import Doctor
+from config.utils.metrics import MetricsMiddleware, MetricsRegistry, metrics
+
+
+def test_metrics_registry_render():
+    registry = MetricsRegistry()
+    registry.histogram('latency_seconds', 'latency', (0.1, 1.0))
+    registry.counter('requests_total', 'requests')
+    registry.observe('latency_seconds', 0.05, view='a')
+    registry.observe('latency_seconds', 0.5, view='a')
+    registry.observe('latency_seconds', 5, view='a')
+    registry.inc('requests_total', 2, view='a"b')
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{view="a",le="0.1"} 1.0' in text
+    assert 'latency_seconds_bucket{view="a",le="1.0"} 2.0' in text
+    assert 'latency_seconds_bucket{view="a",le="+Inf"} 3.0' in text
+    assert 'latency_seconds_sum{view="a"} 5.55' in text and 'latency_seconds_count{view="a"} 3.0' in text
+    assert 'requests_total{view="a\\"b"} 2.0' in text
+
+
+def test_metrics_multiprocess_merge(settings, tmp_path):
+    # 각 process(registry)가 저장한 값을 합산
+    settings.METRICS_MULTIPROCESS_DIR = str(tmp_path)
+    worker = MetricsRegistry()
+    worker.counter('requests_total', 'requests')
+    worker.inc('requests_total', 3)
+    worker.flush(force=True)
+    worker_file = tmp_path / f'{os.getpid()}-{worker._started}.json'
+    assert worker_file.exists()
+    (tmp_path / f'{os.getppid()}-0.json').write_text('[["requests_total", [], [4]]]')  # 실행 중인 다른 worker
+
+    # 같은 pid의 이전 worker(pid 재사용): archive.json에 합산 후 파일 삭제
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'requests')
+    registry.inc('requests_total', 1)
+    assert 'requests_total 8.0' in registry.render()
+    assert not worker_file.exists() and (tmp_path / 'archive.json').exists()
+    assert 'requests_total 8.0' in registry.render()  # archive 이후 조회: 중복 합산 없음
+
+
+@pytest.mark.django_db
+def test_metrics_view(api_client, settings):
+    settings.METRICS_TOKEN = 'metrics-token'
+    doctor = Doctor.objects.get(user_id=2)
+    token = CustomRefreshToken.for_user(doctor.user)
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token.access_token))
+    assert api_client.get(reverse('prescriptions:prescription-list')).status_code == 200
+
+    # token이 없는 경우 REMOTE_ADDR(127.0.0.1, reverse proxy)와 관계 없이 거부
+    assert api_client.get(reverse('metrics')).status_code == 403
+
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer metrics-token')
+    response = api_client.get(reverse('metrics'))
+    assert response.status_code == 200 and response['Content-Type'].startswith('text/plain')
+    text = response.content.decode()
+    assert 'http_request_duration_seconds_bucket{method="GET",status="200",' \
+           'view="prescriptions:prescription-list",le="+Inf"}' in text
+    assert 'db_queries_per_request_count{view="prescriptions:prescription-list"}' in text
+    assert 'pagination_count_seconds_count{strategy="exact",view="PrescriptionListAPIView"}' in text
+    assert 'http_response_render_seconds_count{view="prescriptions:prescription-list"}' in text
+
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer other-token')
+    assert api_client.get(reverse('metrics')).status_code == 403
+
+    # METRICS_ALLOWED_IPS: 지정한 경우에만 token 없이 조회
+    settings.METRICS_ALLOWED_IPS = ['10.0.0.1']
+    api_client.credentials()
+    assert api_client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1').status_code == 200
+    assert api_client.get(reverse('metrics')).status_code == 403
+
+
+def test_metrics_middleware_async(rf):
+    async def get_response(request):
+        return HttpResponse(b'ok')
+
+    middleware = MetricsMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(rf.get('/'))
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",status="200"' in metrics.render()
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection
+from django.http import HttpResponse
+from rest_framework.reverse import reverse
+
+from accounts.api.authentications import CustomRefreshToken
+from accounts.models import Doctor
+from config.utils.query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, QueryInspector
+from prescriptions.api.views import PrescriptionListAPIView
+from prescriptions.models import Prescription
+
+
+@pytest.mark.django_db
+def test_query_inspector_repeated_queries():
+    inspector = QueryInspector()
+    with connection.execute_wrapper(inspector):
+        for pk in range(5):
+            list(Prescription.objects.filter(pk=pk))
+        list(Prescription.objects.filter(pk__in=[1, 2, 3]))
+        list(Prescription.objects.filter(pk__in=[1, 2]))  # IN 목록 개수만 다른 query는 같은 template
+    assert inspector.count == 7
+    repeated = inspector.get_repeated(threshold=5)
+    assert list(repeated.values()) == [5]
+    assert len(inspector.get_repeated(threshold=2)) == 2
+
+
+@pytest.mark.django_db
+def test_query_budget_middleware(api_client, monkeypatch):
+    doctor = Doctor.objects.get(user_id=2)
+    token = CustomRefreshToken.for_user(doctor.user)
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token.access_token))
+    url = reverse('prescriptions:prescription-list')
+
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert 0 < int(response['X-Query-Count']) <= PrescriptionListAPIView.query_budget
+    assert float(response['X-Query-Time']) >= 0 and response['X-Query-Repeated'] == '0'
+
+    # QUERY_BUDGET_ENFORCE(local_test_set): budget 초과 시 예외
+    monkeypatch.setattr(PrescriptionListAPIView, 'query_budget', 1)
+    with pytest.raises(QueryBudgetExceeded):
+        api_client.get(url)
+
+
+@pytest.mark.django_db
+def test_query_budget_middleware_async(rf):
+    # ASGI(async get_response): view thread(sync_to_async)에서 실행된 query 측정
+    async def get_response(request):
+        await sync_to_async(lambda: list(Prescription.objects.filter(pk__in=[1, 2])))()
+        return HttpResponse()
+
+    middleware = QueryBudgetMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(rf.get('/'))
+    assert response['X-Query-Count'] == '1'
+    assert not connection.execute_wrappers
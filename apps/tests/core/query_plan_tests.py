@@ -0,0 +1,25 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from config.utils.query_plans import autodiscover_query_plans, find_full_scans
+from prescriptions.models import Prescription
+
+
+@pytest.mark.django_db
+def test_registered_query_plans_use_index():
+    registry = autodiscover_query_plans()
+    assert 'prescriptions.writer_list' in registry and 'patient_files.uploader_list' in registry
+    call_command('check_query_plans', stdout=io.StringIO(), stderr=io.StringIO())  # full scan: CommandError
+
+
+@pytest.mark.django_db
+def test_find_full_scans():
+    # index가 없는 column 조건
+    full_scans = find_full_scans('description', Prescription.origin_objects.filter(description='full scan'))
+    assert [full_scan.table for full_scan in full_scans] == [Prescription._meta.db_table]
+    assert not find_full_scans('writer', Prescription.origin_objects.filter(writer_id=1))
+    # 허용한 table(row 수가 적은 table)은 제외
+    assert not find_full_scans('description', Prescription.origin_objects.filter(description='full scan'),
+                               allowed_tables=[Prescription._meta.db_table])
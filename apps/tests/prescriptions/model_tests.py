@@ -1,7 +1,20 @@
+import asyncio
+import datetime
+import io
+
 import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.db import transaction
+from django.http import HttpResponse
 
 from accounts.models import Doctor, Patient
+from prescriptions.api.filters import PrescriptionFilter
+from prescriptions.checks import CheckStateMiddleware, check_state
 from prescriptions.models import FilePrescription, Prescription
+from prescriptions.schedules import MergedSchedule, VirtualSchedule, build_virtual_file_prescription, schedule_days, \
+    sort_file_prescriptions
+from prescriptions.search import MySQLSearchEngine, PythonSearchEngine, prescription_search
 
 
 def test_prescriptions_stored_in_test_db(db, django_db_setup):
@@ -31,6 +44,7 @@ def test_auto_check_by_updated_file_prescription():
     first_file_prescription = file_prescriptions.first()
     first_file_prescription.checked = False
     first_file_prescription.save()
+    check_state.flush()  # 테스트는 commit 되지 않으므로 직접 반영
     assert first_file_prescription.checked is False
     not_checked_prescription = file_prescriptions.first().prescription
     assert not_checked_prescription.checked is False
@@ -39,12 +53,14 @@ def test_auto_check_by_updated_file_prescription():
     for file_prescription in file_prescriptions:
         file_prescription.checked = False
         file_prescription.save()
+    check_state.flush()
     not_checked_prescription = file_prescriptions.first().prescription
     assert not_checked_prescription.checked is False
 
     # file_prescription.checked=True
     first_file_prescription.checked = True
     first_file_prescription.save()
+    check_state.flush()
     assert first_file_prescription.checked is True
     not_checked_prescription = first_file_prescription.prescription
     assert not_checked_prescription.checked is False
@@ -53,9 +69,215 @@ def test_auto_check_by_updated_file_prescription():
     for file_prescription in file_prescriptions:
         file_prescription.checked = True
         file_prescription.save()
+    check_state.flush()
     parent_prescription_ids = set(file_prescriptions.values_list('prescription_id', flat=True))
     assert len(parent_prescription_ids) == 1  # file_prescription의 부모 id는 1개만 출력됨
 
     parent_prescription_id = parent_prescription_ids.pop()
     parent_prescription = Prescription.objects.get(id=parent_prescription_id)
     assert parent_prescription.checked is True
+
+
+@pytest.mark.django_db
+def test_check_state_batched_update(django_assert_num_queries):
+    check_state.pending.clear()  # 이전 테스트에서 수집된 id(commit 되지 않음)
+    prescription_ids = list(FilePrescription.objects.order_by('prescription_id').
+                            values_list('prescription_id', flat=True).distinct()[:3])
+    FilePrescription.objects.filter(prescription_id__in=prescription_ids).update(checked=True)
+    Prescription.objects.filter(id__in=prescription_ids).update(checked=False)
+
+    # 같은 요청(collect) 안의 저장은 prescription id만 수집
+    with check_state.collect():
+        for file_prescription in FilePrescription.objects.filter(prescription_id__in=prescription_ids):
+            file_prescription.save()
+        assert check_state.pending == set(prescription_ids)
+        assert set(Prescription.objects.filter(id__in=prescription_ids).values_list('checked', flat=True)) == {False}
+
+    # 집계 query 1회 + UPDATE 1회
+    with django_assert_num_queries(2):
+        check_state.flush()
+    assert set(Prescription.objects.filter(id__in=prescription_ids).values_list('checked', flat=True)) == {True}
+
+    # 변경이 없는 경우 UPDATE 하지 않음
+    check_state.mark(*prescription_ids)
+    with django_assert_num_queries(1):
+        check_state.flush()
+
+    # 일괄 수정(signal x) 이후 mark
+    FilePrescription.objects.filter(prescription_id=prescription_ids[0]).update(checked=False)
+    check_state.mark(prescription_ids[0])
+    check_state.flush()
+    assert Prescription.objects.get(id=prescription_ids[0]).checked is False
+    assert Prescription.objects.get(id=prescription_ids[1]).checked is True
+
+
+@pytest.mark.django_db
+def test_check_state_reschedule_after_rollback():
+    # rollback으로 등록(on_commit)이 제거된 경우 다음 mark()에서 다시 등록
+    check_state.flush()
+    prescription_id = FilePrescription.objects.values_list('prescription_id', flat=True).first()
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            check_state.mark(prescription_id)
+            assert check_state.scheduled
+            raise RuntimeError
+    assert not check_state.scheduled
+
+    check_state.mark(prescription_id)
+    assert check_state.scheduled and check_state.pending == {prescription_id}
+    check_state.flush()
+    assert not check_state.scheduled
+
+
+@pytest.mark.django_db
+def test_check_state_middleware_async(rf):
+    # ASGI(async get_response): view thread에서 수집 후 종료 시 1회 등록
+    check_state.flush()
+    prescription_id = FilePrescription.objects.values_list('prescription_id', flat=True).first()
+
+    async def get_response(request):
+        await sync_to_async(check_state.mark)(prescription_id)
+        return HttpResponse()
+
+    middleware = CheckStateMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    async_to_sync(middleware)(rf.get('/'))
+    assert check_state.pending == {prescription_id} and check_state.deferred == 0
+    check_state.flush()
+
+
+@pytest.mark.django_db
+def test_python_search_engine(doctor_with_group, patient_with_group):
+    create = lambda description, **kwargs: Prescription.objects.create(writer=doctor_with_group,
+                                                                       patient=patient_with_group,
+                                                                       description=description, **kwargs)
+    headache = create('두통이 심하고 두통약 복용 중', description_for_patient='충분한 휴식')
+    headache_once = create('가벼운 두통')
+    create('복통 증상')
+    deleted = create('두통 증상', deleted=True)
+
+    engine = PythonSearchEngine()
+    engine.sync()
+    result = list(engine.search(Prescription.objects.all(), '두통').order_by('-search_rank'))
+    assert [prescription.id for prescription in result] == [headache.id, headache_once.id]
+    assert deleted.id not in [prescription.id for prescription in result]
+
+    # 모든 단어 포함(AND), description_for_patient 포함
+    result = engine.search(Prescription.objects.all(), '두통 휴식')
+    assert list(result.values_list('id', flat=True)) == [headache.id]
+    assert not engine.search(Prescription.objects.all(), '두통 발열').exists()
+
+    # 변경 사항 반영(signal은 commit 이후 반영되므로 직접 갱신)
+    headache_once.description = '발열'
+    headache_once.save()
+    engine._set_document(headache_once.id, headache_once.description)
+    assert list(engine.search(Prescription.objects.all(), '두통').values_list('id', flat=True)) == [headache.id]
+
+
+@pytest.mark.django_db
+def test_python_search_engine_max_results(settings, doctor_with_group, patient_with_group):
+    # PRESCRIPTION_SEARCH_MAX_RESULTS: 점수 지정 개수만 제한, 결과(count)는 모두 포함
+    settings.PRESCRIPTION_SEARCH_MAX_RESULTS = 1
+    create = lambda description: Prescription.objects.create(writer=doctor_with_group, patient=patient_with_group,
+                                                             description=description)
+    headache = create('두통 두통 두통')
+    headache_once = create('가벼운 두통')
+    create('두통 증상')
+
+    engine = PythonSearchEngine()
+    engine.sync()
+    queryset = Prescription.objects.exclude(description='두통 증상')
+    result = list(engine.search(queryset, '두통').order_by('-search_rank', '-id'))
+    assert [prescription.id for prescription in result] == [headache.id, headache_once.id]
+    assert result[0].search_rank > 0 and result[1].search_rank == 0
+
+
+@pytest.mark.django_db
+def test_prescription_filter_search(settings, doctor_with_group, patient_with_group):
+    settings.PRESCRIPTION_SEARCH_ENGINE = 'prescriptions.search.PythonSearchEngine'
+    prescription_search.reset()
+    prescription = Prescription.objects.create(writer=doctor_with_group, patient=patient_with_group,
+                                               description='search keyword test')
+    try:
+        filterset = PrescriptionFilter(data={'search': 'keyword'}, queryset=Prescription.objects.choice_fields())
+        assert [obj.id for obj in filterset.qs] == [prescription.id]
+    finally:
+        prescription_search.reset()
+
+
+@pytest.mark.django_db
+def test_auto_search_engine_requires_index(settings):
+    # auto: FULLTEXT index(setup_prescription_search) 없이 MySQL engine을 선택하지 않음
+    settings.PRESCRIPTION_SEARCH_ENGINE = 'auto'
+    prescription_search.reset()
+    try:
+        engine = prescription_search.engine
+        if isinstance(engine, MySQLSearchEngine):
+            assert MySQLSearchEngine.has_fulltext_index()
+        list(engine.search(Prescription.objects.all(), '두통').values_list('id', flat=True))
+    finally:
+        prescription_search.reset()
+
+
+@pytest.mark.django_db
+def test_prescription_progress_counters():
+    prescription_id = FilePrescription.objects.order_by('prescription_id').values_list('prescription_id', flat=True)[0]
+    file_prescriptions = FilePrescription.objects.filter(prescription_id=prescription_id)
+    file_prescriptions.update(uploaded=False, checked=False)
+    first_file_prescription = file_prescriptions.order_by('day_number').first()
+    FilePrescription.objects.filter(id=first_file_prescription.id).update(uploaded=True, checked=True)
+
+    # 일괄 재계산(repair command)
+    call_command('rebuild_prescription_progress', stdout=io.StringIO())
+    prescription = Prescription.objects.get(id=prescription_id)
+    assert prescription.total_days == file_prescriptions.count()
+    assert prescription.uploaded_days == 1
+    assert prescription.checked_days == 1
+    assert prescription.checked is (file_prescriptions.count() == 1)
+
+    # 확인 경로(FilePrescription 저장) -> commit 이후 반영
+    second_file_prescription = file_prescriptions.order_by('day_number')[1]
+    second_file_prescription.uploaded = True
+    second_file_prescription.save()
+    check_state.flush()
+    prescription.refresh_from_db()
+    assert prescription.uploaded_days == 2
+    assert prescription.checked_days == 1
+
+
+@pytest.mark.django_db
+def test_merged_schedule_page_window(django_assert_max_num_queries):
+    # 가상 일정 병합: page 범위만 조회해도 전체 정렬 결과와 같은 순서
+    prescription = Prescription.objects.filter(writer_id=2).first()
+    queryset = FilePrescription.objects.filter(prescription__writer_id=2, date__isnull=False)
+    virtual = [build_virtual_file_prescription(prescription, day_number, date) for day_number, date in
+               schedule_days(datetime.date(2021, 1, 1), datetime.date(2021, 1, 5))]
+    expected = sort_file_prescriptions(list(queryset) + virtual, ['date'])
+
+    merged = MergedSchedule(queryset, virtual, ['date'])
+    assert len(merged) == len(expected)
+    for start in range(0, len(expected), 3):
+        with django_assert_max_num_queries(1):  # COUNT는 len에서 1회
+            page = merged[start:start + 3]
+        assert [obj.date for obj in page] == [obj.date for obj in expected[start:start + 3]]
+
+
+@pytest.mark.django_db
+def test_virtual_schedule_lazy_window():
+    # 가상 일정: date 범위 안의 날짜만, 필요한 개수만 ordering 순으로 생성
+    prescriptions = list(Prescription.objects.filter(writer_id=2)[:3])
+    for prescription in prescriptions:
+        prescription.start_date, prescription.end_date = datetime.date(2021, 1, 1), datetime.date(2021, 6, 29)
+    date_from, date_to = datetime.date(2021, 2, 1), datetime.date(2021, 2, 10)
+
+    for ordering in (['-created_at'], ['date'], ['-date', 'created_at']):
+        virtual = VirtualSchedule(prescriptions, ordering, date_from, date_to)
+        expected = sort_file_prescriptions(
+            [build_virtual_file_prescription(prescription, day_number, date) for prescription in prescriptions
+             for day_number, date in schedule_days(prescription.start_date, prescription.end_date)
+             if date_from <= date <= date_to and date not in virtual.materialized[prescription.id]], ordering)
+
+        assert len(virtual) == len(expected)
+        page = virtual[5:10]
+        assert [(obj.prescription_id, obj.date) for obj in page] == \
+               [(obj.prescription_id, obj.date) for obj in expected[5:10]]
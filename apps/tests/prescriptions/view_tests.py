@@ -1,10 +1,14 @@
+import base64
+
 import pytest
+from django.core.cache import caches
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from rest_framework.reverse import reverse
 
 from accounts.api.authentications import CustomRefreshToken
 from accounts.models import Doctor, Patient
-from files.models import DoctorFile
+from files.models import DoctorFile, PatientFile
 from prescriptions.models import Prescription, FilePrescription
 
 
@@ -176,3 +180,224 @@ def test_file_prescription_detail(api_client):
 @pytest.mark.django_db
 def test_file_prescription_create_and_update(api_client):
     pass
+
+
+@pytest.mark.django_db
+def test_lazy_schedule_file_prescriptions(api_client, settings):
+    settings.PRESCRIPTION_LAZY_SCHEDULE = True
+    doctor = Doctor.objects.get(user_id=2)
+    token = CustomRefreshToken.for_user(doctor.user)
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token.access_token))
+    value = {
+        "description": "lazy schedule",
+        "patient": 5,
+        "doctor_upload_files": [SimpleUploadedFile('lazy_file.md', b'lazy', content_type='multipart/form-data')],
+        "start_date": '2021-02-01',
+        "end_date": '2021-02-10'
+    }
+    response = api_client.post(reverse('prescriptions:prescription-create'), data=value, format='multipart')
+    assert response.status_code == 201
+    prescription = Prescription.objects.get(description='lazy schedule')
+    assert prescription.lazy_schedule is True
+    assert prescription.file_prescriptions.count() == 0  # 가상 일정(row 생성 x)
+
+    # 목록: 가상 일정 병합
+    url = reverse('prescriptions:choice-file-prescription')
+    response = api_client.get(url, data={'prescription_id': prescription.id})
+    assert response.status_code == 200
+    assert response.data['count'] == 10
+    assert all(data['id'] is None for data in response.data['results'])
+
+    response = api_client.get(url, data={'prescription_id': prescription.id, 'date': '2021-02-08',
+                                         'date_lookup': 'gte', 'ordering': 'date'})
+    assert [data['day_number'] for data in response.data['results']] == [8, 9, 10]
+
+    # 날짜 materialize: 1개의 row만 생성, 목록의 수는 동일
+    response = api_client.post(reverse('prescriptions:file-prescription-materialize'),
+                               data={'prescription': prescription.id, 'date': '2021-02-03'}, format='json')
+    assert response.status_code == 201
+    assert response.data['day_number'] == 3
+    assert prescription.file_prescriptions.count() == 1
+
+    response = api_client.get(url, data={'prescription_id': prescription.id})
+    assert response.data['count'] == 10
+    assert len([data for data in response.data['results'] if data['id'] is not None]) == 1
+
+    # 범위 밖의 날짜
+    response = api_client.post(reverse('prescriptions:file-prescription-materialize'),
+                               data={'prescription': prescription.id, 'date': '2021-03-01'}, format='json')
+    assert response.status_code == 400
+
+    # 환자 업로드(소견서, 날짜): 검증 실패 시 FilePrescription을 생성하지 않음
+    patient_token = CustomRefreshToken.for_user(Patient.objects.get(user_id=5).user)
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(patient_token.access_token))
+    upload_url = reverse('files:patient-file-upload')
+    upload = lambda date: api_client.post(upload_url, format='multipart', data={
+        'prescription': prescription.id, 'date': date,
+        'file': SimpleUploadedFile('lazy_upload.md', b'lazy', content_type='multipart/form-data')})
+    assert upload('2021-03-01').status_code == 400
+    assert prescription.file_prescriptions.count() == 1
+    assert upload('2021-02-05').status_code == 201
+    assert prescription.file_prescriptions.count() == 2
+
+    # 삭제된 소견서에는 업로드할 수 없음
+    Prescription.origin_objects.filter(id=prescription.id).update(deleted=True)
+    assert upload('2021-02-06').status_code == 400
+    assert prescription.file_prescriptions.count() == 2
+
+    for file in PatientFile.objects.filter(file_prescription__prescription_id=prescription.id):
+        file.hard_delete()
+    for file in DoctorFile.objects.filter(prescription_id=prescription.id):
+        file.hard_delete()
+
+
+@pytest.mark.django_db
+def test_update_prescription_schedule_with_diff(api_client):
+    doctor = Doctor.objects.get(user_id=2)
+    token = CustomRefreshToken.for_user(doctor.user)
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token.access_token))
+    value = {
+        "description": "diff update",
+        "patient": 5,
+        "doctor_upload_files": [SimpleUploadedFile('diff_file.md', b'diff', content_type='multipart/form-data')],
+        "start_date": '2021-02-01',
+        "end_date": '2021-02-10'
+    }
+    response = api_client.post(reverse('prescriptions:prescription-create'), data=value, format='multipart')
+    assert response.status_code == 201
+    prescription = Prescription.objects.get(description='diff update')
+    uploaded = prescription.file_prescriptions.get(date='2021-02-05')
+    FilePrescription.objects.filter(id=uploaded.id).update(uploaded=True, checked=True)
+    doctor_file = prescription.doctor_files.first()
+
+    # 범위 변경: 02-03 ~ 02-17(삭제 2일, 유지 8일, 추가 7일)
+    update_url = reverse('prescriptions:prescription-update', kwargs={'pk': prescription.id})
+    response = api_client.put(update_url, data={'start_date': '2021-02-03', 'end_date': '2021-02-17',
+                                                 'retained_doctor_files': [str(doctor_file.id)]}, format='json')
+    assert response.status_code == 200
+
+    file_prescriptions = prescription.file_prescriptions.all()
+    assert file_prescriptions.count() == 15
+    assert FilePrescription.origin_objects.filter(prescription_id=prescription.id, deleted=True).count() == 2
+    retained = file_prescriptions.get(date='2021-02-05')
+    assert retained.id == uploaded.id and retained.uploaded is True  # 유지되는 날짜의 업로드 정보 보존
+    assert retained.day_number == 3
+    assert sorted(file_prescriptions.values_list('day_number', flat=True)) == list(range(1, 16))
+    assert prescription.doctor_files.filter_not_deleted().get() == doctor_file
+
+    for file in DoctorFile.objects.filter(prescription_id=prescription.id):
+        file.hard_delete()
+
+
+@pytest.mark.django_db
+def test_bulk_update_file_prescriptions(api_client):
+    doctor = Doctor.objects.get(user_id=2)
+    token = CustomRefreshToken.for_user(doctor.user)
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token.access_token))
+    url = reverse('prescriptions:file-prescription-bulk-update')
+    own = FilePrescription.objects.filter_prescription_writer(doctor.user_id).order_by('id')
+    prescription_id = own.first().prescription_id
+    own.filter(prescription_id=prescription_id).update(checked=False)
+    targets = list(own.filter(prescription_id=prescription_id).values_list('id', flat=True)[:3])
+    other = FilePrescription.objects.exclude(prescription__writer_id=doctor.user_id).first()
+
+    # ids: 다른 의사의 FilePrescription은 수정되지 않음
+    response = api_client.put(url, data={'ids': targets + [other.id], 'checked': True}, format='json')
+    assert response.status_code == 200
+    assert response.data == {'updated': len(targets), 'prescriptions': [prescription_id]}
+    assert set(FilePrescription.objects.filter(id__in=targets).values_list('checked', flat=True)) == {True}
+    assert FilePrescription.objects.get(id=other.id).checked == other.checked
+
+    # filters: FilePrescriptionFilter 조건
+    response = api_client.put(url, data={'filters': {'prescription_id': prescription_id}, 'status': 'NORMAL'},
+                              format='json')
+    assert response.status_code == 200
+    assert response.data['updated'] == own.filter(prescription_id=prescription_id).count()
+    assert set(own.filter(prescription_id=prescription_id).values_list('status', flat=True)) == {'NORMAL'}
+
+    # 대상 또는 수정할 값이 없는 경우
+    assert api_client.put(url, data={'checked': True}, format='json').status_code == 400
+    assert api_client.put(url, data={'ids': targets}, format='json').status_code == 400
+
+    # filters: 알 수 없는 key(오타), ordering, 조건 없음 -> 수정하지 않음
+    abnormal = own.filter(status='ABNORMAL').count()
+    for filters in ({'prescripton_id': prescription_id}, {'prescription_id': prescription_id, 'ordering': 'date'},
+                    {'prescription_id': ''}):
+        response = api_client.put(url, data={'filters': filters, 'status': 'ABNORMAL'}, format='json')
+        assert response.status_code == 400
+    assert own.filter(status='ABNORMAL').count() == abnormal
+
+
+@pytest.mark.django_db
+def test_prescription_list_cursor_pagination(api_client):
+    doctor = Doctor.objects.get(user_id=2)
+    token = CustomRefreshToken.for_user(doctor.user)
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token.access_token))
+    expected = list(Prescription.objects.filter(writer_id=doctor.user_id).order_by('-created_at', '-id').
+                    values_list('id', flat=True))
+
+    url = reverse('prescriptions:prescription-list') + '?pagination=cursor&limit=2&with_count=true'
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert response.data['count'] == len(expected)
+    ids = [prescription['id'] for prescription in response.data['results']]
+    next_url = response.data['next']
+    while next_url:
+        response = api_client.get(next_url)
+        assert 'count' not in response.data or response.data['count'] == len(expected)
+        ids += [prescription['id'] for prescription in response.data['results']]
+        next_url = response.data['next']
+    assert ids == expected
+
+    # 잘못된 cursor, 정렬 field 값이 NULL인 cursor
+    assert api_client.get(reverse('prescriptions:prescription-list') + '?cursor=invalid').status_code == 404
+    null_cursor = base64.urlsafe_b64encode(b'[null,1]').decode()
+    response = api_client.get(reverse('prescriptions:prescription-list') + f'?pagination=cursor&cursor={null_cursor}')
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_prescription_list_count_strategy(api_client, settings):
+    doctor = Doctor.objects.get(user_id=2)
+    token = CustomRefreshToken.for_user(doctor.user)
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token.access_token))
+    url = reverse('prescriptions:prescription-list')
+    total = Prescription.objects.filter(writer_id=doctor.user_id).count()
+
+    response = api_client.get(url + '?limit=1')
+    assert response.data['count'] == total and response.data['count_strategy'] == 'exact'
+
+    # has_next: count 없이 다음 페이지 여부만
+    settings.PAGINATION_COUNT_STRATEGY = 'has_next'
+    response = api_client.get(url + '?limit=1')
+    assert response.data['count'] is None and response.data['count_strategy'] == 'has_next'
+    assert (response.data['next'] is not None) is (total > 1)
+    response = api_client.get(url + f'?limit=1&offset={total - 1}')
+    assert response.data['next'] is None and len(response.data['results']) == 1
+
+    # cached: 같은 사용자 + filter parameter는 캐시된 count(페이지 위치는 key에서 제외)
+    # - filter_class가 있는 choice view 사용(목록 view는 checked parameter를 사용하지 않음)
+    settings.PAGINATION_COUNT_STRATEGY = 'cached'
+    url = reverse('prescriptions:choice-prescription')
+    caches['default'].clear()
+    try:
+        assert api_client.get(url + '?limit=1&checked=false').data['count_strategy'] == 'cached'
+        cached_count = api_client.get(url + '?limit=1&checked=false').data['count']
+        Prescription.objects.create(writer=doctor, patient_id=5, description='count cache')
+        assert api_client.get(url + '?offset=1&checked=false').data['count'] == cached_count
+        assert api_client.get(url + '?checked=true').data['count'] == \
+               Prescription.objects.filter(writer_id=doctor.user_id, checked=True).count()
+    finally:
+        caches['default'].clear()
+
+    # estimated: 작성자 범위(filter) query는 EXPLAIN 예상 row 수(MySQL), 마지막 페이지는 정확한 count
+    settings.PAGINATION_COUNT_STRATEGY = 'estimated'
+    url = reverse('prescriptions:prescription-list')
+    total = Prescription.objects.filter(writer_id=doctor.user_id).count()
+    response = api_client.get(url + '?limit=1')
+    assert response.data['count_strategy'] == ('estimated' if connection.vendor == 'mysql' else 'cached')
+    assert response.data['count'] >= 1 + int(total > 1)
+    response = api_client.get(url + f'?limit=1&offset={total - 1}')
+    assert response.data['next'] is None
+    if connection.vendor == 'mysql':
+        assert response.data['count'] == total